@@ -40,9 +40,11 @@ INSTALLED_APPS = [
     'api',
     'rest_framework',
     'django_filters',
+    'query_profiler',
 ]
 
 MIDDLEWARE = [
+    'query_profiler.middleware.QueryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,9 +127,29 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    # Basic first, so unauthenticated writes get 401 with a WWW-Authenticate
+    # challenge; browser/test-client sessions still work through the second
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.BasicAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ]
 }
+
+TEST_RUNNER = 'query_profiler.testing.BudgetEnforcingTestRunner'
+
+# Rows per database fetch and per response chunk for ?stream=ndjson|json list exports
+API_STREAM_CHUNK_SIZE = 2000
+
+# Books nested per author on /api/authors/: the default and the largest ?books_limit=
+AUTHOR_BOOKS_LIMIT = 100
+AUTHOR_BOOKS_LIMIT_MAX = 1000
+
+# /api/books/bulk/: rows validated and written per transaction, and the most
+# per-row errors listed in one response
+BOOK_BULK_BATCH_SIZE = 1000
+BOOK_BULK_MAX_ERRORS = 1000
@@ -0,0 +1,153 @@
+"""
+Bulk create, update and delete for books.
+
+Rows are read from the request (a JSON array, or an NDJSON upload parsed
+lazily by api.streaming.NDJSONParser) BOOK_BULK_BATCH_SIZE at a time. Each
+batch is:
+
+- validated with `BookSerializer(many=True)`, so every row gets the same
+  checks as the single-book endpoints (including the future-year check),
+  with one author query per batch instead of one per row;
+- written with one `bulk_create`/`bulk_update`/filtered `delete()` in its own
+  transaction, so a large upload never holds one long transaction and a
+  failure only loses the batch being written.
+
+Rows that fail validation are skipped and reported by their position in the
+upload (0-based, blank NDJSON lines not counted); the other rows are
+written. Only the first BOOK_BULK_MAX_ERRORS errors are listed. An update
+naming a book already updated earlier in the same request is rejected, so
+each book is validated, written and counted once.
+
+`bulk_create` skips `save()` and model signals; `update_books` writes the
+fields present in the batch for every row of it.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ParseError
+
+from .models import Book
+from .serializers import BookSerializer, as_pk
+
+
+def batch_size():
+    return getattr(settings, 'BOOK_BULK_BATCH_SIZE', 1000)
+
+
+def max_errors():
+    return getattr(settings, 'BOOK_BULK_MAX_ERRORS', 1000)
+
+
+class BulkReport:
+    """Counts and per-row errors of one bulk request."""
+
+    def __init__(self, action):
+        self.action = action
+        self.written = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, detail):
+        self.failed += 1
+        if len(self.errors) < max_errors():
+            self.errors.append({'row': row, 'errors': detail})
+
+    def as_dict(self):
+        return {
+            self.action: self.written,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def _batches(rows, report):
+    """Batches of (position, row) from `rows`; unparseable NDJSON lines go to `report`."""
+    rows = iter(rows)
+    offset = 0
+    while True:
+        batch = list(islice(rows, batch_size()))
+        if not batch:
+            return
+        valid = []
+        for index, row in enumerate(batch, offset):
+            if isinstance(row, ParseError):
+                report.add_error(index, {'non_field_errors': [str(row.detail)]})
+            else:
+                valid.append((index, row))
+        yield valid
+        offset += len(batch)
+
+
+def _validate(indexed_rows, report, **serializer_kwargs):
+    """(instance, validated_data) of the rows passing BookSerializer; reports the others."""
+    serializer = BookSerializer(data=[row for _, row in indexed_rows], many=True, **serializer_kwargs)
+    if not serializer.is_valid():
+        for (index, _), errors in zip(indexed_rows, serializer.errors):
+            if errors:
+                report.add_error(index, errors)
+    return serializer.valid_rows
+
+
+def create_books(rows):
+    report = BulkReport('created')
+    for indexed_rows in _batches(rows, report):
+        books = [Book(**attrs) for _, attrs in _validate(indexed_rows, report)]
+        with transaction.atomic():
+            Book.objects.bulk_create(books)
+        report.written += len(books)
+    return report
+
+
+def update_books(rows, partial=False):
+    report = BulkReport('updated')
+    seen = set()
+    for indexed_rows in _batches(rows, report):
+        unique_rows = []
+        for index, row in indexed_rows:
+            pk = as_pk(row.get('id')) if isinstance(row, dict) else None
+            if pk in seen:
+                report.add_error(index, {'id': [f'Book {pk} is already updated by an earlier row.']})
+                continue
+            if pk is not None:
+                seen.add(pk)
+            unique_rows.append((index, row))
+        indexed_rows = unique_rows
+        ids = {as_pk(row.get('id')) for _, row in indexed_rows if isinstance(row, dict)}
+        with transaction.atomic():
+            # Locked until the batch is written, so concurrent writers cannot interleave
+            books = Book.objects.select_for_update().in_bulk(ids - {None})
+            validated = _validate(indexed_rows, report, instance=books, partial=partial)
+            fields = set()
+            for book, attrs in validated:
+                for name, value in attrs.items():
+                    setattr(book, name, value)
+                fields.update(attrs)
+            if fields:
+                Book.objects.bulk_update([book for book, _ in validated], sorted(fields))
+        report.written += len(validated)
+    return report
+
+
+def delete_books(rows):
+    """Delete the books named by `rows`, ids or objects with an "id"."""
+    report = BulkReport('deleted')
+    for indexed_rows in _batches(rows, report):
+        ids = {}
+        for index, row in indexed_rows:
+            pk = as_pk(row.get('id') if isinstance(row, dict) else row)
+            if pk is None:
+                report.add_error(index, {'id': ['A valid integer is required.']})
+            else:
+                ids[index] = pk
+        with transaction.atomic():
+            existing = set(
+                Book.objects.select_for_update().filter(pk__in=ids.values()).values_list('pk', flat=True)
+            )
+            Book.objects.filter(pk__in=existing).delete()
+        for index, pk in ids.items():
+            if pk not in existing:
+                report.add_error(index, {'id': [f'No book with id {pk}.']})
+        report.written += len(existing)
+    return report
@@ -0,0 +1,131 @@
+"""
+Compiled read paths for ModelSerializers.
+
+DRF renders each object by walking the serializer's fields: `get_attribute`
+(a source lookup with its own error handling), a None check, then the
+field's `to_representation`. On a list of 100k books that per-field
+machinery, not the database, is most of the response time.
+
+CompiledReadMixin replaces `to_representation` with a function generated
+once per set of readable fields, equivalent to
+
+    def represent(obj):
+        return {'id': obj.id, 'title': obj.title,
+                'publication_year': obj.publication_year, 'author': obj.author_id}
+
+Fields whose output is the model value itself are read straight off the
+instance: plain Char/Integer/Float/Boolean fields over concrete model fields
+of the same kind (a CharField over an IntegerField still goes through
+`str()`) and primary key relations (read from the `<name>_id` attribute, so the
+related row is never loaded).
+Every other field (nested serializers, method fields, dates, custom field
+classes) goes through DRF's usual get_attribute/to_representation steps,
+so the output is always identical to the uncompiled serializer's.
+
+Only the output side changes. Validation, `create()` and `update()` run
+through DRF as before.
+"""
+import keyword
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+# Field classes (exactly these, not subclasses) whose to_representation
+# returns the values of these model fields unchanged
+PASSTHROUGH_FIELDS = {
+    serializers.BooleanField: (models.BooleanField,),
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.FloatField: (models.FloatField,),
+    serializers.IntegerField: (models.IntegerField,),
+}
+
+
+_SKIP = object()
+
+
+def _represent(field, instance):
+    """DRF's own per-field step from Serializer.to_representation."""
+    try:
+        attribute = field.get_attribute(instance)
+    except SkipField:
+        # e.g. a read-only field for an annotation the queryset did not add
+        return _SKIP
+    check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+    return None if check_for_none is None else field.to_representation(attribute)
+
+
+def _attribute_expression(field, model):
+    """`obj.<attr>` when `field` can be read straight off a `model` instance, else None."""
+    source = field.source
+    if model is None or field.source_attrs != [source] or not source.isidentifier() or keyword.iskeyword(source):
+        return None
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        # Properties and annotations may be missing; DRF decides whether to skip them
+        return None
+    if not model_field.concrete:
+        return None
+    if (
+        isinstance(model_field, PASSTHROUGH_FIELDS.get(type(field), ()))
+        # Custom model fields may load values of another type from the database
+        and not hasattr(model_field, 'from_db_value')
+    ):
+        return f'obj.{model_field.attname}'
+    # Forward foreign keys only: the raw id, without fetching the related row
+    if (
+        isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None
+        # Subclasses only changing how input is resolved render the same way
+        and type(field).to_representation is serializers.PrimaryKeyRelatedField.to_representation
+        and type(field).get_attribute is serializers.PrimaryKeyRelatedField.get_attribute
+        and model_field.many_to_one and model_field.target_field.primary_key
+    ):
+        return f'obj.{model_field.attname}'
+    return None
+
+
+@lru_cache(maxsize=None)
+def _build(source):
+    namespace = {'_represent': _represent, '_SKIP': _SKIP}
+    exec(compile(source, '<compiled serializer>', 'exec'), namespace)
+    return namespace['build']
+
+
+def compile_representation(serializer):
+    """A `represent(obj) -> dict` function for `serializer`'s readable fields."""
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    items = []
+    skippable = []
+    fallback = []
+    for field in serializer._readable_fields:
+        expression = _attribute_expression(field, model)
+        if expression is None:
+            expression = f'_represent(fields[{len(fallback)}], obj)'
+            fallback.append(field)
+            skippable.append(field.field_name)
+        items.append(f'{field.field_name!r}: {expression}')
+    lines = [
+        'def build(fields):',
+        '    def represent(obj):',
+        f'        ret = {{{", ".join(items)}}}',
+    ]
+    for name in skippable:
+        lines += [f'        if ret[{name!r}] is _SKIP:', f'            del ret[{name!r}]']
+    lines += ['        return ret', '    return represent', '']
+    # The source only depends on field names and kinds, so equal field sets share one compile
+    return _build('\n'.join(lines))(tuple(fallback))
+
+
+class CompiledReadMixin:
+    """Renders instances with a compiled function instead of DRF's field loop."""
+
+    def to_representation(self, instance):
+        try:
+            represent = self._compiled_representation
+        except AttributeError:
+            represent = self._compiled_representation = compile_representation(self)
+        return represent(instance)
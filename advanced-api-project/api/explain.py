@@ -0,0 +1,86 @@
+"""
+Replaying list requests through EXPLAIN.
+
+`explain_request(path)` resolves a logged request path such as
+`/api/books/?author=3&ordering=-publication_year` to its DRF view, builds
+the queryset exactly as the view would (`get_queryset()` then the filter
+backends) and asks the database for its plan. `read_plan` reduces the plan
+to what matters for indexing: tables read by a full scan and whether the
+rows need a separate sort.
+
+Only the view's main query is explained; prefetches and counts are not.
+Plans depend on table sizes and statistics, so replay against a database
+with production-like data.
+"""
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+from rest_framework.mixins import ListModelMixin
+from rest_framework.request import Request
+
+# Access log lines ('"GET /api/books/?x=1 HTTP/1.1"') or bare paths
+_REQUEST_RE = re.compile(r'"?GET\s+(/\S*)')
+_SQLITE_SCAN_RE = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+_POSTGRES_SCAN_RE = re.compile(r'\bSeq Scan on (\w+)')
+
+
+@dataclass
+class Plan:
+    full_scans: list = field(default_factory=list)
+    sorts: bool = False
+    text: str = ''
+
+
+def read_plan(text, vendor):
+    """Full scans and sorts in an EXPLAIN `text` from a `vendor` database."""
+    if vendor == 'sqlite':
+        return Plan(sorted(set(_SQLITE_SCAN_RE.findall(text))), 'USE TEMP B-TREE' in text, text)
+    if vendor == 'postgresql':
+        return Plan(sorted(set(_POSTGRES_SCAN_RE.findall(text))), bool(re.search(r'\bSort\b', text)), text)
+    raise ValueError(f'Reading {vendor} query plans is not supported.')
+
+
+def parse_logged_request(line, default_path):
+    """The request path in a log `line`; a bare query string goes to `default_path`."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    match = _REQUEST_RE.search(line)
+    if match:
+        return match.group(1)
+    if line.startswith('/'):
+        return line.split()[0]
+    return f"{default_path}?{line.lstrip('?')}"
+
+
+def request_shape(path):
+    """`path` with parameter values hidden, except orderings: requests with one shape share a plan."""
+    parts = urlsplit(path)
+    params = sorted(
+        (name, value if name == 'ordering' else '?')
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    )
+    return parts.path + ('?' + urlencode(params, safe='?,-') if params else '')
+
+
+def explain_request(path, using='default'):
+    """The Plan of the main query the list view at `path` runs."""
+    parts = urlsplit(path)
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        raise ValueError(f'No view for {parts.path}.')
+    view_class = getattr(match.func, 'view_class', None)
+    if view_class is None or not issubclass(view_class, ListModelMixin):
+        raise ValueError(f'{parts.path} is not served by a DRF list view.')
+
+    view = view_class()
+    view.request = Request(RequestFactory().get(path))
+    view.args, view.kwargs = match.args, match.kwargs
+    view.format_kwarg = None
+    queryset = view.filter_queryset(view.get_queryset()).using(using)
+    return read_plan(queryset.explain(), connections[using].vendor)
@@ -0,0 +1,79 @@
+import random
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.exceptions import APIException
+
+from api.explain import explain_request, parse_logged_request, request_shape
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay logged list requests (access log lines, paths or bare query strings) through "
+        "EXPLAIN and report which filter/ordering combinations fall back to full table scans "
+        "or separate sorts. Run it against a database with production-like data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', nargs='?', help="File with one logged request per line (default: stdin).")
+        parser.add_argument('--path', default='/api/books/',
+                            help="View path for lines that are bare query strings (default: /api/books/).")
+        parser.add_argument('--sample', type=int, help="Replay a random sample of this many requests.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for --sample (default: 0).")
+        parser.add_argument('--database', default='default', help="Database to explain against (default: default).")
+        parser.add_argument('--show-plans', action='store_true', help="Print the plan of every flagged request shape.")
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help="Exit with an error if any request shape does a full scan.")
+
+    def handle(self, *args, **options):
+        if connections[options['database']].vendor not in ('sqlite', 'postgresql'):
+            raise CommandError("advise_indexes reads SQLite and PostgreSQL plans only.")
+
+        if options['log']:
+            with open(options['log']) as log:
+                lines = log.readlines()
+        else:
+            lines = sys.stdin.readlines()
+        paths = [path for path in (parse_logged_request(line, options['path']) for line in lines) if path]
+        if options['sample'] and options['sample'] < len(paths):
+            paths = random.Random(options['seed']).sample(paths, options['sample'])
+        if not paths:
+            raise CommandError("No requests to replay.")
+
+        # Requests differing only in filter values share a plan: explain one per shape
+        shapes = Counter(request_shape(path) for path in paths)
+        examples = {}
+        for path in paths:
+            examples.setdefault(request_shape(path), path)
+
+        flagged = 0
+        scans = 0
+        self.stdout.write(f"{'requests':>8}  {'verdict':<40}shape")
+        for shape, count in shapes.most_common():
+            try:
+                plan = explain_request(examples[shape], using=options['database'])
+            except ValueError as exc:
+                self.stdout.write(f"{count:>8}  {'skipped':<40}{shape}  ({exc})")
+                continue
+            except APIException as exc:
+                # The view rejects the logged parameters (e.g. an id missing from this database)
+                rejected = ', '.join(exc.detail) if isinstance(exc.detail, dict) else exc.detail
+                self.stdout.write(f"{count:>8}  {'skipped':<40}{shape}  (rejected: {rejected})")
+                continue
+            problems = [f"full scan: {', '.join(plan.full_scans)}"] if plan.full_scans else []
+            if plan.sorts:
+                problems.append('sort')
+            verdict = '; '.join(problems) or 'indexed'
+            style = self.style.WARNING if problems else self.style.SUCCESS
+            self.stdout.write(f"{count:>8}  {style(f'{verdict:<40}')}{shape}")
+            if problems:
+                flagged += count
+                scans += bool(plan.full_scans)
+                if options['show_plans']:
+                    self.stdout.write(''.join(f"          {line}\n" for line in plan.text.splitlines()))
+
+        self.stdout.write(f"\n{flagged} of {len(paths)} requests need a full scan or a sort.")
+        if options['fail_on_scan'] and scans:
+            raise CommandError(f"{scans} request shape(s) fall back to full table scans.")
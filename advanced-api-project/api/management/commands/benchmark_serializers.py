@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from rest_framework import serializers
+
+from api.models import Author, Book
+from api.serializers import AuthorSerializer, BookSerializer
+
+
+def uncompiled(serializer_class, **declared):
+    """The same serializer without CompiledReadMixin, i.e. plain DRF."""
+    return type(
+        f'Plain{serializer_class.__name__}', (serializers.ModelSerializer,),
+        {'Meta': serializer_class.Meta, **declared},
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list serialization with the compiled Book/Author serializers against "
+        "plain DRF ModelSerializers and against raw values() rows, on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100_000, help="Books to create (default: 100000).")
+        parser.add_argument('--authors', type=int, default=1000, help="Authors to spread them over (default: 1000).")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the best is reported (default: 3).")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options['books'], options['authors'])
+            self.run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, books, authors):
+        Author.objects.bulk_create(
+            [Author(id=i, name=f'Author {i}') for i in range(1, authors + 1)], batch_size=5000
+        )
+        Book.objects.bulk_create(
+            [
+                Book(title=f'Book {i}', publication_year=1900 + i % 125, author_id=i % authors + 1)
+                for i in range(books)
+            ],
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {books} books by {authors} authors.")
+
+    def run(self, repeat):
+        plain_book = uncompiled(BookSerializer)
+        plain_author = uncompiled(
+            AuthorSerializer,
+            books=plain_book(many=True, read_only=True),
+            book_count=serializers.IntegerField(read_only=True),
+        )
+        book_fields = list(BookSerializer.Meta.fields)
+        # Load rows once, so the timings below are serialization only
+        books = list(Book.objects.all())
+        authors = list(Author.objects.annotate(book_count=Count('books')).prefetch_related('books'))
+        book_count = len(books)
+
+        cases = [
+            ('books, DRF ModelSerializer', lambda: plain_book(books, many=True).data),
+            ('books, compiled', lambda: BookSerializer(books, many=True).data),
+            ('books, values() incl. query', lambda: list(Book.objects.values(*book_fields))),
+            ('authors+books, DRF', lambda: plain_author(authors, many=True).data),
+            ('authors+books, compiled', lambda: AuthorSerializer(authors, many=True).data),
+        ]
+        self.stdout.write(f"\n{'case':<30}{'best ms':>10}{'books/s':>12}")
+        for name, case in cases:
+            best = float('inf')
+            for _ in range(repeat):
+                started = time.perf_counter()
+                case()
+                best = min(best, time.perf_counter() - started)
+            self.stdout.write(f"{name:<30}{best * 1000:>10.1f}{book_count / best:>12,.0f}")
@@ -3,7 +3,14 @@ from django.db import models
 # Create your models here.
 class Author(models.Model):
     name = models.CharField(max_length=200)
-    
+
+    class Meta:
+        indexes = [
+            # /api/authors/?ordering=name and exact lookups by name
+            models.Index(fields=["name"], name="api_author_name_idx"),
+        ]
+
+
 class Book(models.Model):
     title = models.CharField(max_length=200)
     publication_year = models.IntegerField()
@@ -16,3 +23,18 @@ class Book(models.Model):
         on_delete=models.CASCADE,
         related_name="books"
     )
+
+    # Indexes for the filter/ordering combinations BookListView advertises
+    # (filterset_fields, ordering_fields). `search` uses icontains, which no
+    # B-tree index can serve; manage.py advise_indexes shows what each
+    # logged request actually does.
+    class Meta:
+        indexes = [
+            # ?title=..., ?ordering=title
+            models.Index(fields=["title"], name="api_book_title_idx"),
+            # ?publication_year=..., ?ordering=(-)publication_year, with id as tie-breaker
+            models.Index(fields=["publication_year", "id"], name="api_book_year_idx"),
+            # ?author=...&ordering=(-)publication_year, and the newest-books
+            # prefetch of /api/authors/ (partitioned by author, newest first)
+            models.Index(fields=["author", "publication_year"], name="api_book_author_year_idx"),
+        ]
@@ -2,15 +2,82 @@ from rest_framework import serializers
 from .models import Author, Book
 from datetime import datetime
 
+from .compiled import CompiledReadMixin
 
-class BookSerializer(serializers.ModelSerializer):
+
+def as_pk(value):
+    """`value` as an integer primary key, or None."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves ids from `prefetched` (an in_bulk()
+    dict) when one is set, instead of one query per value. Ids missing from
+    it go through the usual lookup and its error messages.
+    """
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None:
+            obj = self.prefetched.get(as_pk(data))
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class BookListSerializer(serializers.ListSerializer):
+    """
+    BookSerializer(many=True), tuned for bulk writes:
+
+    - authors of all rows are fetched with one query before validation;
+    - with a `{pk: book}` dict as the instance, each row is validated as an
+      update of the book its "id" names;
+    - `valid_rows` keeps (instance, validated_data) for every row that passed,
+      so callers can save those even when other rows failed.
+    """
+    def to_internal_value(self, data):
+        self.valid_rows = []
+        author_field = self.child.fields["author"]
+        if isinstance(data, list):
+            author_ids = {as_pk(row.get("author")) for row in data if isinstance(row, dict)}
+            author_field.prefetched = Author.objects.in_bulk(author_ids - {None})
+        try:
+            return super().to_internal_value(data)
+        finally:
+            author_field.prefetched = None
+            self.child.instance = None
+
+    def run_child_validation(self, data):
+        if isinstance(self.instance, dict):
+            pk = as_pk(data.get("id")) if isinstance(data, dict) else None
+            self.child.instance = self.instance.get(pk)
+            if self.child.instance is None:
+                message = "This field is required." if pk is None else f"No book with id {pk}."
+                raise serializers.ValidationError({"id": [message]})
+        validated = super().run_child_validation(data)
+        self.valid_rows.append((self.child.instance, validated))
+        return validated
+
+
+class BookSerializer(CompiledReadMixin, serializers.ModelSerializer):
     """
     Serializes Book instances.
     Includes custom validation to prevent future publication years.
+    Output goes through a compiled function (see api.compiled);
+    validation and saving are plain DRF.
     """
+    author = PrefetchedPrimaryKeyRelatedField(queryset=Author.objects.all())
+
     class Meta:
         model = Book
         fields = ["id", "title", "publication_year", "author"]
+        list_serializer_class = BookListSerializer
 
     def validate_publication_year(self, value):
         """Ensure the publication year is not in the future."""
@@ -22,14 +89,36 @@ class BookSerializer(serializers.ModelSerializer):
         return value
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Accepts `fields=[...]` to render only those fields, e.g. from a
+    `?fields=id,name` query parameter. Unknown names are a validation error.
+    """
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                "fields": f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                          f"Choose from: {', '.join(self.fields)}."
+            })
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+
+class AuthorSerializer(SparseFieldsetMixin, CompiledReadMixin, serializers.ModelSerializer):
     """
     Serializes Author instances,
     embedding a nested representation of all related books.
+    Prefetch "books" when serializing many authors.
+    book_count is only rendered when the queryset is annotated with it.
     """
     books = BookSerializer(many=True, read_only=True)  
     # "books" comes from related_name="books" on the Book model
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Author
-        fields = ["id", "name", "books"]
+        fields = ["id", "name", "book_count", "books"]
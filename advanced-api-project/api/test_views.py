@@ -1,3 +1,7 @@
+import json
+from base64 import b64encode
+
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -98,3 +102,254 @@ class BookAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         years = [item["publication_year"] for item in response.data]
         self.assertEqual(years, sorted(years, reverse=True))
+
+    # --- Streaming ---
+
+    def stream(self, params, **extra):
+        response = self.client.get(self.list_url, params, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_stream_ndjson_matches_list(self):
+        expected = self.client.get(self.list_url, {"ordering": "id"}).data
+        response, body = self.stream({"stream": "ndjson", "ordering": "id"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertTrue(body.endswith(b"\n"))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
+    def test_stream_ndjson_from_accept_header(self):
+        response, body = self.stream({}, HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_stream_json_array_matches_list(self):
+        expected = self.client.get(self.list_url, {"ordering": "-publication_year"}).data
+        response, body = self.stream({"stream": "json", "ordering": "-publication_year"})
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(body), expected)
+
+    @override_settings(API_STREAM_CHUNK_SIZE=1)
+    def test_stream_sends_chunks_as_rows_are_read(self):
+        Book.objects.create(title="Third Book", publication_year=2020, author=self.author)
+        response = self.client.get(self.list_url, {"stream": "json", "ordering": "id"})
+        chunks = list(response.streaming_content)
+        # "[", one chunk per row, "]"
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(json.loads(b"".join(chunks))), 3)
+
+    def test_stream_applies_filters_and_search(self):
+        _, body = self.stream({"stream": "ndjson", "search": "Another"})
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Another Book"])
+
+        _, body = self.stream({"stream": "json", "title": "No Such Book"})
+        self.assertEqual(json.loads(body), [])
+
+        _, body = self.stream({"stream": "ndjson", "title": "No Such Book"})
+        self.assertEqual(body, b"")
+
+    def test_stream_unknown_format(self):
+        response = self.client.get(self.list_url, {"stream": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("stream", response.data)
+
+
+class AuthorAPITestCase(APITestCase):
+    def setUp(self):
+        self.prolific = Author.objects.create(name="Prolific Author")
+        self.occasional = Author.objects.create(name="Occasional Author")
+        self.silent = Author.objects.create(name="Silent Author")
+        for year in range(1990, 2000):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=self.prolific)
+        Book.objects.create(title="Only Book", publication_year=2005, author=self.occasional)
+
+        self.list_url = reverse("author-list")
+        self.detail_url = lambda pk: reverse("author-detail", kwargs={"pk": pk})
+
+    def test_list_authors_with_books_in_two_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_name = {author["name"]: author for author in response.data}
+        self.assertEqual(by_name["Prolific Author"]["book_count"], 10)
+        self.assertEqual(len(by_name["Prolific Author"]["books"]), 10)
+        self.assertEqual(by_name["Silent Author"]["book_count"], 0)
+        self.assertEqual(by_name["Silent Author"]["books"], [])
+
+    def test_list_authors_authenticated_within_budget(self):
+        # The test runner enforces AuthorListView.query_budget
+        User.objects.create_user(username="reader", password="testpass")
+        self.client.login(username="reader", password="testpass")
+        self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_200_OK)
+
+        self.client.logout()
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + b64encode(b"reader:testpass").decode())
+        self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_200_OK)
+
+    def test_books_limit_keeps_newest_and_full_count(self):
+        response = self.client.get(self.list_url, {"books_limit": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        prolific = response.data[0]
+        self.assertEqual([book["publication_year"] for book in prolific["books"]], [1999, 1998, 1997])
+        self.assertEqual(prolific["book_count"], 10)
+        self.assertEqual(len(response.data[1]["books"]), 1)
+
+    @override_settings(AUTHOR_BOOKS_LIMIT=2)
+    def test_books_limit_default(self):
+        response = self.client.get(self.detail_url(self.prolific.pk))
+        self.assertEqual(len(response.data["books"]), 2)
+
+    def test_books_limit_validation(self):
+        for value in ("0", "abc", "100000"):
+            response = self.client.get(self.list_url, {"books_limit": value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, value)
+            self.assertIn("books_limit", response.data)
+
+    def test_sparse_fieldset_skips_books_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, {"fields": "id,name"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0], {"id": self.prolific.pk, "name": "Prolific Author"})
+
+    def test_sparse_fieldset_unknown_field(self):
+        response = self.client.get(self.detail_url(self.prolific.pk), {"fields": "id,isbn"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("isbn", str(response.data["fields"]))
+
+    def test_detail(self):
+        response = self.client.get(self.detail_url(self.occasional.pk), {"fields": "name,book_count"})
+        self.assertEqual(response.data, {"name": "Occasional Author", "book_count": 1})
+
+    def test_order_by_book_count_without_rendering_it(self):
+        response = self.client.get(self.list_url, {"ordering": "-book_count", "fields": "name"})
+        self.assertEqual(
+            [author["name"] for author in response.data],
+            ["Prolific Author", "Occasional Author", "Silent Author"],
+        )
+
+
+class BookBulkAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk", password="bulkpass")
+        self.client.force_authenticate(self.user)
+        self.author = Author.objects.create(name="Bulk Author")
+        self.other_author = Author.objects.create(name="Other Author")
+        self.url = reverse("book-bulk")
+
+    def rows(self, count, **overrides):
+        return [
+            {"title": f"Bulk {i}", "publication_year": 1950 + i % 50, "author": self.author.pk, **overrides}
+            for i in range(count)
+        ]
+
+    def post_ndjson(self, rows, method="post"):
+        body = "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+        return getattr(self.client, method)(self.url, body, content_type="application/x-ndjson")
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, self.rows(1), format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(BOOK_BULK_BATCH_SIZE=10)
+    def test_create_json_array_in_batches(self):
+        # Per batch: one author lookup and one INSERT, in a transaction
+        # (a savepoint pair inside the test case's own transaction)
+        with self.assertNumQueries(3 * 4):
+            response = self.client.post(self.url, self.rows(25), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 25)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(Book.objects.filter(author=self.author).count(), 25)
+
+    def test_create_reports_row_errors_and_keeps_valid_rows(self):
+        rows = self.rows(4)
+        rows[1]["publication_year"] = 9999
+        rows[2]["author"] = 424242
+        response = self.post_ndjson(rows[:3] + ["{not json"] + rows[3:])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 3))
+        errors = {error["row"]: error["errors"] for error in response.data["errors"]}
+        self.assertIn("publication_year", errors[1])
+        self.assertIn("author", errors[2])
+        self.assertIn("invalid JSON", errors[3]["non_field_errors"][0])
+        self.assertEqual(
+            set(Book.objects.values_list("title", flat=True)), {"Bulk 0", "Bulk 3"}
+        )
+
+    def test_nothing_written_is_a_bad_request(self):
+        response = self.client.post(self.url, self.rows(2, publication_year=9999), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["failed"], 2)
+
+        response = self.client.post(self.url, self.rows(1)[0], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BOOK_BULK_MAX_ERRORS=2)
+    def test_error_list_is_capped(self):
+        response = self.client.post(self.url, self.rows(5, title=""), format="json")
+        self.assertEqual(response.data["failed"], 5)
+        self.assertEqual(len(response.data["errors"]), 2)
+        self.assertTrue(response.data["errors_truncated"])
+
+    def test_partial_update(self):
+        self.client.post(self.url, self.rows(3), format="json")
+        books = list(Book.objects.order_by("id"))
+        response = self.post_ndjson(
+            [
+                {"id": books[0].pk, "title": "Renamed"},
+                {"id": books[1].pk, "author": self.other_author.pk},
+                {"id": 424242, "title": "Missing"},
+                {"title": "No id"},
+                {"id": books[2].pk, "publication_year": 9999},
+            ],
+            method="patch",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["updated"], response.data["failed"]), (2, 3))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3, 4])
+
+        books = {book.pk: book for book in Book.objects.all()}
+        renamed, moved, unchanged = (books[book.pk] for book in sorted(books.values(), key=lambda b: b.pk))
+        self.assertEqual((renamed.title, renamed.author_id), ("Renamed", self.author.pk))
+        self.assertEqual((moved.title, moved.author_id), ("Bulk 1", self.other_author.pk))
+        self.assertEqual(unchanged.publication_year, 1952)
+
+    @override_settings(BOOK_BULK_BATCH_SIZE=2)
+    def test_update_rejects_repeated_ids(self):
+        self.client.post(self.url, self.rows(2), format="json")
+        first, second = Book.objects.order_by("id")
+        response = self.client.patch(
+            self.url,
+            [
+                {"id": first.pk, "title": "First"},
+                {"id": first.pk, "title": "Again"},
+                {"id": second.pk, "title": "Second"},
+                {"id": first.pk, "title": "Next batch"},
+            ],
+            format="json",
+        )
+        self.assertEqual((response.data["updated"], response.data["failed"]), (2, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1, 3])
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("title", flat=True)), ["First", "Second"]
+        )
+
+    def test_put_requires_every_field(self):
+        self.client.post(self.url, self.rows(1), format="json")
+        book = Book.objects.get()
+        response = self.client.put(self.url, [{"id": book.pk, "title": "Only title"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("publication_year", response.data["errors"][0]["errors"])
+
+    def test_delete(self):
+        self.client.post(self.url, self.rows(3), format="json")
+        first, second, third = Book.objects.order_by("id")
+        response = self.client.delete(
+            self.url, [first.pk, {"id": second.pk}, 424242, "abc"], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["deleted"], response.data["failed"]), (2, 2))
+        self.assertEqual(list(Book.objects.all()), [third])
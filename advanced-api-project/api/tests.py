@@ -1,3 +1,189 @@
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
 from django.test import TestCase
+from rest_framework import serializers
+
+from .compiled import CompiledReadMixin, compile_representation
+from .explain import explain_request, parse_logged_request, read_plan, request_shape
+from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer
+
+
+class PlainBookSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Book
+        fields = BookSerializer.Meta.fields
+
+
+class PlainAuthorSerializer(serializers.ModelSerializer):
+    books = PlainBookSerializer(many=True, read_only=True)
+    book_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Author
+        fields = AuthorSerializer.Meta.fields
+
+
+class CompiledSerializerTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="Ursula")
+        Author.objects.create(name="No Books Yet")
+        Book.objects.create(title="Earthsea", publication_year=1968, author=self.author)
+        Book.objects.create(title="The Dispossessed", publication_year=1974, author=self.author)
+
+    def test_output_matches_drf(self):
+        books = Book.objects.order_by("id")
+        self.assertEqual(BookSerializer(books, many=True).data, PlainBookSerializer(books, many=True).data)
+
+        authors = Author.objects.prefetch_related("books").order_by("id")
+        self.assertEqual(AuthorSerializer(authors, many=True).data, PlainAuthorSerializer(authors, many=True).data)
+        self.assertNotIn("book_count", AuthorSerializer(authors, many=True).data[0])
+
+        authors = authors.annotate(book_count=Count("books"))
+        self.assertEqual(AuthorSerializer(authors, many=True).data, PlainAuthorSerializer(authors, many=True).data)
+        self.assertEqual(AuthorSerializer(authors, many=True).data[0]["book_count"], 2)
+
+    def test_foreign_key_read_without_query(self):
+        books = list(Book.objects.all())
+        with self.assertNumQueries(0):
+            data = BookSerializer(books, many=True).data
+        self.assertEqual({row["author"] for row in data}, {self.author.pk})
+
+    def test_other_fields_fall_back_to_drf(self):
+        class Shelved(CompiledReadMixin, serializers.ModelSerializer):
+            shelved = serializers.SerializerMethodField()
+            added = serializers.DateField(source="get_added")
+            author_name = serializers.CharField(source="author.name")
+
+            class Meta:
+                model = Book
+                fields = ["id", "shelved", "added", "author_name"]
+
+            def get_shelved(self, book):
+                return book.publication_year < 1970
+
+        Book.get_added = lambda book: date(2024, 1, book.pk)
+        self.addCleanup(delattr, Book, "get_added")
+        book = Book.objects.get(title="Earthsea")
+        self.assertEqual(
+            Shelved(book).data,
+            {"id": book.pk, "shelved": True, "added": f"2024-01-{book.pk:02d}", "author_name": "Ursula"},
+        )
+
+    def test_fields_over_other_model_types_match_drf(self):
+        declared = dict(
+            year_text=serializers.CharField(source="publication_year"),
+            year_float=serializers.FloatField(source="publication_year"),
+            id_text=serializers.CharField(source="id"),
+            title_flag=serializers.BooleanField(source="title"),
+        )
+        Meta = type("Meta", (), {"model": Book, "fields": ["id", *declared]})
+        compiled = type("Compiled", (CompiledReadMixin, serializers.ModelSerializer), {**declared, "Meta": Meta})
+        plain = type("Plain", (serializers.ModelSerializer,), {**declared, "Meta": Meta})
+
+        books = Book.objects.order_by("id")
+        self.assertEqual(compiled(books, many=True).data, plain(books, many=True).data)
+        self.assertEqual(compiled(books[0]).data["year_text"], "1968")
+
+    def test_equal_field_sets_share_generated_code(self):
+        first = compile_representation(BookSerializer())
+        second = compile_representation(BookSerializer())
+        self.assertIs(first.__code__, second.__code__)
+
+    def test_write_path_still_validates(self):
+        serializer = BookSerializer(data={"title": "Later", "publication_year": 9999, "author": self.author.pk})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("publication_year", serializer.errors)
+
+        serializer = BookSerializer(data={"title": "Lavinia", "publication_year": 2008, "author": self.author.pk})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        book = serializer.save()
+        self.assertEqual(serializer.data, PlainBookSerializer(book).data)
+
+
+class BookIndexTests(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name="Ursula")
+        Book.objects.bulk_create(
+            [Book(title=f"Book {i}", publication_year=1900 + i % 100, author=author) for i in range(200)]
+        )
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.author = author
+
+    def test_advertised_filters_and_orderings_use_indexes(self):
+        for query in (
+            "title=Book+1",
+            "publication_year=1950",
+            f"author={self.author.pk}&ordering=-publication_year",
+            "ordering=title",
+            "ordering=-publication_year",
+        ):
+            plan = explain_request(f"/api/books/?{query}")
+            self.assertEqual(plan.full_scans, [], f"{query}: {plan.text}")
+
+    def test_advise_indexes_command(self):
+        log = self.tmp_log(
+            "title=Book+1\n"
+            f'127.0.0.1 - - [x] "GET /api/books/?author={self.author.pk} HTTP/1.1" 200 10\n'
+            "search=ursula\n"
+            "/api/books/1/\n"
+        )
+        stdout = StringIO()
+        call_command("advise_indexes", log, stdout=stdout, no_color=True)
+        report = stdout.getvalue()
+        self.assertRegex(report, r"indexed\s+/api/books/\?title=\?")
+        self.assertRegex(report, r"full scan: [\w, ]*api_book\s+/api/books/\?search=\?")
+        self.assertIn("not served by a DRF list view", report)
+        self.assertIn("1 of 4 requests need a full scan or a sort.", report)
+
+    def tmp_log(self, content):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+        self.addCleanup(os.unlink, handle.name)
+        with handle:
+            handle.write(content)
+        return handle.name
+
+
+class IndexAdvisorTests(TestCase):
+    def test_read_sqlite_plan(self):
+        plan = read_plan(
+            "3 0 0 SCAN api_book\n5 0 0 SEARCH api_author USING INTEGER PRIMARY KEY (rowid=?)\n"
+            "9 0 0 USE TEMP B-TREE FOR ORDER BY", 'sqlite',
+        )
+        self.assertEqual((plan.full_scans, plan.sorts), (['api_book'], True))
+
+        plan = read_plan("3 0 0 SCAN api_book USING INDEX api_book_title_idx", 'sqlite')
+        self.assertEqual((plan.full_scans, plan.sorts), ([], False))
+
+    def test_read_postgresql_plan(self):
+        plan = read_plan(
+            "Sort  (cost=1.05..1.06 rows=3 width=40)\n"
+            "  ->  Seq Scan on api_book  (cost=0.00..1.03 rows=3 width=40)", 'postgresql',
+        )
+        self.assertEqual((plan.full_scans, plan.sorts), (['api_book'], True))
+
+    def test_parse_logged_request(self):
+        self.assertEqual(
+            parse_logged_request('10.0.0.1 - - [x] "GET /api/books/?author=3 HTTP/1.1" 200 9', '/api/books/'),
+            '/api/books/?author=3',
+        )
+        self.assertEqual(parse_logged_request('/api/authors/?ordering=name', '/api/books/'), '/api/authors/?ordering=name')
+        self.assertEqual(parse_logged_request('?title=Dune', '/api/books/'), '/api/books/?title=Dune')
+        self.assertIsNone(parse_logged_request('# comment', '/api/books/'))
 
-# Create your tests here.
+    def test_request_shape_hides_values_but_orderings(self):
+        self.assertEqual(
+            request_shape('/api/books/?title=Dune&ordering=-publication_year&author=3'),
+            request_shape('/api/books/?author=7&title=Emma&ordering=-publication_year'),
+        )
+        self.assertNotEqual(
+            request_shape('/api/books/?ordering=title'), request_shape('/api/books/?ordering=-title'),
+        )
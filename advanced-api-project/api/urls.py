@@ -5,6 +5,9 @@ from .views import (
     BookCreateView,
     BookUpdateView,
     BookDeleteView,
+    BookBulkView,
+    AuthorListView,
+    AuthorDetailView,
 )
 
 urlpatterns = [
@@ -15,4 +18,8 @@ urlpatterns = [
     # Updated to satisfy the autochecker
     path("books/update/<int:pk>/", BookUpdateView.as_view(), name="book-update"),
     path("books/delete/<int:pk>/", BookDeleteView.as_view(), name="book-delete"),
+    path("books/bulk/", BookBulkView.as_view(), name="book-bulk"),
+
+    path("authors/", AuthorListView.as_view(), name="author-list"),
+    path("authors/<int:pk>/", AuthorDetailView.as_view(), name="author-detail"),
 ]
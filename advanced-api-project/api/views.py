@@ -1,11 +1,19 @@
-from rest_framework import generics
+from django.conf import settings
+from django.db.models import Count, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework import generics, status
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework
 from django_filters import rest_framework as filters
-from .models import Book
-from .serializers import BookSerializer
+from rest_framework.exceptions import ValidationError
+from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer
+from .bulk import create_books, delete_books, update_books
+from .streaming import NDJSONParser, StreamingListMixin
 
 """
 View Layer Overview
@@ -22,6 +30,10 @@ View Responsibilities:
 - BookCreateView: Allows authenticated users to create new books.
 - BookUpdateView: Allows authenticated users to update existing books.
 - BookDeleteView: Allows authenticated users to delete books.
+- BookBulkView: Allows authenticated users to create, update or delete
+  many books per request.
+- AuthorListView / AuthorDetailView: Public read-only access to authors
+  with a bounded, prefetched list of their books.
 
 Customization:
 - perform_create and perform_update hooks allow injection of custom logic without rewriting
@@ -29,7 +41,7 @@ Customization:
 - Permission classes restrict write actions while keeping read operations open.
 """
 
-class BookListView(generics.ListAPIView):
+class BookListView(StreamingListMixin, generics.ListAPIView):
     """
     Retrieves all books with advanced query capabilities.
 
@@ -37,6 +49,8 @@ class BookListView(generics.ListAPIView):
     - Filtering: filter by title, publication_year, and author.
     - Searching: search text in title or author's name.
     - Ordering: order results by title, publication_year, or id.
+    - Streaming: ?stream=ndjson or ?stream=json exports any number of
+      books in constant memory (see api.streaming).
 
     Examples:
         /api/books/?title=1984
@@ -45,16 +59,17 @@ class BookListView(generics.ListAPIView):
         /api/books/?search=orwell
         /api/books/?ordering=title
         /api/books/?ordering=-publication_year
+        /api/books/?stream=ndjson&author=1
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    # SearchFilter and OrderingFilter are DRF's; django_filters only provides
+    # the filter backend (its OrderingFilter is a FilterSet field, not a backend)
     filter_backends = [
-        DjangoFilterBackend, 
-        filters.SearchFilter,
-        SearchFilter, 
-        filters.OrderingFilter,
+        DjangoFilterBackend,
+        SearchFilter,
         OrderingFilter]
 
     # Filtering fields
@@ -68,3 +83,182 @@ class BookListView(generics.ListAPIView):
 
     # Default ordering if none is provided
     ordering = ["id"]
+
+
+class BookDetailView(generics.RetrieveAPIView):
+    """Retrieves a single book by id. Public."""
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class BookCreateView(generics.CreateAPIView):
+    """
+    Creates a book. Authenticated users only.
+
+    BookSerializer rejects publication years in the future.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        # Hook for custom logic on creation (e.g. auditing)
+        serializer.save()
+
+
+class BookUpdateView(generics.UpdateAPIView):
+    """Updates a book (PUT or PATCH). Authenticated users only."""
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_update(self, serializer):
+        # Hook for custom logic on update
+        serializer.save()
+
+
+class BookDeleteView(generics.DestroyAPIView):
+    """Deletes a book. Authenticated users only."""
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class BookBulkView(generics.GenericAPIView):
+    """
+    Creates, updates or deletes many books in one request. Authenticated users only.
+
+    The body is a JSON array or an NDJSON upload (Content-Type:
+    application/x-ndjson, one row per line, read lazily):
+    - POST: books to create, as for BookCreateView.
+    - PATCH / PUT: books to update, each with its "id" (PUT needs every field).
+    - DELETE: ids, or objects with an "id".
+
+    Rows are validated with BookSerializer(many=True) and written in
+    batches, each in its own transaction (see api.bulk). Invalid rows are
+    skipped and reported; the response counts what was written:
+
+        {"created": 998, "failed": 2, "errors_truncated": false,
+         "errors": [{"row": 17, "errors": {"publication_year": ["..."]}}, ...]}
+
+    The status is 400 when the body is not a list or no row was written.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def get_rows(self):
+        rows = self.request.data
+        if isinstance(rows, dict):
+            raise ValidationError({"non_field_errors": ["Expected a list of rows."]})
+        return rows
+
+    def respond(self, report, success_status=status.HTTP_200_OK):
+        written = report.written or not report.failed
+        return Response(report.as_dict(), status=success_status if written else status.HTTP_400_BAD_REQUEST)
+
+    def post(self, request, *args, **kwargs):
+        return self.respond(create_books(self.get_rows()), status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        return self.respond(update_books(self.get_rows(), partial=True))
+
+    def put(self, request, *args, **kwargs):
+        return self.respond(update_books(self.get_rows()))
+
+    def delete(self, request, *args, **kwargs):
+        return self.respond(delete_books(self.get_rows()))
+
+
+class AuthorQueryMixin:
+    """
+    Shared queryset and serializer setup for the author endpoints.
+
+    - ?fields=id,name renders only the listed fields (sparse fieldsets).
+      Leaving out "books" or "book_count" also drops the prefetch or the
+      annotation that feeds it.
+    - ?books_limit=N nests at most N books per author, newest first
+      (default AUTHOR_BOOKS_LIMIT, at most AUTHOR_BOOKS_LIMIT_MAX), so one
+      prolific author cannot blow up the payload. book_count always has the
+      full count.
+
+    Books for every author come from a single prefetch query, so listing
+    authors takes two queries in total no matter how many authors there are.
+    """
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    # Authors and their books, plus BasicAuthentication's user lookup; a
+    # session user is loaded before the view and not counted
+    query_budget = 3
+
+    def get_requested_fields(self):
+        fields = self.request.query_params.get("fields")
+        if fields is None:
+            return None
+        return [name.strip() for name in fields.split(",") if name.strip()]
+
+    def get_books_limit(self):
+        default = getattr(settings, "AUTHOR_BOOKS_LIMIT", 100)
+        maximum = getattr(settings, "AUTHOR_BOOKS_LIMIT_MAX", 1000)
+        limit = self.request.query_params.get("books_limit")
+        if limit is None:
+            return default
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= maximum:
+            raise ValidationError({"books_limit": f"Must be an integer between 1 and {maximum}."})
+        return limit
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None or "book_count" in fields:
+            queryset = queryset.annotate(book_count=Count("books"))
+        if fields is None or "books" in fields:
+            newest_first = [F("publication_year").desc(), F("id").desc()]
+            # A per-author ROW_NUMBER() rather than a slice: sliced querysets
+            # cannot be prefetched into the related manager (author.books)
+            books = (
+                Book.objects.annotate(rank=Window(RowNumber(), partition_by="author_id", order_by=newest_first))
+                .filter(rank__lte=self.get_books_limit())
+                .order_by(*newest_first)
+            )
+            queryset = queryset.prefetch_related(Prefetch("books", queryset=books))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class AuthorListView(AuthorQueryMixin, generics.ListAPIView):
+    """
+    Lists authors with their book count and newest books.
+
+    Examples:
+        /api/authors/
+        /api/authors/?fields=id,name
+        /api/authors/?books_limit=5
+        /api/authors/?search=orwell&ordering=-book_count
+    """
+    filter_backends = [SearchFilter, OrderingFilter]
+    search_fields = ["name"]
+    ordering_fields = ["name", "id", "book_count"]
+    ordering = ["id"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ordering = self.request.query_params.get("ordering", "")
+        # Ordering by book_count needs the annotation even when it is not rendered
+        if "book_count" in ordering and "book_count" not in queryset.query.annotations:
+            queryset = queryset.annotate(book_count=Count("books"))
+        return queryset
+
+
+class AuthorDetailView(AuthorQueryMixin, generics.RetrieveAPIView):
+    """Retrieves a single author with their book count and newest books. Public."""
@@ -19,5 +19,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('api.urls')), 
+    path('api/', include('api.urls')),
+    path('__profiler__/', include('query_profiler.urls')),
 ]
\ No newline at end of file
@@ -21,4 +21,5 @@ urlpatterns = [
     path("", include("bookshelf.urls")),
     path("books/", include('relationship_app.urls')),
     path("admin/", admin.site.urls),
+    path("__profiler__/", include("query_profiler.urls")),
 ]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
+
+    def ready(self):
+        # Connects the signals that keep the search index, caches and tag stats current
+        from . import caching, search, tag_stats  # noqa: F401
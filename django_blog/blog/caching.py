@@ -0,0 +1,144 @@
+"""
+Response and fragment caching with dependency-based invalidation.
+
+Cached pages and template fragments are tied to named dependencies:
+
+- 'posts'        any post created, edited, deleted or retagged
+- 'post:<pk>'    one post, its comments and tags
+- 'tag:<slug>'   one tag renamed or deleted (also bumps 'posts')
+
+Each dependency has a version number stored in the cache. Cache keys embed
+the versions of their dependencies, so saving a model only has to bump a
+version (see the signal handlers at the bottom) and every page or fragment
+built from the old data stops being found. Nothing is deleted or scanned,
+which works the same on LocMem, file and Redis backends; stale entries
+simply age out after BLOG_CACHE_TIMEOUT.
+
+Whole pages are cached for anonymous visitors only. Authenticated pages
+are rendered per request and cache their expensive parts with
+`{% cache cache_timeout <name> <pk> cache_version %}` instead.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from taggit.models import Tag, TaggedItem
+
+from .models import Comment, Post
+
+KEY_PREFIX = 'blog'
+
+
+def cache_timeout():
+    return getattr(settings, 'BLOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _version_key(dependency):
+    return f'{KEY_PREFIX}:dep:{dependency}'
+
+
+def dependency_versions(dependencies):
+    """Current version of each dependency, as one string usable in cache keys."""
+    keys = [_version_key(dependency) for dependency in dependencies]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seeded from the clock, so a version evicted from the cache never
+            # comes back with a value an old entry was stored under
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def invalidate(*dependencies):
+    """Bump the given dependencies now and again once the transaction commits."""
+    def bump():
+        for dependency in dependencies:
+            key = _version_key(dependency)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+
+    bump()
+    # The second bump covers requests that re-cached the old rows before commit
+    transaction.on_commit(bump)
+
+
+def _page_key(request, dependencies):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{KEY_PREFIX}:page:{path}:{dependency_versions(dependencies)}'
+
+
+def cache_page_for_anonymous(dependencies):
+    """
+    View decorator caching the rendered page for anonymous GET requests.
+
+    `dependencies(**view_kwargs)` returns the dependency names the page is
+    built from. Use `method_decorator(..., name='dispatch')` on class views.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                # Flash messages belong to this visitor only
+                or len(get_messages(request))
+            ):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(request, dependencies(**kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            if (
+                response.status_code == 200
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            ):
+                cache.set(key, (response.content, response['Content-Type']), cache_timeout())
+            return response
+        return wrapped
+    return decorator
+
+
+# --- Invalidation ---
+
+@receiver(post_save, sender=Post, dispatch_uid='blog_cache_post_saved')
+@receiver(post_delete, sender=Post, dispatch_uid='blog_cache_post_deleted')
+def invalidate_post(sender, instance, **kwargs):
+    invalidate('posts', f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment, dispatch_uid='blog_cache_comment_saved')
+@receiver(post_delete, sender=Comment, dispatch_uid='blog_cache_comment_deleted')
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate(f'post:{instance.post_id}')
+
+
+@receiver(m2m_changed, sender=TaggedItem, dispatch_uid='blog_cache_post_retagged')
+def invalidate_retagged_post(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        invalidate('posts', f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Tag, dispatch_uid='blog_cache_tag_saved')
+@receiver(post_delete, sender=Tag, dispatch_uid='blog_cache_tag_deleted')
+def invalidate_tag(sender, instance, **kwargs):
+    # Post pages and the tag cloud show tag names and slugs, so a rename touches
+    # them too; deleting a tag cascades its TagStat and TaggedItem rows without
+    # m2m_changed, so the cloud needs the bump from here
+    invalidate('posts', 'tags', f'tag:{instance.slug}')
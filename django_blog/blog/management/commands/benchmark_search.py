@@ -0,0 +1,102 @@
+import random
+import statistics
+import string
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from taggit.models import Tag, TaggedItem
+
+from blog.models import Post
+from blog.search import rebuild_index, search
+
+
+def legacy_search(query):
+    """The query `search_posts` ran before the inverted index, evaluated in full as the view did."""
+    return list(
+        Post.objects.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(tags__name__icontains=query)
+        ).distinct()
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare search_posts' old icontains query with the inverted index on a "
+        "synthetic corpus. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000, help="Synthetic posts to create (default: 100000).")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query (default: 5).")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options['posts'], random.Random(options['seed']))
+            self.run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, count, rng):
+        # Zipf-like vocabulary: a few very common words, a long tail of rare ones
+        vocabulary = [
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(20_000)
+        ]
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        self.vocabulary = vocabulary
+
+        author = User.objects.create_user('benchmark')
+        tags = Tag.objects.bulk_create([Tag(name=word, slug=word) for word in vocabulary[:200:4]])
+        post_type = ContentType.objects.get_for_model(Post)
+
+        started = time.perf_counter()
+        for offset in range(0, count, 5000):
+            posts = Post.objects.bulk_create([
+                Post(
+                    author=author,
+                    title=' '.join(rng.choices(vocabulary, weights, k=6)),
+                    content=' '.join(rng.choices(vocabulary, weights, k=80)),
+                )
+                for _ in range(min(5000, count - offset))
+            ])
+            TaggedItem.objects.bulk_create([
+                TaggedItem(tag=tag, content_type=post_type, object_id=post.pk)
+                for post in posts
+                for tag in rng.sample(tags, 2)
+            ])
+        self.stdout.write(f"Seeded {count} posts in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        rebuild_index(batch_size=2000)
+        self.stdout.write(f"Built the index in {time.perf_counter() - started:.1f}s")
+
+    def run(self, repeat):
+        queries = {
+            'common word': self.vocabulary[0],
+            'mid-frequency word': self.vocabulary[500],
+            'rare word': self.vocabulary[15_000],
+            'prefix': self.vocabulary[50][:3],
+        }
+        self.stdout.write(f"\n{'query':<20}{'legacy median':>16}{'index median':>16}{'speed-up':>10}")
+        for label, query in queries.items():
+            legacy = self.time(lambda: legacy_search(query), repeat)
+            indexed = self.time(lambda: list(search(query).object_list), repeat)
+            self.stdout.write(
+                f"{label:<20}{legacy * 1000:>13.1f} ms{indexed * 1000:>13.1f} ms{legacy / indexed:>9.1f}x"
+            )
+
+    def time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples)
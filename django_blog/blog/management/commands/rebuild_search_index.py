@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index (blog.PostTerm) from posts and their tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"Posts indexed per transaction (default: {BATCH_SIZE}).")
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} post(s)."))
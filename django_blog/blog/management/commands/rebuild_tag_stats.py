@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.tag_stats import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-tag post counts and last-used times (blog.TagStat) from the tagging tables."
+
+    def handle(self, *args, **options):
+        tags = rebuild_tag_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {tags} tag(s)."))
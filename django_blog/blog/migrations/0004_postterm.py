@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:02
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from blog.search import term_weights
+
+    Post = apps.get_model('blog', 'Post')
+    PostTerm = apps.get_model('blog', 'PostTerm')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    tags = defaultdict(list)
+    for post_id, name in TaggedItem.objects.filter(
+        content_type__app_label='blog', content_type__model='post'
+    ).values_list('object_id', 'tag__name'):
+        tags[post_id].append(name)
+
+    rows = []
+    for post in Post.objects.only('pk', 'title', 'content').iterator():
+        rows.extend(
+            PostTerm(term=term, post_id=post.pk, weight=weight)
+            for term, weight in term_weights(post.title, post.content, tags[post.pk]).items()
+        )
+        if len(rows) >= 5000:
+            PostTerm.objects.bulk_create(rows)
+            rows = []
+    PostTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='blog.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'post'), name='blog_postterm_term_post_uniq')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
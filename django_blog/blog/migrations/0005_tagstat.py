@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def populate_tag_stats(apps, schema_editor):
+    # Historical TaggedItem has no generic relation, so join to posts by object_id
+    Post = apps.get_model('blog', 'Post')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('blog', 'TagStat')
+    published = Post.objects.filter(pk=OuterRef('object_id')).values('published_date')
+    counts = (
+        TaggedItem.objects.filter(content_type__app_label='blog', content_type__model='post')
+        .annotate(published=Subquery(published))
+        .values('tag')
+        .annotate(n=Count('pk'), last=Max('published'))
+        .values_list('tag', 'n', 'last')
+    )
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=tag_id, post_count=n, last_used=last) for tag_id, n, last in counts], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_postterm'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='blog_stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-published_date', '-id'], name='blog_post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagstat',
+            index=models.Index(fields=['-post_count', 'tag'], name='blog_tagstat_count_idx'),
+        ),
+        migrations.RunPython(populate_tag_stats, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,12 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     tags = TaggableManager()
 
+    class Meta:
+        indexes = [
+            # Newest-first listings (home, post list, tag pages) with a unique tie-breaker
+            models.Index(fields=['-published_date', '-id'], name='blog_post_published_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -28,3 +34,39 @@ class Comment(models.Model):
 
     def get_absolute_url(self):
         return reverse('blog:viewing_post', kwargs={'pk': self.post.pk})
+
+
+class PostTerm(models.Model):
+    """
+    One row of the search inverted index (see blog.search): how strongly
+    `term` occurs in `post`, with title and tag hits weighted above content.
+    """
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='blog_postterm_term_post_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.term} -> {self.post_id} ({self.weight})'
+
+
+class TagStat(models.Model):
+    """
+    Per-tag post count and last use, maintained incrementally by
+    blog.tag_stats so tag clouds and tag pages never count taggit rows.
+    """
+    tag = models.OneToOneField('taggit.Tag', on_delete=models.CASCADE, primary_key=True, related_name='blog_stat')
+    post_count = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count', 'tag'], name='blog_tagstat_count_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag_id}: {self.post_count}'
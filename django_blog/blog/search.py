@@ -0,0 +1,211 @@
+"""
+Inverted-index search for blog posts.
+
+Each post is tokenized into lowercase words and stored as PostTerm rows
+(term, post, weight). A query then reads only the index rows for its own
+terms - a range scan on the (term, post) unique index - instead of
+running `icontains` over every post joined to the taggit tables and
+deduplicating with `DISTINCT`.
+
+Weights: a word in the title counts TITLE_WEIGHT, in a tag TAG_WEIGHT and
+in the content once per occurrence. Results must contain every query term
+(the last letters of a term may be missing, so "djan" finds "django") and
+are ranked by the sum of weight * idf over the matched terms.
+
+The index is kept current by the Post save / tag change signals at the
+bottom of this module. Queryset `update()` and `bulk_create()` bypass them;
+run `python manage.py rebuild_search_index` afterwards.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from taggit.models import Tag, TaggedItem
+
+from .models import Post, PostTerm
+
+TITLE_WEIGHT = 5
+TAG_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 6
+SNIPPET_WORDS = 30
+BATCH_SIZE = 500
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it its of on or '
+    'that the this to was were will with you your'.split()
+)
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lowercase index terms of `text`, in order, without stop words."""
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in _WORD_RE.findall((text or '').lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def term_weights(title, content, tag_names):
+    weights = Counter(tokenize(content))
+    for term in tokenize(title):
+        weights[term] += TITLE_WEIGHT
+    for name in tag_names:
+        for term in tokenize(name):
+            weights[term] += TAG_WEIGHT
+    return weights
+
+
+def _prefix_q(term):
+    # A range rather than `startswith`, so the (term, post) index is used on every backend
+    return Q(term__gte=term, term__lt=term + '\U0010ffff')
+
+
+# --- Indexing ---
+
+def index_posts(post_ids):
+    """(Re)build the index rows of the given posts."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    posts = Post.objects.filter(pk__in=post_ids).only('pk', 'title', 'content')
+    tags = defaultdict(list)
+    for post_id, name in (
+        TaggedItem.objects.filter(
+            content_type__app_label='blog', content_type__model='post', object_id__in=post_ids
+        ).values_list('object_id', 'tag__name')
+    ):
+        tags[post_id].append(name)
+
+    rows = [
+        PostTerm(term=term, post_id=post.pk, weight=weight)
+        for post in posts
+        for term, weight in term_weights(post.title, post.content, tags[post.pk]).items()
+    ]
+    with transaction.atomic():
+        PostTerm.objects.filter(post_id__in=post_ids).delete()
+        PostTerm.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def rebuild_index(batch_size=BATCH_SIZE):
+    """Reindex every post, `batch_size` posts per transaction; returns how many."""
+    PostTerm.objects.all().delete()
+    indexed = 0
+    last_pk = 0
+    while True:
+        ids = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return indexed
+        index_posts(ids)
+        last_pk = ids[-1]
+        indexed += len(ids)
+
+
+# --- Querying ---
+
+def ranked_post_ids(query):
+    """
+    Values queryset of {'post', 'score'} for posts matching every term of
+    `query`, best first; None when the query has no searchable terms.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+
+    matches = PostTerm.objects.filter(reduce(or_, (_prefix_q(term) for term in terms)))
+
+    # One aggregate query over the matching index rows for every term's document frequency
+    frequencies = matches.aggregate(**{
+        f'df{i}': Count('post', distinct=True, filter=_prefix_q(term))
+        for i, term in enumerate(terms)
+    })
+    total = Post.objects.count() or 1
+    idf = [math.log(1 + total / (frequencies[f'df{i}'] or 1)) for i in range(len(terms))]
+
+    ranked = matches.values('post').annotate(
+        score=Sum(Case(
+            *(When(_prefix_q(term), then=F('weight') * Value(idf[i])) for i, term in enumerate(terms)),
+            output_field=FloatField(),
+        )),
+        **{
+            f'has{i}': Max(Case(When(_prefix_q(term), then=1), default=0, output_field=IntegerField()))
+            for i, term in enumerate(terms)
+        },
+    )
+    return ranked.filter(**{f'has{i}': 1 for i in range(len(terms))}).order_by('-score', '-post')
+
+
+def search(query, page_number=1, per_page=10):
+    """
+    Paginated search: returns a Page whose object_list holds the Post
+    objects (author joined, tags prefetched) in rank order, or None.
+    """
+    ranked = ranked_post_ids(query)
+    if ranked is None:
+        return None
+    page = Paginator(ranked, per_page).get_page(page_number)
+    ids = [row['post'] for row in page.object_list]
+    posts = Post.objects.filter(pk__in=ids).select_related('author').prefetch_related('tags')
+    by_id = {post.pk: post for post in posts}
+    page.object_list = [by_id[pk] for pk in ids if pk in by_id]
+    return page
+
+
+def highlight(text, query, max_words=SNIPPET_WORDS):
+    """
+    HTML-safe excerpt of `text` around the first query match, with matched
+    words wrapped in <mark>.
+    """
+    terms = tokenize(query)
+    words = (text or '').split()
+    if not terms or not words:
+        return escape(' '.join(words[:max_words]))
+
+    def matches(word):
+        return any(token.startswith(term) for token in tokenize(word) for term in terms)
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, first - max_words // 3)
+    window = words[start:start + max_words]
+    parts = [f'<mark>{escape(word)}</mark>' if matches(word) else escape(word) for word in window]
+    prefix = '… ' if start else ''
+    suffix = ' …' if start + max_words < len(words) else ''
+    return mark_safe(prefix + ' '.join(parts) + suffix)
+
+
+# --- Keeping the index current ---
+
+@receiver(post_save, sender=Post, dispatch_uid='blog_search_index_post')
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_posts([instance.pk])
+
+
+@receiver(m2m_changed, sender=TaggedItem, dispatch_uid='blog_search_index_tags')
+def index_retagged_posts(sender, instance, action, model, pk_set, **kwargs):
+    # taggit always sends these from the tagged object's side
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        index_posts([instance.pk])
+
+
+@receiver(post_save, sender=Tag, dispatch_uid='blog_search_index_renamed_tag')
+def index_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    post_ids = TaggedItem.objects.filter(
+        tag=instance, content_type__app_label='blog', content_type__model='post'
+    ).values_list('object_id', flat=True)
+    index_posts(post_ids)
@@ -0,0 +1,118 @@
+"""
+Maintained tag statistics and the tag cloud.
+
+TagStat keeps, per tag, how many posts carry it and when it was last
+assigned. The counters move with each tag assignment (taggit's
+m2m_changed signal) and post deletion, so popular-tag listings read a
+small indexed table instead of grouping taggit_taggeditem on every request.
+`python manage.py rebuild_tag_stats` recomputes them from scratch.
+"""
+import math
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .caching import cache_timeout, dependency_versions, invalidate
+from .models import Post, TagStat
+
+CLOUD_SIZES = 5
+
+
+def adjust_tag_counts(tag_ids, delta):
+    """Add `delta` to the post count of each tag, creating missing stat rows."""
+    tag_ids = list(tag_ids)
+    if not tag_ids:
+        return
+    TagStat.objects.bulk_create(
+        [TagStat(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True
+    )
+    changes = {'post_count': F('post_count') + delta}
+    if delta > 0:
+        changes['last_used'] = timezone.now()
+    TagStat.objects.filter(tag_id__in=tag_ids).update(**changes)
+    invalidate('tags')
+
+
+def rebuild_tag_stats():
+    """
+    Recompute every TagStat row from the tagging tables; returns how many
+    tags are in use.
+
+    taggit does not record when a tag was assigned, so the recorded
+    last_used is kept; only tags without one fall back to the
+    published_date of their newest post.
+    """
+    assigned = dict(TagStat.objects.exclude(last_used=None).values_list('tag_id', 'last_used'))
+    counts = (
+        Tag.objects.filter(post__isnull=False)
+        .annotate(n=Count('post'), last=Max('post__published_date'))
+        .values_list('pk', 'n', 'last')
+    )
+    rows = [TagStat(tag_id=pk, post_count=n, last_used=assigned.get(pk, last)) for pk, n, last in counts]
+    TagStat.objects.all().delete()
+    TagStat.objects.bulk_create(rows, batch_size=1000)
+    invalidate('tags')
+    return len(rows)
+
+
+def tag_cloud(limit=30):
+    """
+    The `limit` most used tags as dicts (name, slug, count, size 1-5),
+    alphabetical; cached until a tag count changes.
+    """
+    key = f'blog:tag_cloud:{limit}:{dependency_versions(["tags"])}'
+    cloud = cache.get(key)
+    if cloud is None:
+        stats = list(
+            TagStat.objects.filter(post_count__gt=0)
+            .select_related('tag')
+            .order_by('-post_count', 'tag')[:limit]
+        )
+        top = max((stat.post_count for stat in stats), default=1)
+        cloud = sorted(
+            (
+                {
+                    'name': stat.tag.name,
+                    'slug': stat.tag.slug,
+                    'count': stat.post_count,
+                    # Log scale, so one runaway tag does not flatten the rest
+                    'size': 1 + round((CLOUD_SIZES - 1) * math.log(stat.post_count) / math.log(top))
+                    if top > 1 else 1,
+                }
+                for stat in stats
+            ),
+            key=lambda item: item['name'].lower(),
+        )
+        cache.set(key, cloud, cache_timeout())
+    return cloud
+
+
+# --- Keeping the counts current ---
+
+@receiver(m2m_changed, sender=TaggedItem, dispatch_uid='blog_tag_stats_retagged')
+def count_tag_changes(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        # post_clear does not say which tags went away
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        adjust_tag_counts(getattr(instance, '_cleared_tag_ids', []), -1)
+    elif action == 'post_add':
+        adjust_tag_counts(pk_set or [], 1)
+    elif action == 'post_remove':
+        adjust_tag_counts(pk_set or [], -1)
+
+
+@receiver(pre_delete, sender=Post, dispatch_uid='blog_tag_stats_post_deleting')
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Post, dispatch_uid='blog_tag_stats_post_deleted')
+def count_deleted_post_tags(sender, instance, **kwargs):
+    adjust_tag_counts(getattr(instance, '_deleted_tag_ids', []), -1)
@@ -0,0 +1,11 @@
+from django import template
+
+from blog import tag_stats
+
+register = template.Library()
+
+
+@register.inclusion_tag('blog/tag_cloud.html')
+def tag_cloud(limit=30):
+    """Render the most used tags, sized by post count: {% tag_cloud 30 %}"""
+    return {'cloud': tag_stats.tag_cloud(limit)}
@@ -1,3 +1,265 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from taggit.models import Tag
+
+from .models import Comment, Post, PostTerm, TagStat
+from .search import highlight, search
+from .tag_stats import tag_cloud
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.in_content = Post.objects.create(
+            author=self.author, title='Weekend notes', content='A few django tips for the weekend.'
+        )
+        self.in_title = Post.objects.create(author=self.author, title='Django tips', content='Views and models.')
+        self.tagged = Post.objects.create(author=self.author, title='Gardening', content='Tomatoes.')
+
+    def result_ids(self, query):
+        return [post.pk for post in search(query).object_list]
+
+    def test_title_matches_rank_above_content_matches(self):
+        self.assertEqual(self.result_ids('djan'), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(self.result_ids('django views'), [self.in_title.pk])
+
+    def test_index_follows_tag_changes_and_edits(self):
+        self.tagged.tags.add('Django')
+        self.assertIn(self.tagged.pk, self.result_ids('django'))
+
+        self.tagged.tags.clear()
+        self.in_title.title = 'Flask tips'
+        self.in_title.save()
+        self.assertEqual(self.result_ids('django'), [self.in_content.pk])
+
+    def test_rebuild_command_indexes_bulk_loaded_posts(self):
+        Post.objects.bulk_create([Post(author=self.author, title='Bulk loaded', content='...')])
+        self.assertEqual(self.result_ids('bulk'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.result_ids('bulk')), 1)
+        self.assertFalse(PostTerm.objects.filter(term='the').exists())
+
+    def test_highlight_marks_terms_and_escapes_html(self):
+        self.assertEqual(
+            highlight('<b>Learn</b> Django today', 'djang'),
+            '&lt;b&gt;Learn&lt;/b&gt; <mark>Django</mark> today',
+        )
+
+    def test_view_paginates_results(self):
+        for i in range(12):
+            Post.objects.create(author=self.author, title=f'Django part {i}', content='...')
+
+        response = self.client.get(reverse('blog:search_posts'), {'q': 'django', 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 14)
+        self.assertEqual(len(response.context['posts']), 4)
+        self.assertContains(response, '<mark>')
+
+
+class CachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='First post', content='Hello.')
+        self.detail_url = reverse('blog:viewing_post', kwargs={'pk': self.post.pk})
+
+    def test_anonymous_pages_are_served_from_cache_until_a_post_changes(self):
+        self.client.get(reverse('blog:home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('blog:home'))
+        self.assertContains(response, 'First post')
+
+        self.post.title = 'Renamed post'
+        self.post.save()
+        self.assertContains(self.client.get(reverse('blog:home')), 'Renamed post')
+
+    def test_new_comment_invalidates_only_its_post(self):
+        other = Post.objects.create(author=self.author, title='Other', content='...')
+        other_url = reverse('blog:viewing_post', kwargs={'pk': other.pk})
+        self.client.get(self.detail_url)
+        self.client.get(other_url)
+
+        Comment.objects.create(post=self.post, author=self.author, content='Nice one')
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+        self.assertNotEqual(self.client.get(self.detail_url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+    def test_post_list_stays_within_its_query_budget(self):
+        # QUERY_PROFILER_BUDGETS is enforced under `manage.py test`: an N+1 on
+        # post authors raises QueryBudgetExceeded here
+        for i in range(10):
+            author = User.objects.create_user(username=f'author{i}')
+            Post.objects.create(author=author, title=f'Post {i}', content='...')
+        self.assertEqual(self.client.get(reverse('blog:listing_post')).status_code, 200)
+
+    def test_tag_page_follows_retagging(self):
+        self.post.tags.add('django')
+        url = reverse('blog:posts_by_tag', kwargs={'tag_slug': 'django'})
+        self.assertContains(self.client.get(url), 'First post')
+
+        self.post.tags.remove('django')
+        self.assertNotContains(self.client.get(url), 'First post')
+
+    def test_authenticated_users_get_fresh_pages_with_cached_fragments(self):
+        comment = Comment.objects.create(post=self.post, author=self.author, content='Old text')
+        self.client.get(self.detail_url)  # cached for anonymous visitors
+
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(self.detail_url), 'Logout (writer)')
+        self.assertContains(self.client.get(self.detail_url), 'Old text')
+
+        comment.content = 'New text'
+        comment.save()
+        self.assertContains(self.client.get(self.detail_url), 'New text')
+
+
+    def test_comment_fragment_is_shared_between_users(self):
+        reader = User.objects.create_user(username='reader', password='testpass')
+        Comment.objects.create(post=self.post, author=self.author, content='Mine')
+        self.client.force_login(self.author)
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, f'.comment-actions[data-author="{self.author.pk}"]')
+
+        # The reader gets the fragment the author's visit cached (no comment
+        # query: session, user, post), with the links hidden by default
+        self.client.force_login(reader)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.detail_url)
+        self.assertContains(response, 'Mine')
+        self.assertNotContains(response, f'.comment-actions[data-author="{self.author.pk}"]')
+
+    def test_post_list_follows_tag_stats(self):
+        self.post.tags.add('django')
+        tag_url = reverse('blog:posts_by_tag', kwargs={'tag_slug': 'django'})
+        self.assertContains(self.client.get(reverse('blog:listing_post')), tag_url)
+
+        # Only the tag stats change (no post signal), as after a bulk untag
+        self.post.tags.through.objects.all().delete()
+        call_command('rebuild_tag_stats', stdout=StringIO())
+        self.assertNotContains(self.client.get(reverse('blog:listing_post')), tag_url)
+
+
+class TagStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='...') for i in range(3)
+        ]
+        for post in self.posts:
+            post.tags.add('django')
+        self.posts[0].tags.add('python')
+
+    def counts(self):
+        return dict(TagStat.objects.values_list('tag__name', 'post_count'))
+
+    def test_counts_follow_assignment_removal_and_deletion(self):
+        self.assertEqual(self.counts(), {'django': 3, 'python': 1})
+        self.posts[0].tags.clear()
+        self.posts[1].tags.remove('django')
+        self.posts[2].delete()
+        self.assertEqual(self.counts(), {'django': 0, 'python': 0})
+
+        TagStat.objects.update(post_count=42)
+        call_command('rebuild_tag_stats', stdout=StringIO())
+        self.assertEqual(self.counts(), {})
+
+    def test_rebuild_keeps_when_tags_were_last_assigned(self):
+        assigned = dict(TagStat.objects.values_list('tag__name', 'last_used'))
+        Post.objects.update(published_date=timezone.now() - timedelta(days=30))
+        call_command('rebuild_tag_stats', stdout=StringIO())
+        self.assertEqual(dict(TagStat.objects.values_list('tag__name', 'last_used')), assigned)
+
+    def test_tag_cloud_is_cached_until_counts_change(self):
+        self.assertEqual([(t['name'], t['count']) for t in tag_cloud()], [('django', 3), ('python', 1)])
+        with self.assertNumQueries(0):
+            tag_cloud()
+
+        self.posts[1].tags.add('python')
+        self.assertEqual(tag_cloud()[1]['count'], 2)
+        self.assertEqual(self.client.get(reverse('blog:tag_cloud_api')).json()['tags'][0]['slug'], 'django')
+
+    def test_tag_cloud_follows_tag_rename_and_delete(self):
+        tag_cloud()
+        tag = Tag.objects.get(name='python')
+        tag.name, tag.slug = 'py', 'py'
+        tag.save()
+        self.assertEqual([(t['name'], t['slug']) for t in tag_cloud()], [('django', 'django'), ('py', 'py')])
+
+        Tag.objects.get(name='django').delete()
+        self.assertEqual([t['name'] for t in tag_cloud()], ['py'])
+
+    def test_tag_pages_are_ordered_newest_first_without_counting(self):
+        for i in range(10):
+            Post.objects.create(author=self.author, title=f'Extra {i}', content='...').tags.add('django')
+        url = reverse('blog:posts_by_tag', kwargs={'tag_slug': 'django'})
+
+        seen = []
+        for page in (1, 2):
+            response = self.client.get(url, {'page': page})
+            seen.extend(post.pk for post in response.context['posts'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 13)
+
+
+class PostDetailCommentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Discussed', content='...')
+        self.url = reverse('blog:viewing_post', kwargs={'pk': self.post.pk})
+
+    def add_comments(self, count):
+        start = Comment.objects.count()
+        commenters = [User.objects.create_user(username=f'reader{start + i}') for i in range(count)]
+        for user in commenters:
+            Comment.objects.create(post=self.post, author=user, content=f'By {user.username}')
+
+    def render(self, **params):
+        cache.clear()
+        return self.client.get(self.url, params)
+
+    def test_comments_are_paginated_oldest_first(self):
+        self.add_comments(25)
+        first = self.render()
+        self.assertContains(first, 'Comments (25)')
+        self.assertEqual(len(first.context['comments']), 20)
+        self.assertContains(first, 'By reader0')
+
+        second = self.render(comments_page=2)
+        self.assertEqual([c.content for c in second.context['comments']], [f'By reader{i}' for i in range(20, 25)])
+
+    def test_query_count_does_not_grow_with_comments(self):
+        self.add_comments(2)
+        # The post with its author and comment count, then one page of comments with authors
+        with self.assertNumQueries(2):
+            self.render()
+
+        self.add_comments(15)
+        with self.assertNumQueries(2):
+            self.render()
+
+        self.client.force_login(self.author)
+        # Plus the session and user lookups
+        with self.assertNumQueries(4):
+            response = self.render()
+        self.assertContains(response, 'Author</span>', count=0)
+
+    def test_post_author_comments_are_badged(self):
+        Comment.objects.create(post=self.post, author=self.author, content='Thanks all')
+        self.assertContains(self.render(), 'Author</span>', count=1)
 
-# Create your tests here.
+    def test_create_view_renders(self):
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(reverse('blog:creating_post')).status_code, 200)
@@ -17,6 +17,7 @@ urlpatterns = [
     # Search and Tags
     path('search/', views.search_posts, name='search_posts'),
     path('tags/<slug:tag_slug>/', views.PostByTagListView.as_view(), name='posts_by_tag'),
+    path('api/tags/', views.tag_cloud_api, name='tag_cloud_api'),
     
     # Comment URLs
     path('post/<int:pk>/comments/new/', views.CommentCreateView.as_view(), name='add_comment'),
@@ -1,4 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.core.paginator import Paginator
+from django.db.models import Count
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
@@ -9,8 +12,10 @@ from .models import Post, Comment
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from .forms import PostForm, CommentForm
-from django.db.models import Q
+from . import search, tag_stats
+from .caching import cache_page_for_anonymous, cache_timeout, dependency_versions
 from taggit.models import Tag
 
 
@@ -117,27 +122,57 @@ def edit_profile(request):
 
 
 # Blog Views
+@cache_page_for_anonymous(lambda: ['posts'])
 def home(request):
     """Display home page with recent posts."""
-    post = Post.objects.all().order_by('-published_date')[:5]
-    return render(request, 'blog/home.html', {'post': post})
+    posts = Post.objects.select_related('author').order_by('-published_date')[:5]
+    return render(request, 'blog/home.html', {'posts': posts})
 
 
+# The page also renders the tag cloud, hence 'tags'
+@method_decorator(cache_page_for_anonymous(lambda: ['posts', 'tags']), name='dispatch')
 class PostListView(ListView):
     model = Post
     template_name = 'blog/listing_post.html'
-    context_object_name = 'post'
-    ordering = ['-published_date']
+    context_object_name = 'posts'
+    ordering = ['-published_date', '-id']
     paginate_by = 10
+
+    def get_queryset(self):
+        # The template prints each post's author
+        return super().get_queryset().select_related('author')
     
     
 
 
 
+@method_decorator(cache_page_for_anonymous(lambda pk: [f'post:{pk}']), name='dispatch')
 class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/viewing_post.html'
     context_object_name = 'post'
+    comments_paginate_by = 20
+
+    def get_queryset(self):
+        # Author and comment total come with the post itself, so paginating
+        # the comments needs no separate COUNT query
+        return Post.objects.select_related('author').annotate(comment_count=Count('comments'))
+
+    def get_comments_page(self):
+        comments = self.object.comments.select_related('author').order_by('created_at', 'id')
+        paginator = Paginator(comments, self.comments_paginate_by)
+        paginator.count = self.object.comment_count
+        # Left lazy: the page's rows are only fetched if the fragment cache misses
+        return paginator.get_page(self.request.GET.get('comments_page'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = self.get_comments_page()
+        context['comment_form'] = CommentForm()
+        # Keys for the {% cache %} fragments of the post body and comments
+        context['cache_version'] = dependency_versions([f'post:{self.object.pk}'])
+        context['cache_timeout'] = cache_timeout()
+        return context
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -149,12 +184,6 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         form.instance.author = self.request.user
         messages.success(self.request, 'Post created successfully!')
         return super().form_valid(form)
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['comments'] = self.object.comments.all()
-        context['comment_form'] = CommentForm()
-        return context
 
 
 class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
@@ -188,24 +217,22 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     
 # Search View
 def search_posts(request):
-    """Search posts by title, content, or tags."""
-    query = request.GET.get('q', '')
-    posts = Post.objects.all()
-    
-    if query:
-        posts = posts.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
-    
+    """Search posts by title, content, or tags through the inverted index (blog.search)."""
+    query = request.GET.get('q', '').strip()
+    page_obj = search.search(query, request.GET.get('page'), per_page=10) if query else None
+    posts = list(page_obj) if page_obj else []
+    for post in posts:
+        post.snippet = search.highlight(post.content, query)
+
     context = {
         'posts': posts,
+        'page_obj': page_obj,
         'query': query,
     }
     return render(request, 'blog/search_results.html', context)
 
 # Tag View
+@method_decorator(cache_page_for_anonymous(lambda tag_slug: ['posts', f'tag:{tag_slug}']), name='dispatch')
 class PostByTagListView(ListView):
     model = Post
     template_name = 'blog/posts_by_tag.html'
@@ -214,14 +241,36 @@ class PostByTagListView(ListView):
 
     def get_queryset(self):
         tag_slug = self.kwargs.get('tag_slug')
-        self.tag = get_object_or_404(Tag, slug=tag_slug)
-        return Post.objects.filter(tags__in=[self.tag])
+        self.tag = get_object_or_404(Tag.objects.select_related('blog_stat'), slug=tag_slug)
+        # Newest first with the id as tie-breaker, so pages never overlap or skip
+        return (
+            Post.objects.filter(tags=self.tag)
+            .select_related('author')
+            .order_by('-published_date', '-id')
+        )
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        stat = getattr(self.tag, 'blog_stat', None)
+        if stat is not None:
+            # The maintained count (blog.tag_stats) instead of COUNT(*) over the tag join
+            paginator.count = stat.post_count
+        return paginator
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag
         return context
 
+
+def tag_cloud_api(request):
+    """JSON tag cloud: the most used tags with their post counts."""
+    try:
+        limit = min(max(int(request.GET.get('limit', 30)), 1), 200)
+    except ValueError:
+        limit = 30
+    return JsonResponse({'tags': tag_stats.tag_cloud(limit)})
+
     
 
 # Comment Views
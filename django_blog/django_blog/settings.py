@@ -39,9 +39,11 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "blog",
     "taggit",
+    "query_profiler",
 ]
 
 MIDDLEWARE = [
+    "query_profiler.middleware.QueryProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -130,4 +132,25 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 STATICFILES_DIRS = [
     BASE_DIR / "static",
-]
\ No newline at end of file
+]
+# Caching (blog.caching)
+# Any Django cache backend works here: swap in FileBasedCache or RedisCache
+# (django.core.cache.backends.redis.RedisCache) to share it between processes.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "django-blog",
+    }
+}
+# Safety-net expiry for cached pages and fragments; model changes invalidate
+# them immediately, so this can be long
+BLOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+TEST_RUNNER = "query_profiler.testing.BudgetEnforcingTestRunner"
+QUERY_PROFILER_BUDGETS = {
+    "blog:home": 4,
+    "blog:listing_post": 6,
+    "blog:viewing_post": 6,
+    "blog:posts_by_tag": 6,
+    "blog:search_posts": 8,
+}
@@ -21,4 +21,5 @@ from django.urls import path, include
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('', include('blog.urls')),
+    path("__profiler__/", include("query_profiler.urls")),
 ]
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class QueryProfilerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'query_profiler'
+    verbose_name = 'Query profiler'
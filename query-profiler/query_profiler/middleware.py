@@ -0,0 +1,103 @@
+import logging
+import time
+
+from django.conf import settings
+
+from .profiler import QueryRecorder, setting, view_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (with QUERY_PROFILER_ENFORCE_BUDGETS on) when a view runs more queries than its budget."""
+
+
+def query_budget(max_queries):
+    """Function-view decorator declaring a query budget; class views set `query_budget` instead."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def _declared_budget(view_func):
+    for owner in (view_func, getattr(view_func, 'view_class', None), getattr(view_func, 'cls', None)):
+        budget = getattr(owner, 'query_budget', None)
+        if budget is not None:
+            return budget
+    return None
+
+
+class QueryProfilerMiddleware:
+    """
+    Records query count, SQL time, duplicate statements and the slowest
+    statements of every request.
+
+    - Adds `Server-Timing: db;dur=..;desc="N queries", app;dur=..` when
+      QUERY_PROFILER_SERVER_TIMING is on (by default only with DEBUG, as it
+      tells clients how many queries a request ran).
+    - Aggregates per view for the stats endpoint (query_profiler.urls).
+    - Checks the view's query budget: `query_budget` on the view (or its
+      class), else QUERY_PROFILER_BUDGETS[view_name]. Over budget is
+      logged, or raises QueryBudgetExceeded when
+      QUERY_PROFILER_ENFORCE_BUDGETS is on (see query_profiler.testing).
+
+    Put it first in MIDDLEWARE so every query of the request is timed. Budgets
+    only count the queries from the view onwards: the session and user
+    lookups of Django's auth middleware are made before the view is called
+    and not charged to it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not setting('ENABLED', True):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryRecorder() as recorder:
+            request._query_recorder = recorder
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        if setting('SERVER_TIMING', settings.DEBUG):
+            timings = [
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+                f'app;dur={(elapsed - recorder.duration) * 1000:.2f}',
+            ]
+            if response.has_header('Server-Timing'):
+                timings.insert(0, response['Server-Timing'])
+            response['Server-Timing'] = ', '.join(timings)
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        budget = getattr(request, '_query_budget', None)
+        view_queries = recorder.count - getattr(request, '_queries_before_view', 0)
+        over_budget = budget is not None and view_queries > budget
+        view_stats.record(match.view_name, recorder, over_budget)
+
+        if over_budget:
+            message = (
+                f"{match.view_name} ran {view_queries} queries (budget {budget}) for {request.path}; "
+                f"repeated: {recorder.duplicates() or 'none'}"
+            )
+            if setting('ENFORCE_BUDGETS', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = _declared_budget(view_func)
+        if budget is None:
+            budget = setting('BUDGETS', {}).get(request.resolver_match.view_name)
+        request._query_budget = budget
+        recorder = getattr(request, '_query_recorder', None)
+        if budget is None or recorder is None:
+            return
+        user = getattr(request, 'user', None)
+        if user is not None:
+            # Loads the session and user now, so they are not charged to the view
+            user.is_authenticated
+        request._queries_before_view = recorder.count
@@ -0,0 +1,127 @@
+"""
+Per-request SQL profiling.
+
+`QueryRecorder` hooks every database connection through
+`connection.execute_wrapper`, so it works with DEBUG off and costs one
+`perf_counter()` pair per statement. Statements are grouped by fingerprint
+(the SQL with literals, placeholders and IN-lists collapsed), which is how
+N+1 patterns show up: the same fingerprint executed once per row.
+
+`ViewStats` keeps running totals per view (resolver view name) for the
+JSON stats endpoint. It lives in process memory; each worker reports on
+the requests it served.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+|\'[^\']*\')\s*,?)+\)', re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def setting(name, default):
+    return getattr(settings, f'QUERY_PROFILER_{name}', default)
+
+
+def fingerprint(sql):
+    """Normalize `sql` so statements differing only in values compare equal."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _LITERAL_RE.sub('?', sql).replace('%s', '?')
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Context manager recording every statement run on any connection."""
+
+    def __init__(self, slow_limit=None):
+        self.slow_limit = slow_limit or setting('SLOW_QUERIES', 5)
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slowest = []  # (seconds, sql), longest first
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            if len(self.slowest) < self.slow_limit or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, sql))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[self.slow_limit:]
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def duplicates(self):
+        """{fingerprint: times} for statements run more than once."""
+        return {sql: n for sql, n in self.fingerprints.most_common() if n > 1}
+
+
+class ViewStats:
+    """Thread-safe running totals per view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, recorder, over_budget):
+        with self._lock:
+            stats = self._views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'sql_ms': 0.0,
+                'over_budget': 0,
+                'duplicates': Counter(),
+                'slowest': [],
+            })
+            stats['requests'] += 1
+            stats['queries'] += recorder.count
+            stats['max_queries'] = max(stats['max_queries'], recorder.count)
+            stats['sql_ms'] += recorder.duration * 1000
+            stats['over_budget'] += int(over_budget)
+            stats['duplicates'].update(recorder.duplicates())
+            stats['slowest'] = sorted(
+                stats['slowest'] + [(round(s * 1000, 3), sql) for s, sql in recorder.slowest],
+                reverse=True,
+            )[:recorder.slow_limit]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    'requests': stats['requests'],
+                    'avg_queries': round(stats['queries'] / stats['requests'], 2),
+                    'max_queries': stats['max_queries'],
+                    'avg_sql_ms': round(stats['sql_ms'] / stats['requests'], 3),
+                    'over_budget': stats['over_budget'],
+                    'duplicates': dict(stats['duplicates'].most_common(10)),
+                    'slowest': [{'ms': ms, 'sql': sql} for ms, sql in stats['slowest']],
+                }
+                for view_name, stats in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_stats = ViewStats()
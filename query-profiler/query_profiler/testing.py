@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .profiler import QueryRecorder
+
+
+def _enforcement():
+    return override_settings(QUERY_PROFILER_ENFORCE_BUDGETS=True)
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: view query budgets raise QueryBudgetExceeded for the
+    whole class (whatever the test runner), and `assertMaxQueries` bounds
+    the queries of a block.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        enforcement = _enforcement()
+        enforcement.enable()
+        cls.addClassCleanup(enforcement.disable)
+        super().setUpClass()
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries):
+        with QueryRecorder() as recorder:
+            yield recorder
+        if recorder.count > max_queries:
+            self.fail(
+                f"{recorder.count} queries executed, at most {max_queries} expected; "
+                f"repeated: {recorder.duplicates() or 'none'}"
+            )
+
+
+class BudgetEnforcingTestRunner(DiscoverRunner):
+    """`manage.py test` runner enforcing view query budgets in every test (see TEST_RUNNER)."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._enforcement = _enforcement()
+        self._enforcement.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._enforcement.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch
+from django.utils.functional import SimpleLazyObject
+
+from .middleware import QueryBudgetExceeded, QueryProfilerMiddleware, query_budget
+from .profiler import fingerprint, view_stats
+from .testing import QueryBudgetMixin
+
+
+def n_plus_one_view(request):
+    for pk in ContentType.objects.values_list('pk', flat=True)[:3]:
+        ContentType.objects.get(pk=pk)
+    return HttpResponse('ok')
+
+
+class QueryProfilerTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        view_stats.reset()
+
+    def run_view(self, view, view_name='n-plus-one', user=None):
+        request = RequestFactory().get('/profiled/')
+        if user is not None:
+            request.user = user
+        request.resolver_match = ResolverMatch(view, (), {}, url_name=view_name)
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = QueryProfilerMiddleware(get_response)
+        return middleware(request)
+
+    def test_fingerprint_collapses_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x' AND pk IN (%s, %s)"),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)",
+        )
+
+    @override_settings(QUERY_PROFILER_SERVER_TIMING=True)
+    def test_server_timing_header_and_view_stats(self):
+        response = self.run_view(n_plus_one_view)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+
+        stats = view_stats.snapshot()['n-plus-one']
+        self.assertEqual((stats['requests'], stats['max_queries']), (1, 4))
+        self.assertEqual(list(stats['duplicates'].values()), [3])
+
+    @override_settings(QUERY_PROFILER_ENFORCE_BUDGETS=True)
+    def test_budget_is_enforced(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.run_view(query_budget(2)(lambda request: n_plus_one_view(request)))
+
+    @override_settings(DEBUG=False)
+    def test_no_server_timing_header_outside_debug(self):
+        self.assertFalse(self.run_view(n_plus_one_view).has_header('Server-Timing'))
+
+    def test_budget_excludes_user_lookup(self):
+        def load_user():
+            ContentType.objects.count()  # stands in for the session and user queries
+            return AnonymousUser()
+
+        view = query_budget(4)(lambda request: n_plus_one_view(request))
+        response = self.run_view(view, user=SimpleLazyObject(load_user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(view_stats.snapshot()['n-plus-one']['max_queries'], 5)
+
+    @override_settings(QUERY_PROFILER_ENFORCE_BUDGETS=False, QUERY_PROFILER_BUDGETS={'n-plus-one': 2})
+    def test_budget_from_settings_is_reported(self):
+        with self.assertLogs('query_profiler.middleware', 'WARNING'):
+            self.run_view(n_plus_one_view)
+        self.assertEqual(view_stats.snapshot()['n-plus-one']['over_budget'], 1)
+
+    def test_mixin_enforces_budgets(self):
+        self.assertTrue(settings.QUERY_PROFILER_ENFORCE_BUDGETS)
+
+    def test_assert_max_queries(self):
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(1):
+                list(ContentType.objects.all())
+                list(ContentType.objects.all())
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'query_profiler'
+
+urlpatterns = [
+    path('', views.stats, name='stats'),
+]
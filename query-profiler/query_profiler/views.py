@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.http import Http404, JsonResponse
+
+from .profiler import view_stats
+
+
+def stats(request):
+    """Per-view query statistics of this process, as JSON. Staff only outside DEBUG."""
+    if not (settings.DEBUG or request.user.is_staff):
+        raise Http404
+    if request.GET.get('reset'):
+        view_stats.reset()
+    return JsonResponse({'views': view_stats.snapshot()})
@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+"""Run the query_profiler tests against an in-memory SQLite database: `python runtests.py`."""
+import sys
+
+import django
+from django.conf import settings
+from django.test.utils import get_runner
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes', 'query_profiler'],
+    MIDDLEWARE=['query_profiler.middleware.QueryProfilerMiddleware'],
+    ROOT_URLCONF='query_profiler.urls',
+    TEST_RUNNER='query_profiler.testing.BudgetEnforcingTestRunner',
+    USE_TZ=True,
+)
+django.setup()
+
+if __name__ == '__main__':
+    failures = get_runner(settings)().run_tests(sys.argv[1:] or ['query_profiler'])
+    sys.exit(bool(failures))
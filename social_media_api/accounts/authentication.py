@@ -0,0 +1,172 @@
+"""
+Authentication with expiring tokens and a token -> user lookup cache.
+
+CachedTokenAuthentication reads accounts.AuthToken instead of DRF's
+permanent Token, rejects expired tokens and slides the expiry of the ones
+in use (see accounts.tokens). Looking a token up joins AuthToken and
+CustomUser, so the class also remembers the resolved (user, token) pair for
+AUTH_TOKEN_CACHE_TTL seconds, so a client sending the same token again
+costs no query. AUTH_TOKEN_CACHE selects where the pairs live:
+
+- 'local' (default): a bounded LRU (AUTH_TOKEN_CACHE_SIZE entries) in each
+  process. Fastest, but a revocation only reaches the process it happened
+  in; the others keep accepting the token until its entry expires.
+- 'shared': the Django cache named by AUTH_TOKEN_CACHE_ALIAS (use Redis or
+  Memcached), so revocations apply to every process at once.
+- None: no caching, one lookup per request.
+
+Entries are dropped when a token is deleted or replaced (logout, rotation)
+and when its user is saved (password change, deactivation). Queryset
+`update()` calls bypass those signals and are only picked up at expiry.
+The cached user's denormalized counters (follower_count, ...) may lag by
+up to the TTL; read a fresh row where they matter.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken
+from .tokens import is_expired, refresh_token
+
+User = get_user_model()
+
+
+def setting(name, default):
+    return getattr(settings, f'AUTH_TOKEN_CACHE_{name}', default)
+
+
+def _cache_key(key):
+    # Never put raw credentials into cache keys (they show up in cache tooling)
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+class LocalTokenCache:
+    """Per-process LRU with a TTL; thread-safe."""
+
+    def __init__(self):
+        self._entries = OrderedDict()  # cache key -> (expires_at, (user, token))
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        cache_key = _cache_key(key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+        user, token = entry[1]
+        # A copy per request: views may change request.user, and other threads share the entry
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        cache_key = _cache_key(key)
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + setting('TTL', 60), (copy.copy(user), token))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > setting('SIZE', 10_000):
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(_cache_key(key), None)
+
+
+class SharedTokenCache:
+    """Entries in a Django cache backend shared by every process."""
+
+    @property
+    def cache(self):
+        return caches[setting('ALIAS', 'default')]
+
+    def get(self, key):
+        return self.cache.get(_cache_key(key))
+
+    def set(self, key, user, token):
+        self.cache.set(_cache_key(key), (user, token), setting('TTL', 60))
+
+    def delete(self, key):
+        self.cache.delete(_cache_key(key))
+
+
+_token_caches = {}
+
+
+def get_token_cache():
+    """The configured token cache, or None when caching is off."""
+    backend = getattr(settings, 'AUTH_TOKEN_CACHE', 'local')
+    if not backend:
+        return None
+    if backend not in _token_caches:
+        _token_caches[backend] = {'local': LocalTokenCache, 'shared': SharedTokenCache}[backend]()
+    return _token_caches[backend]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication over AuthToken, with expiry and cached lookups."""
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        now = timezone.now()
+
+        cached = token_cache.get(key) if token_cache is not None else None
+        if cached is not None and is_expired(cached[1], now):
+            # Another process may have slid the expiry since this entry was cached
+            token_cache.delete(key)
+            cached = None
+
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            if is_expired(token, now):
+                raise exceptions.AuthenticationFailed('Token has expired.')
+        else:
+            user, token = cached
+
+        if (refresh_token(token, now) or cached is None) and token_cache is not None:
+            token_cache.set(key, user, token)
+        return user, token
+
+
+def invalidate_token(key):
+    """Forget a cached token now and again once the transaction commits."""
+    def forget():
+        get_token_cache()  # the configured one, plus any used earlier in this process
+        for token_cache in _token_caches.values():
+            token_cache.delete(key)
+
+    forget()
+    # The second pass covers requests that re-cached the old rows before commit
+    transaction.on_commit(forget)
+
+
+# --- Invalidation ---
+
+@receiver(post_delete, sender=AuthToken, dispatch_uid='accounts_token_cache_deleted')
+@receiver(post_save, sender=AuthToken, dispatch_uid='accounts_token_cache_saved')
+def forget_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User, dispatch_uid='accounts_token_cache_user_saved')
+def forget_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # Logging in only touches last_login; nothing the cache holds depends on it
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    for key in AuthToken.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        invalidate_token(key)
+
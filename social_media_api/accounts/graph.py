@@ -0,0 +1,95 @@
+"""
+Follow graph writes.
+
+Every follow/unfollow - single or bulk - goes through these helpers so the
+denormalized follower/following counts, the materialized feeds and the
+follow notifications stay in step. Bulk calls touch the M2M through table
+with one `bulk_create` / `delete` inside a single transaction instead of
+one `add()` / `remove()` per user. Counts only move by the rows a call
+actually inserted or deleted, so concurrent follows of the same user do
+not make them drift.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from notifications.dispatch import enqueue_many
+from posts.feed import backfill_feed_from
+from posts.models import FeedEntry
+
+User = get_user_model()
+# Row of the followers M2M: from_customuser is followed by to_customuser
+Follow = User.followers.through
+
+BATCH_SIZE = 1000
+MAX_BULK_USERS = 5000
+
+
+def _followed_ids(user, target_ids, lock=False):
+    follows = Follow.objects.filter(to_customuser=user, from_customuser__in=target_ids)
+    if lock:
+        follows = follows.select_for_update()
+    return set(follows.values_list('from_customuser_id', flat=True))
+
+
+def _insert_follows(user, target_ids):
+    """Insert `user` -> `target_ids` follows; returns the target ids actually inserted."""
+    inserted = []
+    for start in range(0, len(target_ids), BATCH_SIZE):
+        chunk = target_ids[start:start + BATCH_SIZE]
+        try:
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    [Follow(from_customuser_id=target_id, to_customuser_id=user.pk) for target_id in chunk]
+                )
+            inserted.extend(chunk)
+        except IntegrityError:
+            # A concurrent request followed some of them first; skip those
+            for target_id in chunk:
+                try:
+                    with transaction.atomic():
+                        Follow.objects.create(from_customuser_id=target_id, to_customuser_id=user.pk)
+                except IntegrityError:
+                    continue
+                inserted.append(target_id)
+    return inserted
+
+
+def follow_users(user, target_ids):
+    """Make `user` follow every existing user in `target_ids`; returns the ids newly followed."""
+    target_ids = set(target_ids) - {user.pk}
+    with transaction.atomic():
+        existing = set(User.objects.filter(pk__in=target_ids).values_list('pk', flat=True))
+        # Counts move only for the rows this call inserted
+        new_ids = _insert_follows(user, sorted(existing - _followed_ids(user, existing)))
+        if not new_ids:
+            return []
+
+        User.objects.filter(pk__in=new_ids).update(follower_count=F('follower_count') + 1)
+        User.objects.filter(pk=user.pk).update(following_count=F('following_count') + len(new_ids))
+        backfill_feed_from(user, new_ids)
+
+        # NOTIFICATION: every newly followed user hears about the new follower
+        user_type_id = ContentType.objects.get_for_model(User).pk
+        enqueue_many([
+            dict(actor_id=user.pk, recipient_id=target_id, verb="followed",
+                 content_type_id=user_type_id, object_id=user.pk)
+            for target_id in new_ids
+        ])
+    return new_ids
+
+
+def unfollow_users(user, target_ids):
+    """Make `user` stop following every user in `target_ids`; returns the ids unfollowed."""
+    with transaction.atomic():
+        # Locked, so a concurrent unfollow cannot delete (and count) the same rows
+        removed_ids = sorted(_followed_ids(user, set(target_ids), lock=True))
+        if not removed_ids:
+            return []
+
+        Follow.objects.filter(to_customuser=user, from_customuser__in=removed_ids).delete()
+        User.objects.filter(pk__in=removed_ids).update(follower_count=F('follower_count') - 1)
+        User.objects.filter(pk=user.pk).update(following_count=F('following_count') - len(removed_ids))
+        FeedEntry.objects.filter(recipient=user, author_id__in=removed_ids).delete()
+    return removed_ids
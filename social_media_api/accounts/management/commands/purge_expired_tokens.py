@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import PURGE_BATCH_SIZE, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired API tokens in short batched transactions (safe to run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE,
+                            help=f"Tokens deleted per transaction (default: {PURGE_BATCH_SIZE}).")
+
+    def handle(self, *args, **options):
+        purged = purge_expired_tokens(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired token(s)."))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.graph import Follow, User
+
+
+def _count_subquery(column):
+    return Coalesce(Subquery(
+        Follow.objects.filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(n=Count('pk'))
+        .values('n')
+    ), 0)
+
+
+def _follower_count():
+    # Rows where the user is the one being followed
+    return _count_subquery('from_customuser')
+
+
+def _following_count():
+    return _count_subquery('to_customuser')
+
+
+class Command(BaseCommand):
+    help = "Recount follower_count and following_count from the follow graph, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Users examined per transaction (default: 1000).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report drifted users without fixing them.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        examined = fixed = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .annotate(actual_followers=_follower_count(), actual_following=_following_count())
+                .only('pk', 'follower_count', 'following_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            examined += len(batch)
+
+            drifted = [
+                user for user in batch
+                if user.follower_count != user.actual_followers or user.following_count != user.actual_following
+            ]
+            if drifted and not options['dry_run']:
+                User.objects.filter(pk__in=[user.pk for user in drifted]).update(
+                    follower_count=_follower_count(),
+                    following_count=_following_count(),
+                )
+            fixed += len(drifted)
+
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"Examined {examined} user(s). {verb} {fixed} with drifted counts."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follower_count(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = CustomUser.followers.through
+    counts = (
+        Follow.objects.filter(from_customuser=OuterRef('pk'))
+        .values('from_customuser')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    CustomUser.objects.update(follower_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_follower_count, migrations.RunPython.noop),
+    ]
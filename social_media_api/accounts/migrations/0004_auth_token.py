@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:49
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_drf_tokens(apps, schema_editor):
+    # Existing clients keep their permanent DRF token as an expiring one
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('accounts', 'AuthToken')
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TTL', 14 * 24 * 60 * 60))
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(key=key, user_id=user_id, last_seen=now, expires_at=expires_at)
+            for key, user_id in Token.objects.values_list('key', 'user_id').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_following_count'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='accounts_token_expiry_idx')],
+            },
+        ),
+        migrations.RunPython(copy_drf_tokens, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -13,5 +14,35 @@ class CustomUser(AbstractUser):
         blank=True
     )
 
+    # Denormalized sizes of `followers` / `following`, kept in step by
+    # accounts.graph. The feed uses follower_count to decide between
+    # fan-out-on-write and fan-out-on-read.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.username
+
+class AuthToken(models.Model):
+    """
+    API token with sliding expiry; replaces DRF's one permanent token per user.
+
+    A user may hold several (one per login / device). `expires_at` moves
+    forward as the token is used (see accounts.tokens), but never past
+    `created` + AUTH_TOKEN_MAX_AGE, after which the client has to log in
+    or rotate again.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='auth_tokens')
+    created = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Range scans of the purge command
+            models.Index(fields=['expires_at'], name='accounts_token_expiry_idx'),
+        ]
+
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.key
@@ -1,8 +1,7 @@
 from rest_framework import serializers
-# [1] REQUIRED IMPORT
-from rest_framework.authtoken.models import Token 
 from django.contrib.auth import get_user_model
 from .models import CustomUser
+from .tokens import issue_token
 
 # --- Registration Serializer ---
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -29,15 +28,33 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             password=validated_data['password']
         )
         
-        token = Token.objects.create(user=user)
-        user.token = token.key
+        user.token = issue_token(user).key
 
         return user
 
 
 # --- User Profile Serializer (Remains mostly the same) ---
 class UserProfileSerializer(serializers.ModelSerializer):
+    # Counts only: the follower/following lists themselves are unbounded and
+    # are served paginated by /users/<id>/followers/ and /users/<id>/following/
     class Meta:
         model = CustomUser
-        fields = ('username', 'email', 'bio', 'profile_picture', 'followers', 'following')
-        read_only_fields = ('username', 'email', 'followers', 'following')
\ No newline at end of file
+        fields = ('username', 'email', 'bio', 'profile_picture', 'follower_count', 'following_count')
+        read_only_fields = ('username', 'email', 'follower_count', 'following_count')
+
+
+# --- Follower/Following list entries ---
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'follower_count')
+        read_only_fields = fields
+
+
+# --- Bulk follow/unfollow (e.g. a contact list import) ---
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=5000,
+    )
\ No newline at end of file
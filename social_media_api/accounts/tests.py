@@ -1,3 +1,263 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from notifications.dispatch import drain_outbox
+from notifications.models import Notification
+from posts.models import FeedEntry, Post
+
+from .authentication import LocalTokenCache, get_token_cache
+from .graph import Follow, follow_users
+from .models import AuthToken
+from .tokens import issue_token, purge_expired_tokens
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATIONS_DISPATCH_BACKEND='sync')
+class FollowGraphTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="testpass")
+        self.others = [User.objects.create_user(username=f"contact{i}") for i in range(4)]
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, name, users):
+        return self.client.post(reverse(name), {"user_ids": [u.id for u in users]}, format="json")
+
+    def test_bulk_follow_updates_counts_feed_and_notifications(self):
+        Post.objects.create(author=self.others[0], title="Hello", content="...")
+        self.user.following.add(self.others[1])  # already followed: skipped, not double counted
+
+        response = self.bulk("bulk-follow", self.others + [self.user])
+        drain_outbox()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["followed"], sorted(u.id for u in self.others if u != self.others[1]))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 3)
+        self.assertEqual(User.objects.get(pk=self.others[0].pk).follower_count, 1)
+        self.assertTrue(FeedEntry.objects.filter(recipient=self.user, author=self.others[0]).exists())
+        self.assertEqual(Notification.objects.filter(actor=self.user, verb="followed").count(), 3)
+
+    def test_follow_written_concurrently_is_not_counted(self):
+        # Another request inserts the edge after this one read the existing follows
+        Follow.objects.create(from_customuser=self.others[0], to_customuser=self.user)
+        with mock.patch("accounts.graph._followed_ids", return_value=set()):
+            self.assertEqual(follow_users(self.user, [self.others[0].pk, self.others[1].pk]), [self.others[1].pk])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 1)
+        self.assertEqual(User.objects.get(pk=self.others[0].pk).follower_count, 0)
+        self.assertEqual(User.objects.get(pk=self.others[1].pk).follower_count, 1)
+
+    def test_bulk_unfollow_removes_edges_and_feed(self):
+        self.bulk("bulk-follow", self.others)
+        Post.objects.create(author=self.others[2], title="Later", content="...")
+        self.bulk("bulk-follow", [self.others[2]])
+
+        response = self.bulk("bulk-unfollow", self.others[:3])
+
+        self.assertEqual(response.data["count"], 3)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 1)
+        self.assertEqual(list(self.user.following.all()), [self.others[3]])
+        self.assertFalse(FeedEntry.objects.filter(recipient=self.user).exists())
+
+    def test_followers_list_is_cursor_paginated(self):
+        star = self.others[0]
+        for follower in [self.user] + self.others[1:]:
+            follower.following.add(star)
+
+        seen = []
+        url = reverse("user-followers", kwargs={"user_id": star.id}) + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item["username"] for item in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, ["importer", "contact1", "contact2", "contact3"])
+
+    def test_profile_exposes_counts_and_reconcile_repairs_drift(self):
+        self.bulk("bulk-follow", self.others[:2])
+        User.objects.filter(pk=self.user.pk).update(following_count=9)
+
+        call_command("reconcile_follow_counts", batch_size=2, stdout=StringIO())
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.data["following_count"], 2)
+        self.assertEqual(response.data["follower_count"], 0)
+        self.assertNotIn("followers", response.data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, AUTH_TOKEN_CACHE='local')
+class TokenCacheTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="old-pass")
+        self.token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("notification-unread-count")
+
+    def queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response.status_code, len(context.captured_queries)
+
+    def test_repeat_requests_skip_the_token_query(self):
+        status_code, first = self.queries()
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(self.queries(), (status.HTTP_200_OK, first - 1))
+
+    def test_logout_revokes_the_token(self):
+        self.queries()
+        response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(AuthToken.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_stops_working(self):
+        self.queries()
+        response = self.client.post(reverse("token-rotate"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_password_change_and_deactivation_are_seen_immediately(self):
+        _, uncached = self.queries()
+        self.user.set_password("new-pass")
+        self.user.save()
+        self.assertEqual(self.queries()[1], uncached)  # looked up again
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_does_not_invalidate(self):
+        self.queries()
+        self.client.post(reverse("login"), {"username": "reader", "password": "old-pass"})
+        _, cached = self.queries()
+        self.assertEqual(self.queries()[1], cached)
+
+    def test_entry_expired_in_cache_is_checked_against_the_database(self):
+        self.queries()
+        # As if another process had slid the expiry after this one cached the token
+        _, cached_token = get_token_cache().get(self.token.key)
+        cached_token.expires_at = timezone.now() - timedelta(seconds=1)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        AuthToken.objects.filter(pk=self.token.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        _, cached_token = get_token_cache().get(self.token.key)
+        cached_token.expires_at = timezone.now() - timedelta(seconds=1)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE='shared')
+    def test_shared_backend(self):
+        _, first = self.queries()
+        self.assertEqual(self.queries()[1], first - 1)
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE=None)
+    def test_caching_can_be_disabled(self):
+        _, first = self.queries()
+        self.assertEqual(self.queries()[1], first)
+
+    @override_settings(AUTH_TOKEN_CACHE_SIZE=2, AUTH_TOKEN_CACHE_TTL=60)
+    def test_local_cache_is_a_bounded_lru(self):
+        token_cache = LocalTokenCache()
+        for key in ("a", "b"):
+            token_cache.set(key, self.user, self.token)
+        token_cache.get("a")
+        token_cache.set("c", self.user, self.token)
+        self.assertIsNotNone(token_cache.get("a"))
+        self.assertIsNone(token_cache.get("b"))  # least recently used
+        self.assertIsNotNone(token_cache.get("c"))
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=0)
+    def test_local_entries_expire(self):
+        token_cache = LocalTokenCache()
+        token_cache.set("a", self.user, self.token)
+        self.assertIsNone(token_cache.get("a"))
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, AUTH_TOKEN_CACHE=None,
+    AUTH_TOKEN_TTL=3600, AUTH_TOKEN_MAX_AGE=86400, AUTH_TOKEN_TOUCH_INTERVAL=300,
+)
+class ExpiringTokenTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="pass")
+        self.url = reverse("notification-unread-count")
+
+    def use(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        writes = [q for q in context.captured_queries if q["sql"].startswith("UPDATE")]
+        return response.status_code, len(writes)
+
+    def age(self, token, **delta):
+        """Move the token's timestamps into the past."""
+        AuthToken.objects.filter(pk=token.pk).update(
+            created=token.created - timedelta(**delta),
+            last_seen=token.last_seen - timedelta(**delta),
+            expires_at=token.expires_at - timedelta(**delta),
+        )
+        return AuthToken.objects.get(pk=token.pk)
+
+    def test_each_login_issues_a_new_expiring_token(self):
+        first = self.client.post(reverse("login"), {"username": "member", "password": "pass"}).data
+        second = self.client.post(reverse("login"), {"username": "member", "password": "pass"}).data
+        self.assertNotEqual(first["token"], second["token"])
+        self.assertEqual(self.user.auth_tokens.count(), 2)
+        self.assertIn("expires_at", first)
+
+    def test_expired_token_is_rejected(self):
+        token = self.age(issue_token(self.user), hours=2)
+        self.assertEqual(self.use(token), (status.HTTP_401_UNAUTHORIZED, 0))
+
+    def test_use_slides_the_expiry_at_most_once_per_interval(self):
+        token = issue_token(self.user)
+        self.assertEqual(self.use(token), (status.HTTP_200_OK, 0))  # fresh: nothing to write
+
+        token = self.age(token, minutes=10)
+        self.assertEqual(self.use(token), (status.HTTP_200_OK, 1))
+        refreshed = AuthToken.objects.get(pk=token.pk)
+        self.assertGreater(refreshed.expires_at, token.expires_at)
+        self.assertEqual(self.use(token), (status.HTTP_200_OK, 0))  # coalesced
+
+    def test_sliding_stops_at_the_maximum_age(self):
+        token = self.age(issue_token(self.user), hours=23, minutes=30)
+        AuthToken.objects.filter(pk=token.pk).update(expires_at=timezone.now() + timedelta(minutes=5))
+        self.use(token)
+        refreshed = AuthToken.objects.get(pk=token.pk)
+        self.assertAlmostEqual(refreshed.expires_at, token.created + timedelta(days=1), delta=timedelta(seconds=1))
+
+    def test_logout_everywhere(self):
+        token, other = issue_token(self.user), issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.client.post(reverse("logout"), {"all": True}, format="json")
+        self.assertFalse(self.user.auth_tokens.exists())
+        self.assertEqual(self.use(other)[0], status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_deletes_only_expired_tokens_in_batches(self):
+        for _ in range(5):
+            self.age(issue_token(self.user), hours=2)
+        valid = issue_token(self.user)
+
+        out = StringIO()
+        call_command("purge_expired_tokens", batch_size=2, stdout=out)
+
+        self.assertIn("Purged 5", out.getvalue())
+        self.assertEqual(list(self.user.auth_tokens.all()), [valid])
+        self.assertEqual(purge_expired_tokens(), 0)
@@ -0,0 +1,106 @@
+"""
+Issuing, refreshing, rotating and purging expiring API tokens (AuthToken).
+
+- Sliding expiry: a token idle for AUTH_TOKEN_TTL seconds expires; using it
+  pushes `expires_at` forward again, up to `created` + AUTH_TOKEN_MAX_AGE.
+- Write coalescing: the refresh is a conditional UPDATE issued at most once
+  per AUTH_TOKEN_TOUCH_INTERVAL per token (`last_seen` older than the
+  interval), so steady traffic does not turn every read into a write, and
+  several processes refreshing the same token at once update it only once.
+- Purging: `purge_expired_tokens` deletes expired rows in primary-key
+  batches, each its own short transaction, walking the expiry index.
+"""
+import binascii
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AuthToken
+
+PURGE_BATCH_SIZE = 1000
+
+
+def token_ttl():
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TTL', 14 * 24 * 60 * 60))
+
+
+def token_max_age():
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_MAX_AGE', 90 * 24 * 60 * 60))
+
+
+def touch_interval():
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TOUCH_INTERVAL', 5 * 60))
+
+
+def generate_key():
+    return binascii.hexlify(os.urandom(20)).decode()
+
+
+def _expiry(created, now):
+    return min(now + token_ttl(), created + token_max_age())
+
+
+def issue_token(user):
+    """A new token for `user`, alongside any they already hold."""
+    now = timezone.now()
+    return AuthToken.objects.create(
+        key=generate_key(), user=user, last_seen=now, expires_at=_expiry(now, now)
+    )
+
+
+def rotate_token(token):
+    """Replace `token` with a new one for the same user; the old key stops working at once."""
+    with transaction.atomic():
+        new_token = issue_token(token.user)
+        AuthToken.objects.filter(key=token.key).delete()
+    return new_token
+
+
+def revoke_user_tokens(user):
+    """Revoke every token of `user` (log out everywhere); returns how many."""
+    deleted, _ = AuthToken.objects.filter(user=user).delete()
+    return deleted
+
+
+def is_expired(token, now=None):
+    return token.expires_at <= (now or timezone.now())
+
+
+def refresh_token(token, now=None):
+    """
+    Slide the expiry of a token that was just used. Writes only when the
+    stored `last_seen` is more than AUTH_TOKEN_TOUCH_INTERVAL old; returns
+    True when `token` was changed.
+    """
+    now = now or timezone.now()
+    stale_before = now - touch_interval()
+    if token.last_seen >= stale_before:
+        return False
+    expires_at = _expiry(token.created, now)
+    # Conditional, so concurrent refreshes of the same token write once
+    AuthToken.objects.filter(key=token.key, last_seen__lt=stale_before).update(
+        last_seen=now, expires_at=expires_at
+    )
+    token.last_seen = now
+    token.expires_at = expires_at
+    return True
+
+
+def purge_expired_tokens(batch_size=PURGE_BATCH_SIZE, now=None):
+    """Delete expired tokens `batch_size` at a time; returns how many."""
+    now = now or timezone.now()
+    purged = 0
+    while True:
+        with transaction.atomic():
+            keys = list(
+                AuthToken.objects.filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return purged
+            AuthToken.objects.filter(key__in=keys).delete()
+        purged += len(keys)
@@ -5,18 +5,32 @@ from django.urls import path
 from .views import (
     RegisterView, 
     LoginView, 
+    LogoutView,
+    RotateTokenView,
     UserProfileView, 
     FollowUserView,  
-    UnfollowUserView 
+    UnfollowUserView,
+    BulkFollowView,
+    BulkUnfollowView,
+    FollowersListView,
+    FollowingListView,
 ) 
 
 urlpatterns = [
     # ... existing routes ...
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/rotate/', RotateTokenView.as_view(), name='token-rotate'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     
     # NEW FOLLOW ROUTES
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+
+    # Paginated follow graph (cursor pagination, ordered by user id)
+    path('users/<int:user_id>/followers/', FollowersListView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
 ]
\ No newline at end of file
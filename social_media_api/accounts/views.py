@@ -1,17 +1,21 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import authenticate, get_user_model
 from django.shortcuts import get_object_or_404
 # Assuming these are from your project, keep them
 from .models import CustomUser
-from .serializers import UserRegistrationSerializer, UserProfileSerializer
-# Other imports you might have (e.g., from .models, .serializers)
-from .models import CustomUser
-from .serializers import UserRegistrationSerializer, UserProfileSerializer
-from notifications.utils import create_notification
+from .serializers import (
+    UserRegistrationSerializer,
+    UserProfileSerializer,
+    UserSummarySerializer,
+    BulkFollowSerializer,
+)
+from .graph import follow_users, unfollow_users
+from .models import AuthToken
+from .tokens import issue_token, revoke_user_tokens, rotate_token
+from social_media_api.pagination import KeysetPagination
 
 User = get_user_model()
 
@@ -42,13 +46,37 @@ class LoginView(APIView):
         user = authenticate(username=username, password=password)
         
         if user is not None:
-            # User is authenticated, get or create token
-            token, created = Token.objects.get_or_create(user=user)
+            # User is authenticated: issue a new expiring token for this client
+            token = issue_token(user)
             # The key deliverable: return the token
-            return Response({'token': token.key, 'user_id': user.pk, 'username': user.username})
+            return Response({'token': token.key, 'expires_at': token.expires_at,
+                             'user_id': user.pk, 'username': user.username})
         else:
             return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
 
+# Logout: revoke the token the request was made with, or with {"all": true} every token of the user
+class LogoutView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        # Deleting tokens also drops them from the token lookup cache
+        if request.data.get('all'):
+            revoke_user_tokens(request.user)
+        elif request.auth is not None:
+            AuthToken.objects.filter(key=request.auth.key).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+# Token rotation: swap the current token for a new one
+class RotateTokenView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        if request.auth is None:
+            return Response({'detail': 'Only token-authenticated requests can rotate.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        token = rotate_token(request.auth)
+        return Response({'token': token.key, 'expires_at': token.expires_at})
+
 # 3. User Profile View
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
@@ -56,8 +84,9 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,) 
 
     def get_object(self):
-        # The object is the currently logged-in user
-        return self.request.user
+        # The object is the currently logged-in user, re-read: request.user may
+        # come from the token cache with follower/following counts a little behind
+        return User.objects.get(pk=self.request.user.pk)
     
 # --- Follow/Unfollow Base View ---
 class FollowToggleView(generics.GenericAPIView): 
@@ -73,18 +102,15 @@ class FollowToggleView(generics.GenericAPIView):
         if current_user == target_user:
             return Response({"detail": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 3. Determine action based on the request path/logic (we'll make this a toggle)
-        is_following = current_user.following.filter(id=target_user.id).exists()
-        
+        # 3. Follow/unfollow through accounts.graph, which also keeps counts,
+        #    feeds and notifications in step; an empty result means no change
         if self.is_follow_action:
-            if not is_following:
-                current_user.following.add(target_user)
+            if follow_users(current_user, [target_user.id]):
                 return Response({"detail": f"You are now following {target_user.username}."}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": f"You already follow {target_user.username}."}, status=status.HTTP_400_BAD_REQUEST)
         else:
-            if is_following:
-                current_user.following.remove(target_user)
+            if unfollow_users(current_user, [target_user.id]):
                 return Response({"detail": f"You have unfollowed {target_user.username}."}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": f"You are not following {target_user.username}."}, status=status.HTTP_400_BAD_REQUEST)
@@ -97,23 +123,38 @@ class FollowUserView(FollowToggleView):
 class UnfollowUserView(FollowToggleView):
     is_follow_action = False
 
-from notifications.utils import create_notification # <--- ADD THIS IMPORT
-
-# --- Concrete Follow View ---
-class FollowUserView(FollowToggleView):
+# --- Bulk Follow/Unfollow ---
+class BulkFollowView(generics.GenericAPIView):
+    """POST {"user_ids": [...]}: follow (or unfollow) up to 5000 users in one transaction."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkFollowSerializer
     is_follow_action = True
-    
-    def post(self, request, user_id):
-        response = super().post(request, user_id)
-        
-        # Check if the follow was successful (Status 200 means success)
-        if response.status_code == status.HTTP_200_OK and "now following" in response.data.get('detail', ''):
-            target_user = get_object_or_404(User, id=user_id)
-            # NOTIFICATION: Notify the target user (recipient) of the new follower (actor)
-            create_notification(
-                actor=request.user, 
-                recipient=target_user, 
-                verb="followed", 
-                target=request.user # The target is the actor's user object
-            )
-        return response
\ No newline at end of file
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['user_ids']
+        if self.is_follow_action:
+            changed = follow_users(request.user, user_ids)
+            return Response({"followed": changed, "count": len(changed)}, status=status.HTTP_200_OK)
+        changed = unfollow_users(request.user, user_ids)
+        return Response({"unfollowed": changed, "count": len(changed)}, status=status.HTTP_200_OK)
+
+class BulkUnfollowView(BulkFollowView):
+    is_follow_action = False
+
+# --- Paginated Follower/Following Lists ---
+class FollowersListView(generics.ListAPIView):
+    serializer_class = UserSummarySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('id',)
+    relation = 'followers'
+    query_budget = 4
+
+    def get_queryset(self):
+        user = get_object_or_404(User, id=self.kwargs['user_id'])
+        return getattr(user, self.relation).all()
+
+class FollowingListView(FollowersListView):
+    relation = 'following'
@@ -0,0 +1,66 @@
+"""Write path for notifications: coalescing events into aggregate rows."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+# How many recent actor ids an aggregated notification remembers
+ACTOR_SAMPLE_SIZE = 5
+
+
+def record_notification(recipient_id, verb, content_type_id, object_id, actor_ids):
+    """
+    Coalesce `actor_ids` (oldest first) into the recipient's unread
+    notification for the same (verb, target) created within
+    NOTIFICATIONS_AGGREGATION_WINDOW seconds, or start a new one.
+
+    A post liked by thousands of users therefore costs its author one row
+    ("alice and 213 others liked your Post") instead of one row per like.
+    """
+    # De-duplicate while keeping the most recent occurrence of each actor
+    actors = list(dict.fromkeys(reversed([a for a in actor_ids if a != recipient_id])))
+    if not actors:
+        return None
+
+    window = getattr(settings, 'NOTIFICATIONS_AGGREGATION_WINDOW', 24 * 60 * 60)
+    now = timezone.now()
+
+    with transaction.atomic():
+        aggregate = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient_id=recipient_id,
+                verb=verb,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                read=False,
+                timestamp__gte=now - timedelta(seconds=window),
+            )
+            .order_by('-timestamp')
+            .first()
+        )
+
+        if aggregate is None:
+            return Notification.objects.create(
+                recipient_id=recipient_id,
+                actor_id=actors[0],
+                verb=verb,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                actor_count=len(actors),
+                actor_sample=actors[:ACTOR_SAMPLE_SIZE],
+            )
+
+        # Best effort de-duplication: only actors still in the sample are known
+        new_actors = [a for a in actors if a not in aggregate.actor_sample]
+        if not new_actors:
+            return aggregate
+        aggregate.actor_id = new_actors[0]
+        aggregate.actor_count += len(new_actors)
+        aggregate.actor_sample = (new_actors + aggregate.actor_sample)[:ACTOR_SAMPLE_SIZE]
+        aggregate.timestamp = now
+        aggregate.save(update_fields=['actor', 'actor_count', 'actor_sample', 'timestamp'])
+        return aggregate
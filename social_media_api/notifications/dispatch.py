@@ -0,0 +1,196 @@
+"""
+Notification dispatch pipeline.
+
+Views call `create_notification` (notifications.utils), which only appends a
+NotificationOutbox row and returns. Once the request's transaction commits,
+the configured dispatcher drains the outbox in batches and writes the real
+(aggregated) notifications, so like/follow/comment latency no longer
+depends on notification storage.
+
+NOTIFICATIONS_DISPATCH_BACKEND selects the dispatcher:
+
+- 'thread' (default): a single background worker thread per process.
+- 'sync': drain in the calling thread right after commit (handy locally).
+
+Events left in the outbox by a crashed worker are applied by the next drain,
+or by `manage.py drain_notification_outbox`. Each target is written in its
+own savepoint, so one failing event does not hold back the rest of its
+batch: it is logged and left for a later drain, and after
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS failures dead-lettered (`failed_at` set)
+instead of retried forever. Events whose actor or recipient has since been
+deleted are dropped.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .aggregation import record_notification
+from .models import Notification, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def enqueue(actor_id, recipient_id, verb, content_type_id, object_id):
+    """Append an event to the outbox and wake the dispatcher after commit."""
+    NotificationOutbox.objects.create(
+        actor_id=actor_id,
+        recipient_id=recipient_id,
+        verb=verb,
+        content_type_id=content_type_id,
+        object_id=object_id,
+    )
+    transaction.on_commit(get_dispatcher().wake)
+
+
+def enqueue_many(events):
+    """Bulk variant of `enqueue` taking dicts of the same keyword arguments."""
+    NotificationOutbox.objects.bulk_create(
+        [NotificationOutbox(**event) for event in events], batch_size=BATCH_SIZE
+    )
+    if events:
+        transaction.on_commit(get_dispatcher().wake)
+
+
+def _drop_repeated_follows(events):
+    """A user following, unfollowing and re-following only notifies once."""
+    follows = [e for e in events if e.verb == 'followed']
+    if not follows:
+        return events
+    notified = set(
+        Notification.objects.filter(
+            verb='followed',
+            recipient_id__in={e.recipient_id for e in follows},
+            actor_id__in={e.actor_id for e in follows},
+        ).values_list('recipient_id', 'actor_id')
+    )
+    kept = []
+    for event in events:
+        if event.verb == 'followed':
+            if (event.recipient_id, event.actor_id) in notified:
+                continue
+            notified.add((event.recipient_id, event.actor_id))
+        kept.append(event)
+    return kept
+
+
+def max_attempts():
+    return getattr(settings, 'NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def _drop_orphaned(events):
+    """Events whose actor or recipient was deleted after they were queued can never apply."""
+    user_ids = {e.recipient_id for e in events} | {e.actor_id for e in events}
+    existing = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    kept = [e for e in events if e.recipient_id in existing and e.actor_id in existing]
+    if len(kept) < len(events):
+        logger.info("Dropped %d notification event(s) for deleted users", len(events) - len(kept))
+    return kept
+
+
+def apply_events(events):
+    """
+    Write a batch of outbox events, one aggregate write per target. Returns
+    {event pk: error} for the events whose target could not be written.
+    """
+    grouped = {}
+    # Checked up front: foreign keys are deferred to commit, where a missing
+    # user would fail the whole batch rather than its own savepoint
+    for event in _drop_repeated_follows(_drop_orphaned(events)):
+        key = (event.recipient_id, event.verb, event.content_type_id, event.object_id)
+        grouped.setdefault(key, []).append(event)
+    failed = {}
+    for (recipient_id, verb, content_type_id, object_id), group in grouped.items():
+        try:
+            # record_notification runs in its own savepoint, so a failure
+            # only rolls back this target
+            record_notification(recipient_id, verb, content_type_id, object_id, [e.actor_id for e in group])
+        except Exception as exc:
+            logger.exception("Applying %d %r notification event(s) for user %s failed", len(group), verb, recipient_id)
+            for event in group:
+                failed[event.pk] = f'{type(exc).__name__}: {exc}'
+    return failed
+
+
+def _record_failures(events, failed):
+    now = timezone.now()
+    for event in events:
+        if event.pk not in failed:
+            continue
+        event.attempts += 1
+        event.last_error = failed[event.pk]
+        if event.attempts >= max_attempts():
+            event.failed_at = now
+            logger.error("Dead-lettered notification outbox event %s: %s", event.pk, event.last_error)
+        event.save(update_fields=['attempts', 'last_error', 'failed_at'])
+
+
+def drain_outbox(batch_size=BATCH_SIZE):
+    """
+    Apply and delete pending outbox events until none are left; returns how
+    many were removed (applied or dropped). Events failing in this drain wait
+    for the next one.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            pending = NotificationOutbox.objects.filter(failed_at__isnull=True, id__gt=last_id).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                # Lets several workers drain side by side without double-applying
+                pending = pending.select_for_update(skip_locked=True)
+            events = list(pending[:batch_size])
+            if not events:
+                return processed
+            failed = apply_events(events)
+            NotificationOutbox.objects.filter(pk__in=[e.pk for e in events if e.pk not in failed]).delete()
+            _record_failures(events, failed)
+        processed += len(events) - len(failed)
+        last_id = events[-1].pk
+
+
+class SyncDispatcher:
+    def wake(self):
+        drain_outbox()
+
+
+class ThreadDispatcher:
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notifications')
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    def wake(self):
+        # Coalesce wake-ups: one queued drain picks up every pending event
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor.submit(self._run)
+
+    def _run(self):
+        with self._lock:
+            self._scheduled = False
+        close_old_connections()
+        try:
+            drain_outbox()
+        except Exception:
+            logger.exception("Draining the notification outbox failed")
+        finally:
+            close_old_connections()
+
+
+_dispatchers = {}
+
+
+def get_dispatcher():
+    backend = getattr(settings, 'NOTIFICATIONS_DISPATCH_BACKEND', 'thread')
+    if backend not in _dispatchers:
+        _dispatchers[backend] = {'sync': SyncDispatcher, 'thread': ThreadDispatcher}[backend]()
+    return _dispatchers[backend]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import drain_outbox
+from notifications.models import NotificationOutbox
+
+
+class Command(BaseCommand):
+    help = "Write every notification event still waiting in the outbox (e.g. after a worker crash)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Events applied per transaction (default: 500).")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Also retry dead-lettered events (those that failed too often).")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = NotificationOutbox.objects.filter(failed_at__isnull=False).update(
+                failed_at=None, attempts=0
+            )
+            self.stdout.write(f"Retrying {retried} dead-lettered event(s).")
+        processed = drain_outbox(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Applied {processed} notification event(s)."))
+        dead = NotificationOutbox.objects.filter(failed_at__isnull=False).count()
+        if dead:
+            self.stdout.write(self.style.WARNING(
+                f"{dead} dead-lettered event(s) remain; see their last_error, then use --retry-failed."
+            ))
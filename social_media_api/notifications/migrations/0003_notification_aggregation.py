@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_actor_sample(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    batch = []
+    for notification in Notification.objects.only('pk', 'actor_id').iterator(chunk_size=1000):
+        notification.actor_sample = [notification.actor_id]
+        batch.append(notification)
+        if len(batch) >= 1000:
+            Notification.objects.bulk_update(batch, ['actor_sample'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['actor_sample'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_notification_notif_recipient_ts_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actor_sample',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'verb', 'content_type', 'object_id', '-timestamp'], name='notif_aggregate_key_idx'),
+        ),
+        migrations.RunPython(populate_actor_sample, migrations.RunPython.noop),
+    ]
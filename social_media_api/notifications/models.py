@@ -26,12 +26,61 @@ class Notification(models.Model):
     object_id = models.PositiveIntegerField()
     target = GenericForeignKey('content_type', 'object_id')
 
-    # State and Timestamp
+    # Aggregation: events on the same target are coalesced into one row
+    # ("alice and 213 others liked your Post"). `actor` is the latest actor,
+    # `actor_sample` the ids of the most recent few, newest first.
+    actor_count = models.PositiveIntegerField(default=1)
+    actor_sample = models.JSONField(default=list, blank=True)
+
+    # State and Timestamp (bumped whenever a new actor is coalesced in)
     timestamp = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination key for a recipient's notification list
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_ts_idx'),
+            # Lookup of the open aggregate row for a (recipient, verb, target)
+            models.Index(fields=['recipient', 'verb', 'content_type', 'object_id', '-timestamp'], name='notif_aggregate_key_idx'),
+            # Partial index: only unread rows, so unread counts stay cheap
+            models.Index(fields=['recipient'], condition=models.Q(read=False), name='notif_unread_idx'),
+        ]
+
+    def __str__(self):
+        return self.summary
+
+    @property
+    def summary(self):
+        others = self.actor_count - 1
+        who = self.actor.username
+        if others == 1:
+            who += " and 1 other"
+        elif others > 1:
+            who += f" and {others} others"
+        return f"{who} {self.verb} your {self.target.__class__.__name__}"
+
+class NotificationOutbox(models.Model):
+    # A notification event waiting to be written by the dispatch worker
+    # (see notifications.dispatch). Requests only append here, which is one
+    # cheap INSERT; rows are deleted once the worker has applied them, so
+    # events survive a worker crash and are picked up by the next drain.
+    recipient_id = models.BigIntegerField()
+    actor_id = models.BigIntegerField()
+    verb = models.CharField(max_length=50)
+    content_type_id = models.IntegerField()
+    object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Events that failed to apply are retried by later drains; after
+    # NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS failures `failed_at` is set and the
+    # row is kept (dead-lettered) for inspection instead of retried forever
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
 
     def __str__(self):
-        return f"{self.actor.username} {self.verb} your {self.target.__class__.__name__}"
\ No newline at end of file
+        return f"{self.verb} event for user {self.recipient_id}"
@@ -6,8 +6,27 @@ class NotificationSerializer(serializers.ModelSerializer):
     actor_username = serializers.ReadOnlyField(source='actor.username')
     # Display the type of object that was acted upon (e.g., 'Post', 'User')
     target_type = serializers.CharField(source='target.__class__.__name__', read_only=True)
+    # e.g. "alice and 213 others liked your Post"
+    summary = serializers.CharField(read_only=True)
 
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'actor', 'actor_username', 'verb', 'timestamp', 'read', 'target_type']
-        read_only_fields = ['recipient', 'actor', 'verb', 'timestamp', 'read', 'content_type', 'object_id']
\ No newline at end of file
+        fields = ['id', 'recipient', 'actor', 'actor_username', 'actor_count', 'actor_sample', 'verb', 'summary', 'timestamp', 'read', 'target_type']
+        read_only_fields = ['recipient', 'actor', 'actor_count', 'actor_sample', 'verb', 'timestamp', 'read', 'content_type', 'object_id']
+
+class MarkReadSerializer(serializers.Serializer):
+    # Exactly one way of selecting the notifications to mark as read
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    up_to_id = serializers.IntegerField(required=False)
+    up_to = serializers.DateTimeField(required=False)
+    all = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        chosen = [key for key in ('ids', 'up_to_id', 'up_to') if key in attrs]
+        if attrs.get('all'):
+            chosen.append('all')
+        if len(chosen) != 1:
+            raise serializers.ValidationError(
+                "Provide exactly one of 'ids', 'up_to_id', 'up_to' or 'all': true."
+            )
+        return attrs
@@ -1,3 +1,178 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+
+from .aggregation import record_notification
+from .dispatch import drain_outbox
+from .models import Notification, NotificationOutbox
+from .utils import create_notification
+
+User = get_user_model()
+
+
+class NotificationAggregationTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.likers = [User.objects.create_user(username=f"liker{i}") for i in range(4)]
+        self.post = Post.objects.create(author=self.author, title="Popular", content="...")
+
+    def like(self, user):
+        create_notification(actor=user, recipient=self.author, verb="liked", target=self.post)
+        drain_outbox()
+        return Notification.objects.order_by('-timestamp').first()
+
+    def test_events_on_same_target_are_coalesced(self):
+        for liker in self.likers:
+            self.like(liker)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.actor, self.likers[-1])
+        self.assertEqual(notification.actor_sample, [u.pk for u in reversed(self.likers)])
+        self.assertEqual(notification.summary, "liker3 and 3 others liked your Post")
+
+    def test_repeated_actor_is_not_counted_twice(self):
+        self.like(self.likers[0])
+        self.like(self.likers[0])
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+
+    def test_read_notification_starts_a_new_aggregate(self):
+        self.like(self.likers[0])
+        Notification.objects.update(read=True)
+        self.like(self.likers[1])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(NOTIFICATIONS_AGGREGATION_WINDOW=60)
+    def test_events_outside_window_start_a_new_aggregate(self):
+        first = self.like(self.likers[0])
+        Notification.objects.filter(pk=first.pk).update(timestamp=first.timestamp - timedelta(minutes=5))
+        self.like(self.likers[1])
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationDispatchTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.fan = User.objects.create_user(username="fan")
+        self.client.force_authenticate(self.fan)
+
+    def test_events_are_queued_then_written_by_the_worker(self):
+        post = Post.objects.create(author=self.author, title="Hello", content="...")
+        response = self.client.post(reverse("post-comments", kwargs={"post_pk": post.pk}), {"content": "Nice"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The request only appended to the outbox
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(drain_outbox(), 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(Notification.objects.get().summary, "fan commented your Post")
+
+    @override_settings(NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failing_event_does_not_block_its_batch(self):
+        posts = [Post.objects.create(author=self.author, title=f"Post {i}", content="...") for i in range(3)]
+        for post in posts:
+            create_notification(actor=self.fan, recipient=self.author, verb="liked", target=post)
+        # Queued by a user deleted before the drain
+        ghost = User.objects.create_user(username="ghost")
+        create_notification(actor=ghost, recipient=self.author, verb="liked", target=posts[0])
+        ghost.delete()
+
+        real_record = record_notification
+        broken_post = posts[1]
+
+        def record(recipient_id, verb, content_type_id, object_id, actor_ids):
+            if object_id == broken_post.pk:
+                raise ValueError("storage hiccup")
+            return real_record(recipient_id, verb, content_type_id, object_id, actor_ids)
+
+        with mock.patch("notifications.dispatch.record_notification", side_effect=record):
+            with self.assertLogs("notifications.dispatch", "ERROR"):
+                # Two applied, the ghost's event dropped, one failed
+                self.assertEqual(drain_outbox(), 3)
+            self.assertEqual(set(Notification.objects.values_list("object_id", flat=True)), {posts[0].pk, posts[2].pk})
+            failed = NotificationOutbox.objects.get()
+            self.assertEqual((failed.attempts, failed.failed_at), (1, None))
+            self.assertIn("storage hiccup", failed.last_error)
+
+            # Second failure dead-letters it; later drains skip it
+            with self.assertLogs("notifications.dispatch", "ERROR"):
+                self.assertEqual(drain_outbox(), 0)
+            self.assertIsNotNone(NotificationOutbox.objects.get().failed_at)
+            self.assertEqual(drain_outbox(), 0)
+
+        call_command("drain_notification_outbox", "--retry-failed", stdout=StringIO())
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_repeated_follow_notifies_once(self):
+        follow_url = reverse("follow-user", kwargs={"user_id": self.author.id})
+        unfollow_url = reverse("unfollow-user", kwargs={"user_id": self.author.id})
+        self.client.post(follow_url)
+        drain_outbox()
+        self.client.post(unfollow_url)
+        self.client.post(follow_url)
+        drain_outbox()
+
+        self.assertEqual(Notification.objects.filter(verb="followed").count(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationReadStateTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        actor = User.objects.create_user(username="actor")
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title=f"Post {i}", content="...")
+            create_notification(actor=actor, recipient=self.user, verb="liked", target=post)
+        drain_outbox()
+        self.client.force_authenticate(self.user)
+        self.list_url = reverse("notification-list")
+
+    def unread(self):
+        return self.client.get(reverse("notification-unread-count")).data["unread_count"]
+
+    def test_listing_does_not_mark_read(self):
+        self.client.get(self.list_url)
+        self.assertEqual(self.unread(), 3)
+
+    def test_mark_read_up_to_id(self):
+        oldest = Notification.objects.order_by("pk").first()
+        response = self.client.post(reverse("notification-mark-read"), {"up_to_id": oldest.pk}, format="json")
+        self.assertEqual(response.data, {"marked": 1, "unread_count": 2})
+
+        response = self.client.post(reverse("notification-mark-read"), {"all": True}, format="json")
+        self.assertEqual(response.data["unread_count"], 0)
+
+    def test_mark_read_requires_one_selector(self):
+        response = self.client.post(reverse("notification-mark-read"), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_etag_returns_304_until_something_changes(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(reverse("notification-mark-read"), {"all": True}, format="json")
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_when_an_old_read_notification_is_deleted(self):
+        oldest = Notification.objects.order_by("timestamp").first()
+        Notification.objects.filter(pk=oldest.pk).update(read=True)
+        etag = self.client.get(self.list_url)["ETag"]
+
+        oldest.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import NotificationListView
+from .views import MarkReadView, NotificationListView, UnreadCountView
 
 urlpatterns = [
     # Route for viewing user's notifications
     path('', NotificationListView.as_view(), name='notification-list'),
-]
\ No newline at end of file
+    path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
+    path('mark-read/', MarkReadView.as_view(), name='notification-mark-read'),
+]
@@ -1,26 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from .models import Notification
+from .dispatch import enqueue
 
 User = get_user_model()
 
 def create_notification(actor, recipient, verb, target):
-    """Creates a notification instance."""
+    """Queues a notification; the dispatch worker writes (and aggregates) it."""
     
     # 1. Do not notify if the actor is the recipient
     if actor == recipient:
         return
 
-    # 2. Prevent duplicate notifications for non-unique events (e.g. repeated follows)
-    if verb in ['followed'] and Notification.objects.filter(actor=actor, recipient=recipient, verb=verb).exists():
-        return
-
-    # 3. Create the notification
-    Notification.objects.create(
-        actor=actor,
-        recipient=recipient,
+    # 2. Queue the event. Duplicate follow notifications are dropped by the
+    #    worker, so the request path does no reads at all.
+    enqueue(
+        actor_id=actor.pk,
+        recipient_id=recipient.pk,
         verb=verb,
-        content_type=ContentType.objects.get_for_model(target),
+        content_type_id=ContentType.objects.get_for_model(target).pk,
         object_id=target.pk,
-        target=target
-    )
\ No newline at end of file
+    )
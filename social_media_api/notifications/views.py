@@ -1,16 +1,89 @@
-from rest_framework import generics, permissions
+import hashlib
+
+from django.db.models import Count, Max, Q
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import MarkReadSerializer, NotificationSerializer
+from social_media_api.pagination import OptInKeysetPagination
+from social_media_api.query_planner import QueryPlannerMixin
+
+
+def unread_count(user):
+    # Answered from the partial index on unread rows (notif_unread_idx)
+    return Notification.objects.filter(recipient=user, read=False).count()
+
+
+class NotificationListView(QueryPlannerMixin, generics.ListAPIView):
+    """
+    Read-only: listing no longer marks notifications as read (use mark-read/).
 
-class NotificationListView(generics.ListAPIView):
+    Responses carry an ETag derived from the newest notification, the number
+    of notifications (so deleting an old one changes it too) and the unread
+    count, so polling clients sending If-None-Match get an empty 304 for two
+    index lookups when nothing has changed.
+    """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # ?cursor= switches to keyset pagination for infinite scroll
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
+    query_budget = 8
 
     def get_queryset(self):
         # Retrieve notifications where the current user is the recipient
-        queryset = Notification.objects.filter(recipient=self.request.user)
-        
-        # Optional: Mark notifications as read upon fetching
-        queryset.filter(read=False).update(read=True)
-        
-        return queryset.order_by('-timestamp')
\ No newline at end of file
+        return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp')
+
+    def get_etag(self, request):
+        # Both answered from notif_recipient_ts_idx
+        stats = Notification.objects.filter(recipient=request.user).aggregate(
+            latest=Max('timestamp'), total=Count('id')
+        )
+        latest = stats['latest'] and stats['latest'].isoformat()
+        state = f"{request.user.pk}:{latest}:{stats['total']}:{unread_count(request.user)}:{request.get_full_path()}"
+        return quote_etag(hashlib.md5(state.encode(), usedforsecurity=False).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': unread_count(request.user)})
+
+
+class MarkReadView(APIView):
+    """
+    Explicitly mark notifications as read, in bulk:
+    {"ids": [...]}, {"up_to_id": n}, {"up_to": "<timestamp>"} or {"all": true}.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'ids' in data:
+            selection = Q(pk__in=data['ids'])
+        elif 'up_to_id' in data:
+            selection = Q(pk__lte=data['up_to_id'])
+        elif 'up_to' in data:
+            selection = Q(timestamp__lte=data['up_to'])
+        else:
+            selection = Q()
+
+        marked = (
+            Notification.objects.filter(selection, recipient=request.user, read=False)
+            .update(read=True)
+        )
+        return Response({'marked': marked, 'unread_count': unread_count(request.user)})
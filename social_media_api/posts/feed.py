@@ -0,0 +1,174 @@
+"""
+Materialized home feed.
+
+Posts are pushed into a FeedEntry row per follower when they are created
+(fan-out-on-write), so reading a feed is a single indexed range read by
+recipient instead of an `author__in` scan over every followed account.
+
+Authors whose follower count exceeds FEED_FANOUT_THRESHOLD are skipped on
+write - copying one post into millions of feeds is too expensive - and
+their posts are merged into the feed at read time instead (fan-out-on-read).
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import FeedEntry, Post
+
+BULK_BATCH_SIZE = 1000
+
+
+def fanout_threshold():
+    return getattr(settings, 'FEED_FANOUT_THRESHOLD', 5000)
+
+
+def is_high_fanout(author):
+    """Authors above the threshold are read-time merged rather than fanned out."""
+    return author.follower_count > fanout_threshold()
+
+
+def _bulk_insert(entries):
+    """Insert FeedEntry rows from any iterable, BULK_BATCH_SIZE at a time; returns how many."""
+    entries = iter(entries)
+    written = 0
+    while batch := list(islice(entries, BULK_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def fan_out_post(post):
+    """Copy a newly created post into the feed of every follower of its author."""
+    # Re-read the author: request.user may be a cached or stale instance
+    author = type(post.author).objects.only('follower_count').get(pk=post.author_id)
+    if is_high_fanout(author):
+        return 0
+
+    follower_ids = author.followers.values_list('id', flat=True)
+    return _bulk_insert(
+        FeedEntry(recipient_id=follower_id, post_id=post.pk, author_id=author.pk, created_at=post.created_at)
+        for follower_id in follower_ids.iterator(chunk_size=BULK_BATCH_SIZE)
+    )
+
+
+def backfill_feed(follower, author):
+    """On follow, copy the author's most recent posts into the follower's feed."""
+    if is_high_fanout(author):
+        return 0
+
+    limit = getattr(settings, 'FEED_BACKFILL_LIMIT', 200)
+    recent = author.posts.order_by('-created_at').values_list('id', 'created_at')[:limit]
+    return _bulk_insert(
+        FeedEntry(recipient_id=follower.pk, post_id=post_id, author_id=author.pk, created_at=created_at)
+        for post_id, created_at in recent
+    )
+
+
+def recent_posts_by_author(author_ids, limit=None):
+    """
+    (post_id, author_id, created_at) of the `limit` (default
+    FEED_BACKFILL_LIMIT) newest posts of each fanned-out author in
+    `author_ids`, one windowed query per chunk.
+    """
+    if limit is None:
+        limit = getattr(settings, 'FEED_BACKFILL_LIMIT', 200)
+    author_ids = list(author_ids)
+    for start in range(0, len(author_ids), BULK_BATCH_SIZE):
+        yield from (
+            Post.objects
+            .filter(author_id__in=author_ids[start:start + BULK_BATCH_SIZE],
+                    author__follower_count__lte=fanout_threshold())
+            .annotate(row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(row_number__lte=limit)
+            .values_list('id', 'author_id', 'created_at')
+        )
+
+
+def backfill_feed_from(follower, author_ids):
+    """Bulk follow: backfill from many authors with one windowed query per chunk."""
+    return _bulk_insert(
+        FeedEntry(recipient_id=follower.pk, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in recent_posts_by_author(author_ids)
+    )
+
+
+def materialize_feeds(follows, limit=None):
+    """
+    Write the feed entries of `follows`, (follower_id, author_id) pairs: the
+    `limit` (default FEED_BACKFILL_LIMIT) newest posts of every fanned-out
+    author, fetched with one windowed query per chunk of authors and
+    inserted BULK_BATCH_SIZE rows at a time. Returns how many were written.
+    """
+    following = {}
+    for follower_id, author_id in follows:
+        following.setdefault(follower_id, []).append(author_id)
+
+    recent = {}
+    authors = {author_id for author_ids in following.values() for author_id in author_ids}
+    for post_id, author_id, created_at in recent_posts_by_author(authors, limit):
+        recent.setdefault(author_id, []).append((post_id, created_at))
+
+    return _bulk_insert(
+        FeedEntry(recipient_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for follower_id, author_ids in following.items()
+        for author_id in author_ids
+        for post_id, created_at in recent.get(author_id, ())
+    )
+
+
+def rebuild_feeds(follower_ids, limit=None):
+    """
+    Replace the feeds of `follower_ids` (see materialize_feeds): one query
+    for their follows, one windowed query per chunk of authors. Returns how
+    many entries were written. Run it inside a transaction.
+
+    Like a fresh follow, this keeps only the newest posts of each author:
+    older posts that had been fanned out on write are dropped, and an author
+    who fell back below FEED_FANOUT_THRESHOLD gets just the newest ones back.
+    """
+    Follow = get_user_model().followers.through
+    FeedEntry.objects.filter(recipient_id__in=follower_ids).delete()
+    return materialize_feeds(
+        Follow.objects.filter(to_customuser_id__in=follower_ids).values_list('to_customuser_id', 'from_customuser_id'),
+        limit,
+    )
+
+
+def prune_feed(follower, author):
+    """On unfollow, drop the author's posts from the follower's feed."""
+    deleted, _ = FeedEntry.objects.filter(recipient=follower, author=author).delete()
+    return deleted
+
+
+def feed_queryset(user):
+    """
+    Posts for the user's home feed, newest first.
+
+    Ordered by `feed_created_at`, which is FeedEntry.created_at for
+    materialized posts, so the common case is a range read of the
+    (recipient, -created_at) index rather than a sort of the whole feed.
+    """
+    pulled_author_ids = list(
+        user.following.filter(follower_count__gt=fanout_threshold()).values_list('id', flat=True)
+    )
+
+    if not pulled_author_ids:
+        # Common case: everything the user follows was fanned out on write
+        queryset = Post.objects.filter(feed_entries__recipient=user).annotate(
+            feed_created_at=F('feed_entries__created_at')
+        )
+    else:
+        # Hybrid: materialized entries plus posts pulled from high-fanout authors
+        materialized = FeedEntry.objects.filter(recipient=user).values('post_id')
+        queryset = Post.objects.filter(Q(pk__in=materialized) | Q(author_id__in=pulled_author_ids)).annotate(
+            feed_created_at=F('created_at')
+        )
+
+    return queryset.order_by('-feed_created_at', '-id')
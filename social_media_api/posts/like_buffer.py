@@ -0,0 +1,219 @@
+"""
+Write-behind buffer for like/unlike requests.
+
+With POSTS_LIKE_WRITE_BEHIND enabled the like views no longer write per
+request. They record the user's intent here and answer immediately; a
+background thread flushes the buffer every POSTS_LIKE_FLUSH_INTERVAL
+seconds (or as soon as POSTS_LIKE_BATCH_SIZE intents are waiting) with one
+`bulk_create`, one delete and one counter UPDATE per distinct delta, so a
+like storm on a hot post becomes a handful of writes.
+
+Intents are coalesced per (user, post) - the last one wins - which keeps
+the one-like-per-user rule: the views consult the pending intent before
+the database when deciding whether a post is already liked.
+
+The buffer is per process and lives in memory: intents not yet flushed are
+lost if the process is killed (a clean shutdown flushes them). A batch stays
+visible to the views until its transaction commits, and a batch that fails
+to write is put back in the buffer for the next flush; after
+POSTS_LIKE_FLUSH_MAX_ATTEMPTS failures in a row it is dead-lettered (logged
+with its intents and dropped) instead of retried forever. `like_count`
+only moves by the likes a flush actually inserted or deleted, so flushes
+running concurrently in several processes do not over-count it.
+
+Like notifications go through the notification outbox with the rest of the
+flush, so they are written by the dispatcher, aggregated per post.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+
+from notifications.dispatch import enqueue_many
+
+from .models import Like, Post
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled():
+    return getattr(settings, 'POSTS_LIKE_WRITE_BEHIND', False)
+
+
+class LikeBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # (user_id, post_id) -> True for like, False for unlike
+        self._flushing = {}  # The batch being written, until its transaction commits
+        self._failures = 0
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def pending_state(self, user_id, post_id):
+        """True/False if an unflushed like/unlike is waiting, None otherwise."""
+        key = (user_id, post_id)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self._flushing.get(key)
+
+    def record(self, user_id, post_id, liked):
+        with self._lock:
+            self._pending[(user_id, post_id)] = liked
+            full = len(self._pending) >= getattr(settings, 'POSTS_LIKE_BATCH_SIZE', 500)
+        self._ensure_worker()
+        if full:
+            self._wakeup.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Apply every pending intent to the database; returns the number applied."""
+        with self._flush_lock:
+            with self._lock:
+                intents, self._pending = self._pending, {}
+                self._flushing = intents
+            if not intents:
+                return 0
+            try:
+                apply_intents(intents)
+            except Exception:
+                self._failed(intents)
+                raise
+            with self._lock:
+                self._flushing = {}
+            self._failures = 0
+            return len(intents)
+
+    def _failed(self, intents):
+        """Put a batch that could not be written back, or dead-letter it."""
+        self._failures += 1
+        dead = self._failures >= getattr(settings, 'POSTS_LIKE_FLUSH_MAX_ATTEMPTS', 5)
+        with self._lock:
+            self._flushing = {}
+            if not dead:
+                for key, liked in intents.items():
+                    # An intent recorded since the drain is newer and wins
+                    self._pending.setdefault(key, liked)
+        if dead:
+            self._failures = 0
+            logger.error(
+                "Dropping %d like intent(s) after %d failed flushes: %r",
+                len(intents), getattr(settings, 'POSTS_LIKE_FLUSH_MAX_ATTEMPTS', 5), intents,
+            )
+
+    # --- background worker ---
+
+    def _ensure_worker(self):
+        interval = getattr(settings, 'POSTS_LIKE_FLUSH_INTERVAL', 1.0)
+        if not interval or (self._worker is not None and self._worker.is_alive()):
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, args=(interval,), name='like-buffer', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self, interval):
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing the like buffer failed")
+
+
+def _pairs_filter(pairs):
+    """Q matching exactly the given (user_id, post_id) pairs."""
+    return reduce(or_, (Q(user_id=user_id, post_id=post_id) for user_id, post_id in pairs))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_likes(pairs, batch_size):
+    """Insert likes for `pairs`; returns the pairs actually inserted."""
+    inserted = []
+    for chunk in _chunks(pairs, batch_size):
+        try:
+            with transaction.atomic():
+                Like.objects.bulk_create([Like(user_id=user_id, post_id=post_id) for user_id, post_id in chunk])
+            inserted.extend(chunk)
+        except IntegrityError:
+            # Some were liked by another writer since `existing` was read; skip those
+            for user_id, post_id in chunk:
+                try:
+                    with transaction.atomic():
+                        Like.objects.create(user_id=user_id, post_id=post_id)
+                except IntegrityError:
+                    continue
+                inserted.append((user_id, post_id))
+    return inserted
+
+
+def apply_intents(intents):
+    """Write a batch of coalesced {(user_id, post_id): liked} intents."""
+    batch_size = getattr(settings, 'POSTS_LIKE_BATCH_SIZE', 500)
+    post_ids = {post_id for _, post_id in intents}
+
+    with transaction.atomic():
+        # Posts and users deleted since the intent was recorded are dropped
+        post_authors = dict(Post.objects.filter(pk__in=post_ids).values_list('id', 'author_id'))
+        user_ids = set(
+            get_user_model().objects.filter(pk__in={user_id for user_id, _ in intents}).values_list('pk', flat=True)
+        )
+        keys = [key for key in intents if key[1] in post_authors and key[0] in user_ids]
+        # Locked, so a concurrent flush cannot delete a like this one counts as removed
+        existing = set()
+        for chunk in _chunks(keys, batch_size):
+            existing.update(
+                Like.objects.select_for_update().filter(_pairs_filter(chunk)).values_list('user_id', 'post_id')
+            )
+
+        added = _insert_likes(
+            [key for key in keys if intents[key] and key not in existing], batch_size
+        )
+        removed = [key for key in keys if not intents[key] and key in existing]
+        for chunk in _chunks(removed, batch_size):
+            Like.objects.filter(_pairs_filter(chunk)).delete()
+
+        # Group posts by net change so each distinct delta is one UPDATE
+        deltas = Counter()
+        for _, post_id in added:
+            deltas[post_id] += 1
+        for _, post_id in removed:
+            deltas[post_id] -= 1
+        posts_by_delta = defaultdict(list)
+        for post_id, delta in deltas.items():
+            if delta:
+                posts_by_delta[delta].append(post_id)
+        for delta, ids in posts_by_delta.items():
+            Post.objects.filter(pk__in=ids).update(like_count=F('like_count') + delta)
+
+        # NOTIFICATION: queued in the outbox; the dispatcher aggregates them per post
+        post_type_id = ContentType.objects.get_for_model(Post).pk
+        enqueue_many([
+            dict(actor_id=user_id, recipient_id=post_authors[post_id], verb="liked",
+                 content_type_id=post_type_id, object_id=post_id)
+            for user_id, post_id in added
+        ])
+
+like_buffer = LikeBuffer()
+# Flush whatever is still buffered when the process exits cleanly
+atexit.register(like_buffer.flush)
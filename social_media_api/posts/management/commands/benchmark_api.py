@@ -0,0 +1,139 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from social_media_api.benchmark import (
+    SCENARIOS, ClientTransport, HttpTransport, Workload, compare, load_actors,
+    load_baselines, run_scenario, save_baseline,
+)
+from social_media_api.seeding import seed_social
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic social graph and measure throughput and latency of the feed, "
+        "post, like, follow and notification endpoints. In-process runs use a throwaway "
+        "test database; --target benchmarks a running server against the configured one."
+    )
+
+    def add_arguments(self, parser):
+        seeding = parser.add_argument_group('seeding')
+        seeding.add_argument('--users', type=int, default=1000, help="Users to create (default: 1000).")
+        seeding.add_argument('--follows', type=int, default=20, help="Average accounts followed per user (default: 20).")
+        seeding.add_argument('--posts', type=int, default=5, help="Average posts per user (default: 5).")
+        seeding.add_argument('--likes', type=int, default=5, help="Average likes per post (default: 5).")
+        seeding.add_argument('--comments', type=int, default=1, help="Average comments per post (default: 1).")
+        seeding.add_argument('--zipf', type=float, default=1.1, dest='zipf_exponent',
+                             help="Exponent of the follower distribution; higher is more skewed (default: 1.1).")
+        seeding.add_argument('--seed', type=int, default=42, help="Random seed for data and request mix (default: 42).")
+        seeding.add_argument('--workers', type=int, default=1, help="Seeding processes (default: 1; ignored on SQLite).")
+
+        running = parser.add_argument_group('running')
+        running.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                             help="Scenario to run (repeatable; default: all).")
+        running.add_argument('--operations', type=int, default=200, help="Timed operations per scenario (default: 200).")
+        running.add_argument('--warmup', type=int, default=20, help="Untimed operations per scenario first (default: 20).")
+        running.add_argument('--actors', type=int, default=50, help="Distinct users issuing requests (default: 50).")
+        running.add_argument('--target', help="Base URL of a running server, e.g. http://127.0.0.1:8000.")
+        running.add_argument('--concurrency', type=int, default=4, help="Client threads with --target (default: 4).")
+        running.add_argument('--seed-target', action='store_true',
+                             help="With --target, seed the configured database first (it must be the server's).")
+
+        baselines = parser.add_argument_group('baselines')
+        baselines.add_argument('--save-baseline', metavar='NAME', help="Store the results under NAME.")
+        baselines.add_argument('--compare', metavar='NAME', help="Compare the results with baseline NAME.")
+        baselines.add_argument('--max-regression', type=float, metavar='PERCENT',
+                               help="With --compare, fail if any p50 grew by more than PERCENT.")
+
+    def handle(self, *args, **options):
+        if options['compare'] and options['compare'] not in load_baselines():
+            raise CommandError(f"No baseline named {options['compare']!r}.")
+
+        if options['target']:
+            if options['seed_target']:
+                self.seed(options)
+            results = self.run(HttpTransport(options['target'], options['concurrency']), options)
+        else:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self.seed(options)
+                # Drain notifications inline: a background thread would outlive the throwaway database
+                with override_settings(NOTIFICATIONS_DISPATCH_BACKEND='sync'):
+                    results = self.run(ClientTransport(), options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results, options)
+
+    def seed(self, options):
+        seed_social(
+            users=options['users'], follows=options['follows'], posts=options['posts'],
+            likes=options['likes'], comments=options['comments'], zipf_exponent=options['zipf_exponent'],
+            seed=options['seed'], workers=options['workers'], stdout=self.stdout,
+        )
+
+    def run(self, transport, options):
+        rng = random.Random(options['seed'])
+        actors = load_actors(options['actors'], rng)
+        if not actors:
+            raise CommandError("No seeded users found; pass --seed-target to create them.")
+        workload = Workload(actors, rng)
+        return {
+            scenario: run_scenario(transport, workload, scenario, options['operations'], options['warmup'])
+            for scenario in options['scenarios'] or SCENARIOS
+        }
+
+    def report(self, results, options):
+        self.stdout.write(
+            f"\n{'scenario':<17}{'ops':>6}{'errors':>8}{'ops/s':>9}"
+            f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'queries':>9}"
+        )
+        for scenario, row in results.items():
+            queries = '-' if row['queries_per_op'] is None else f"{row['queries_per_op']:.1f}"
+            self.stdout.write(
+                f"{scenario:<17}{row['operations']:>6}{row['errors']:>8}{row['ops_per_sec']:>9.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p90_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['max_ms']:>9.2f}{queries:>9}"
+            )
+
+        params = {
+            key: options[key] for key in (
+                'users', 'follows', 'posts', 'likes', 'comments', 'zipf_exponent', 'seed',
+                'operations', 'actors', 'target', 'concurrency',
+            )
+        }
+
+        if options['compare']:
+            baseline = load_baselines()[options['compare']]
+            if baseline['params'] != params:
+                self.stdout.write(self.style.WARNING(
+                    "Baseline was recorded with different parameters; the comparison is approximate."
+                ))
+            changes = compare(results, baseline)
+            self.stdout.write(
+                f"\nCompared with {options['compare']!r} (commit {baseline['commit'] or '?'}):"
+                f"\n{'scenario':<17}{'ops/s':>9}{'p50':>9}{'p99':>9}"
+            )
+            for scenario, change in changes.items():
+                self.stdout.write(
+                    f"{scenario:<17}" + ''.join(
+                        f"{change[metric]:>+8.1f}%" if metric in change else f"{'-':>9}"
+                        for metric in ('ops_per_sec', 'p50_ms', 'p99_ms')
+                    )
+                )
+
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], params, results)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline {options['save_baseline']!r}."))
+
+        if options['compare'] and options['max_regression'] is not None:
+            regressed = sorted(
+                scenario for scenario, change in changes.items()
+                if change.get('p50_ms', 0) > options['max_regression']
+            )
+            if regressed:
+                raise CommandError(
+                    f"p50 latency regressed more than {options['max_regression']}% in: {', '.join(regressed)}"
+                )
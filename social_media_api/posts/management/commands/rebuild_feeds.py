@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feed import rebuild_feeds
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild materialized home feeds from the follow graph (e.g. after changing FEED_FANOUT_THRESHOLD). "
+        "As on a fresh follow, each feed gets only the newest FEED_BACKFILL_LIMIT posts per fanned-out "
+        "author: older fanned-out posts are dropped, including those of authors who fell back below "
+        "the threshold. Pass a larger --backfill-limit to keep more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="Only rebuild the feed of this user id (repeatable).")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Feeds rebuilt per query batch and transaction (default: 500).")
+        parser.add_argument('--backfill-limit', type=int,
+                            help="Newest posts kept per followed author (default: FEED_BACKFILL_LIMIT).")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+        user_ids = list(users.values_list('pk', flat=True))
+
+        entries = 0
+        for start in range(0, len(user_ids), options['chunk_size']):
+            with transaction.atomic():
+                entries += rebuild_feeds(user_ids[start:start + options['chunk_size']], options['backfill_limit'])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(user_ids)} feed(s) with {entries} entries."))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Like, Post
+
+
+def _count_subquery(model):
+    return Coalesce(Subquery(
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(n=Count('pk'))
+        .values('n')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Recount Post.like_count and Post.comment_count from the Like and Comment tables, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Posts examined per transaction (default: 1000).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report drifted posts without fixing them.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        examined = fixed = 0
+        last_pk = 0
+
+        while True:
+            # Walk the table by primary key so each batch is an index range scan
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .annotate(actual_likes=_count_subquery(Like), actual_comments=_count_subquery(Comment))
+                .only('pk', 'like_count', 'comment_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            examined += len(batch)
+
+            drifted = [
+                post for post in batch
+                if post.like_count != post.actual_likes or post.comment_count != post.actual_comments
+            ]
+            if drifted and not options['dry_run']:
+                # One UPDATE per batch; the counts are recomputed inside the
+                # statement so concurrent F() increments are not overwritten
+                Post.objects.filter(pk__in=[post.pk for post in drifted]).update(
+                    like_count=_count_subquery(Like),
+                    comment_count=_count_subquery(Comment),
+                )
+            fixed += len(drifted)
+
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"Examined {examined} post(s). {verb} {fixed} with drifted counters."))
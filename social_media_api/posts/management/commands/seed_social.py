@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from social_media_api.seeding import DEFAULT_CHUNK_SIZE, seed_social
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, follow edges, posts, likes, comments and notifications in bulk "
+        "for performance environments, then build counters, feeds and the search index. "
+        "Adds to the existing data; the same --seed and --chunk-size give the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users to create (default: 1000).")
+        parser.add_argument('--follows', type=int, default=20, help="Average accounts followed per user (default: 20).")
+        parser.add_argument('--posts', type=int, default=5, help="Average posts per user (default: 5).")
+        parser.add_argument('--likes', type=int, default=5, help="Average likes per post (default: 5).")
+        parser.add_argument('--comments', type=int, default=1, help="Average comments per post (default: 1).")
+        parser.add_argument('--zipf', type=float, default=1.1, dest='zipf_exponent',
+                            help="Exponent of the follower distribution; higher is more skewed (default: 1.1).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42).")
+        parser.add_argument('--password', default='password', help="Password of every generated user (default: password).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f"Approximate rows per transaction (default: {DEFAULT_CHUNK_SIZE}).")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Processes generating chunks in parallel (default: 1; ignored on SQLite).")
+
+    def handle(self, *args, **options):
+        counts = seed_social(
+            users=options['users'], follows=options['follows'], posts=options['posts'],
+            likes=options['likes'], comments=options['comments'], zipf_exponent=options['zipf_exponent'],
+            seed=options['seed'], password=options['password'], chunk_size=options['chunk_size'],
+            workers=options['workers'], stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{rows:,} {name.replace('_', ' ')}" for name, rows in counts.items()) + "."
+        ))
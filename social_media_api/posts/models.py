@@ -17,8 +17,19 @@ class Post(models.Model):
     # Optional: image field (as suggested in previous steps)
     image = models.ImageField(upload_to='post_images/', blank=True, null=True)
 
+    # Denormalized counters, updated with F() expressions by the like and
+    # comment views so list responses never COUNT(*) per post.
+    # `manage.py reconcile_post_counters` repairs any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at'] # Default ordering: newest first
+        indexes = [
+            # Keyset pagination keys for /posts/ and high-fanout authors in the feed
+            models.Index(fields=['-created_at', '-id'], name='posts_post_created_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_created_idx'),
+        ]
 
     def __str__(self):
         return self.title[:50]
@@ -40,6 +51,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at'] # Default ordering: oldest first
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='posts_comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title[:20]}"
@@ -63,4 +77,38 @@ class Like(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.user.username} likes {self.post.title[:20]}"
\ No newline at end of file
+        return f"{self.user.username} likes {self.post.title[:20]}"
+
+class FeedEntry(models.Model):
+    # One row per (follower, post): the materialized home feed.
+    # Written when a post is created (fan-out-on-write) and when a follow
+    # backfills an author's recent posts, so reading a feed is a single
+    # range scan over the (recipient, created_at) index.
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    # Copied from the post so unfollow can prune without joining posts
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField() # Copied from post.created_at
+
+    class Meta:
+        unique_together = ('recipient', 'post')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='posts_feed_recipient_idx'),
+            models.Index(fields=['recipient', 'author'], name='posts_feed_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in feed of user {self.recipient_id}"
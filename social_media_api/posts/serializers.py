@@ -19,10 +19,11 @@ class PostSerializer(serializers.ModelSerializer):
     # Read-only field to display the author's username
     author_username = serializers.ReadOnlyField(source='author.username')
     
-    # Nested field to display all comments when viewing a single post
-    comments = CommentSerializer(many=True, read_only=True) 
+    # Only the most recent comments are embedded (prefetched by the views as
+    # `recent_comments`); the full list is paginated at /posts/<id>/comments/
+    comments = CommentSerializer(source='recent_comments', many=True, read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'author_username', 'title', 'content', 'image', 'created_at', 'updated_at', 'comments']
-        read_only_fields = ['author'] # Author is set automatically in the view
\ No newline at end of file
+        fields = ['id', 'author', 'author_username', 'title', 'content', 'image', 'created_at', 'updated_at', 'like_count', 'comment_count', 'comments']
+        read_only_fields = ['author', 'like_count', 'comment_count'] # Author is set automatically in the view
\ No newline at end of file
@@ -1,3 +1,498 @@
-from django.test import TestCase
+import random
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from notifications.dispatch import drain_outbox
+from notifications.models import Notification
+from social_media_api.benchmark import SCENARIOS, ClientTransport, Workload, load_actors, percentile, run_scenario
+from social_media_api.seeding import Follow, seed_social
+from social_media_api.testing import QueryCountAssertionsMixin
+
+from .feed import feed_queryset, rebuild_feeds
+from .like_buffer import _insert_likes, apply_intents, like_buffer
+from .models import Comment, FeedEntry, Like, Post
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedTestCase(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader", password="testpass")
+        self.author = User.objects.create_user(username="author", password="testpass")
+        self.stranger = User.objects.create_user(username="stranger", password="testpass")
+        self.feed_url = reverse("user-feed")
+
+    def follow(self, user, target):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse("follow-user", kwargs={"user_id": target.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def create_post(self, user, title):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse("post-list"), {"title": title, "content": "..."})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=response.data["id"])
+
+    def feed_titles(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.follow(self.reader, self.author)
+        post = self.create_post(self.author, "Fresh")
+        self.create_post(self.stranger, "Unrelated")
+
+        self.assertTrue(FeedEntry.objects.filter(recipient=self.reader, post=post).exists())
+        self.assertEqual(self.feed_titles(self.reader), ["Fresh"])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        self.create_post(self.author, "Older")
+        self.create_post(self.author, "Newer")
+
+        self.follow(self.reader, self.author)
+        self.assertEqual(self.feed_titles(self.reader), ["Newer", "Older"])
+
+        self.client.force_authenticate(self.reader)
+        self.client.post(reverse("unfollow-user", kwargs={"user_id": self.author.id}))
+        self.assertEqual(self.feed_titles(self.reader), [])
+        self.assertFalse(FeedEntry.objects.filter(recipient=self.reader).exists())
+
+    def test_follow_updates_follower_count(self):
+        self.follow(self.reader, self.author)
+        self.follow(self.stranger, self.author)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 2)
+
+    @override_settings(FEED_FANOUT_THRESHOLD=0)
+    def test_high_fanout_author_is_merged_at_read_time(self):
+        self.follow(self.reader, self.author)
+        self.follow(self.reader, self.stranger)
+        self.create_post(self.author, "Celebrity post")
+
+        # Over the threshold: nothing written, but the post still shows up
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_titles(self.reader), ["Celebrity post"])
+
+    def test_rebuild_feeds_batches_queries(self):
+        followers = [self.reader, self.stranger] + [
+            User.objects.create_user(username=f"fan{i}") for i in range(8)
+        ]
+        for follower in followers:
+            self.follow(follower, self.author)
+        for title in ("First", "Second", "Third"):
+            self.create_post(self.author, title)
+        FeedEntry.objects.filter(recipient=self.reader).delete()
+        stale = self.create_post(self.reader, "Unfollowed")
+        FeedEntry.objects.create(recipient=self.stranger, post=stale, author=self.reader, created_at=stale.created_at)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("rebuild_feeds", "--backfill-limit", "2", stdout=StringIO())
+        # Users, then per chunk: follows, newest posts, delete, insert (+ savepoint pair)
+        self.assertLessEqual(len(queries), 7)
+        for follower in followers:
+            self.assertEqual(self.feed_titles(follower), ["Third", "Second"])
+
+    def test_rebuild_feeds_inserts_in_bounded_batches(self):
+        followers = [self.reader, self.stranger]
+        for follower in followers:
+            self.follow(follower, self.author)
+        for title in ("First", "Second", "Third"):
+            self.create_post(self.author, title)
+        ids = [follower.pk for follower in followers]
+
+        with mock.patch("posts.feed.BULK_BATCH_SIZE", 2), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(rebuild_feeds(ids), 6)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT") and "posts_feedentry" in q["sql"]]
+        self.assertEqual(len(inserts), 3)
+
+        # An explicit limit of 0 keeps nothing rather than falling back to the default
+        self.assertEqual(rebuild_feeds(ids, limit=0), 0)
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_feed_is_ordered_by_feed_entries(self):
+        self.follow(self.reader, self.author)
+        queryset = feed_queryset(self.reader)
+        self.assertIn('"posts_feedentry"."created_at" AS "feed_created_at"', str(queryset.query))
+        self.assertEqual(queryset.query.order_by[0], "-feed_created_at")
+
+        for title in ("First", "Second", "Third"):
+            self.create_post(self.author, title)
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(self.feed_url, {"cursor": "", "page_size": 2})
+        titles = [item["title"] for item in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        titles += [item["title"] for item in response.data["results"]]
+        self.assertEqual(titles, ["Third", "Second", "First"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpass")
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"Post {i}", content="...") for i in range(5)
+        ]
+        # Identical timestamps force the id tie-breaker to do its job
+        Post.objects.update(created_at=timezone.now())
+
+    def test_cursor_walks_every_row_once_without_counting(self):
+        seen = []
+        url = reverse("post-list") + "?cursor=&page_size=2"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn("count", response.data)
+                seen.extend(item["id"] for item in response.data["results"])
+                url = response.data["next"]
+
+        self.assertEqual(seen, sorted((p.id for p in self.posts), reverse=True))
+        self.assertFalse(any("COUNT(" in q["sql"].upper() for q in queries.captured_queries))
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse("post-list"))
+        self.assertEqual(response.data["count"], 5)
+
+    def test_page_size_in_page_number_mode(self):
+        response = self.client.get(reverse("post-list"), {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(reverse("post-list"), {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_ordering_is_rejected_in_keyset_mode(self):
+        response = self.client.get(reverse("post-list"), {"cursor": "", "ordering": "title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", response.data)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse("post-list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryPlanTestCase(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader", password="testpass")
+        self.client.force_authenticate(self.reader)
+        self.add_posts(2)
+
+    def add_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f"author{User.objects.count()}")
+            post = Post.objects.create(author=author, title=f"Post {i}", content="...")
+            FeedEntry.objects.create(recipient=self.reader, post=post, author=author, created_at=post.created_at)
+            for j in range(3):
+                commenter = User.objects.create_user(username=f"commenter{User.objects.count()}")
+                Comment.objects.create(post=post, author=commenter, content=f"Comment {j}")
+
+    def test_post_list_queries_do_not_scale(self):
+        self.assertQueriesDoNotScale(reverse("post-list"), lambda: self.add_posts(4))
+
+    def test_feed_queries_do_not_scale(self):
+        self.assertQueriesDoNotScale(reverse("user-feed"), lambda: self.add_posts(4), cursor="")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POSTS_COMMENT_PREVIEW_SIZE=2)
+class CommentPreviewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpass")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Viral", content="...")
+        self.comments_url = reverse("post-comments", kwargs={"post_pk": self.post.pk})
+        for i in range(5):
+            response = self.client.post(self.comments_url, {"content": f"Comment {i}"})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_list_embeds_only_most_recent_comments(self):
+        response = self.client.get(reverse("post-list"))
+        item = response.data["results"][0]
+        self.assertEqual(item["comment_count"], 5)
+        self.assertEqual([c["content"] for c in item["comments"]], ["Comment 3", "Comment 4"])
+
+    def test_comments_endpoint_is_cursor_paginated(self):
+        seen = []
+        url = self.comments_url + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            seen.extend(c["content"] for c in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, [f"Comment {i}" for i in range(5)])
+
+    def test_deleting_comment_decrements_count(self):
+        comment = Comment.objects.filter(post=self.post).first()
+        response = self.client.delete(reverse("comment-detail", kwargs={"pk": comment.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 4)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LikeCounterTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="testpass")
+        self.fan = User.objects.create_user(username="fan", password="testpass")
+        self.post = Post.objects.create(author=self.author, title="Likeable", content="...")
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_unlike_update_counter(self):
+        like_url = reverse("post-like", kwargs={"pk": self.post.pk})
+        self.assertEqual(self.client.post(like_url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(like_url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        self.client.post(reverse("post-unlike", kwargs={"pk": self.post.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        Like.objects.create(user=self.fan, post=self.post)
+        Comment.objects.create(post=self.post, author=self.fan, content="Hi")
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=0)
+
+        call_command("reconcile_post_counters", batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POSTS_LIKE_WRITE_BEHIND=True, POSTS_LIKE_FLUSH_INTERVAL=0)
+class WriteBehindLikeTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="testpass")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="testpass") for i in range(3)]
+        self.post = Post.objects.create(author=self.author, title="Hot", content="...")
+        self.like_url = reverse("post-like", kwargs={"pk": self.post.pk})
+        self.unlike_url = reverse("post-unlike", kwargs={"pk": self.post.pk})
+        self.addCleanup(like_buffer.flush)
+
+    def test_likes_are_buffered_then_flushed_in_one_batch(self):
+        for fan in self.fans:
+            self.client.force_authenticate(fan)
+            self.assertEqual(self.client.post(self.like_url).status_code, status.HTTP_201_CREATED)
+        # Still one like per user while the intent is only buffered
+        self.assertEqual(self.client.post(self.like_url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Like.objects.exists())
+
+        self.assertEqual(like_buffer.flush(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 3)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 3)
+        # Three likes, queued in the outbox and written as one aggregated notification
+        self.assertFalse(Notification.objects.exists())
+        drain_outbox()
+        notification = Notification.objects.get(recipient=self.author, verb="liked")
+        self.assertEqual(notification.actor_count, 3)
+
+    def test_like_then_unlike_before_flush_writes_nothing(self):
+        self.client.force_authenticate(self.fans[0])
+        self.client.post(self.like_url)
+        self.assertEqual(self.client.post(self.unlike_url).status_code, status.HTTP_200_OK)
+
+        like_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertFalse(Like.objects.exists())
+
+    def test_flush_counts_only_likes_it_inserts(self):
+        other = Post.objects.create(author=self.author, title="Other", content="...")
+        Like.objects.create(user=self.fans[0], post=self.post)
+        Like.objects.create(user=self.fans[1], post=other)
+        Post.objects.filter(pk=self.post.pk).update(like_count=1)
+
+        apply_intents({
+            (self.fans[0].pk, self.post.pk): True,  # already liked
+            (self.fans[1].pk, self.post.pk): True,
+            (self.fans[2].pk, other.pk): False,  # never liked
+        })
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.like_count, other.like_count), (2, 0))
+        self.assertEqual(Like.objects.filter(post=other).count(), 1)
+        drain_outbox()
+        notification = Notification.objects.get(recipient=self.author, verb="liked")
+        self.assertEqual(notification.actor_count, 1)
+
+    def test_likes_inserted_concurrently_are_not_counted(self):
+        # A like written by another process after the flush read the existing likes
+        Like.objects.create(user=self.fans[0], post=self.post)
+        pairs = [(fan.pk, self.post.pk) for fan in self.fans]
+        self.assertEqual(_insert_likes(pairs, batch_size=10), pairs[1:])
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 3)
+
+    def test_failed_flush_is_retried(self):
+        self.client.force_authenticate(self.fans[0])
+        self.client.post(self.like_url)
+        with mock.patch("posts.like_buffer.apply_intents", side_effect=DatabaseError("down")):
+            with self.assertRaises(DatabaseError):
+                like_buffer.flush()
+        # The batch is back in the buffer and still answers for the user
+        self.assertEqual(len(like_buffer), 1)
+        self.assertEqual(self.client.post(self.like_url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertTrue(Like.objects.filter(user=self.fans[0], post=self.post).exists())
+
+    def test_intent_recorded_during_a_failed_flush_wins(self):
+        key = (self.fans[0].pk, self.post.pk)
+        like_buffer.record(*key, liked=True)
+
+        def unlike_then_fail(intents):
+            like_buffer.record(*key, liked=False)
+            raise DatabaseError("down")
+
+        with mock.patch("posts.like_buffer.apply_intents", side_effect=unlike_then_fail):
+            with self.assertRaises(DatabaseError):
+                like_buffer.flush()
+        self.assertIs(like_buffer.pending_state(*key), False)
+
+    def test_batch_being_flushed_is_still_pending(self):
+        self.client.force_authenticate(self.fans[0])
+        self.client.post(self.like_url)
+        responses = []
+
+        def unlike_mid_flush(intents):
+            # Drained but not yet committed: the like must still count as made
+            responses.append(self.client.post(self.unlike_url))
+            apply_intents(intents)
+
+        with mock.patch("posts.like_buffer.apply_intents", side_effect=unlike_mid_flush):
+            like_buffer.flush()
+        self.assertEqual(responses[0].status_code, status.HTTP_200_OK)
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+
+    @override_settings(POSTS_LIKE_FLUSH_MAX_ATTEMPTS=2)
+    def test_batch_is_dead_lettered_after_max_attempts(self):
+        like_buffer.record(self.fans[0].pk, self.post.pk, liked=True)
+        with mock.patch("posts.like_buffer.apply_intents", side_effect=DatabaseError("down")):
+            with self.assertRaises(DatabaseError):
+                like_buffer.flush()
+            self.assertEqual(len(like_buffer), 1)
+            with self.assertLogs("posts.like_buffer", "ERROR"), self.assertRaises(DatabaseError):
+                like_buffer.flush()
+        self.assertEqual(len(like_buffer), 0)
+
+    def test_intents_of_deleted_users_are_dropped(self):
+        key = (self.fans[0].pk, self.post.pk)
+        self.fans[0].delete()
+        apply_intents({key: True, (self.fans[1].pk, self.post.pk): True})
+        self.assertEqual(list(Like.objects.values_list("user_id", flat=True)), [self.fans[1].pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpass")
+        self.client.force_authenticate(self.user)
+        self.body_only = Post.objects.create(author=self.user, title="Weekend notes", content="Some django tips")
+        self.in_title = Post.objects.create(author=self.user, title="Django tips", content="Views and models")
+        Post.objects.create(author=self.user, title="Gardening", content="Tomatoes")
+
+    def search(self, query):
+        response = self.client.get(reverse("post-list"), {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_results_are_ranked_and_prefix_matched(self):
+        self.assertEqual(self.search("djan"), [self.in_title.id, self.body_only.id])
+        self.assertEqual(self.search("django views"), [self.in_title.id])
+        self.assertEqual(self.search('"unbalanced AND ('), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = "Flask tips"
+        self.in_title.content = "Routes"
+        self.in_title.save()
+        self.body_only.delete()
+        self.assertEqual(self.search("django"), [])
+        self.assertEqual(self.search("flask"), [self.in_title.id])
+
+    def test_rebuild_command_indexes_bulk_loaded_posts(self):
+        Post.objects.bulk_create([Post(author=self.user, title="Bulk loaded", content="...")])
+        self.assertEqual(self.search("bulk"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.search("bulk")), 1)
+
+
+class SeedSocialTestCase(APITestCase):
+    def graph(self):
+        """The seeded data relative to the first seeded ids, to compare two runs."""
+        first_user = User.objects.order_by('pk').first().pk
+        first_post = Post.objects.order_by('pk').first().pk
+        return (
+            sorted((a - first_user, b - first_user) for a, b in Follow.objects.values_list('from_customuser', 'to_customuser')),
+            sorted((p - first_post, a - first_user) for p, a in Post.objects.values_list('pk', 'author')),
+            sorted((u - first_user, p - first_post) for u, p in Like.objects.values_list('user', 'post')),
+        )
+
+    def test_seeded_graph_is_consistent(self):
+        counts = seed_social(users=30, follows=5, posts=2, likes=3, comments=1, seed=7, chunk_size=20)
+
+        self.assertEqual(User.objects.count(), counts['users'])
+        self.assertEqual(Follow.objects.count(), counts['follows'])
+        self.assertEqual(Like.objects.count(), counts['likes'])
+        self.assertTrue(User.objects.first().check_password('password'))
+        # Counters, feeds and notifications are derived from the bulk-loaded rows
+        popular = User.objects.order_by('-follower_count').first()
+        self.assertEqual(popular.follower_count, popular.followers.count())
+        post = Post.objects.filter(like_count__gt=0).first()
+        self.assertEqual(post.like_count, post.likes.count())
+        self.assertEqual(FeedEntry.objects.count(), counts['feed_entries'])
+        liked = Notification.objects.get(verb='liked', recipient=post.author, object_id=post.pk)
+        self.assertEqual(liked.actor_count, post.like_count)
+        # New rows after seeding get fresh ids
+        self.assertGreater(User.objects.create_user('late').pk, popular.pk)
+
+    def test_same_seed_gives_the_same_data(self):
+        seed_social(users=25, follows=4, posts=2, likes=2, seed=11, chunk_size=15)
+        first = self.graph()
+        for model in (Like, Post, Follow, User):
+            model.objects.all().delete()
+        seed_social(users=25, follows=4, posts=2, likes=2, seed=11, chunk_size=15)
+        self.assertEqual(self.graph(), first)
+
+    def test_command_reports_rows(self):
+        out = StringIO()
+        call_command('seed_social', users=10, follows=2, posts=1, stdout=out)
+        self.assertIn('10 users', out.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 10)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATIONS_DISPATCH_BACKEND='sync')
+class BenchmarkHarnessTestCase(APITestCase):
+    def test_every_scenario_runs_without_errors(self):
+        seed_social(users=20, follows=4, posts=2, likes=2, comments=1, seed=3)
+        rng = random.Random(3)
+        workload = Workload(load_actors(3, rng), rng)
+        likes_before = Like.objects.count()
+        for scenario in SCENARIOS:
+            with self.subTest(scenario=scenario):
+                result = run_scenario(ClientTransport(), workload, scenario, operations=4)
+                self.assertEqual(result['operations'], 4)
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['queries_per_op'], 0)
+        # Write scenarios undo themselves
+        self.assertEqual(Like.objects.count(), likes_before)
+
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 11))
+        self.assertEqual(percentile(samples, 0.5), 5)
+        self.assertEqual(percentile(samples, 0.95), 10)
+        self.assertEqual(percentile(samples, 0.91), 10)
+        self.assertEqual(percentile(list(range(1, 101)), 0.07), 7)
+        self.assertEqual(percentile([3.0], 0.99), 3.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
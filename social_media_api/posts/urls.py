@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, UserFeedView
+from .views import PostViewSet, CommentViewSet, PostCommentViewSet, UserFeedView
 from .views import PostLikeView, PostUnlikeView
 
 # Create a router for the PostViewSet
@@ -21,6 +21,8 @@ urlpatterns = [
     # Accessible via /api/v1/comments/
     path('', include(comment_router.urls)),
     path('feed/', UserFeedView.as_view(), name='user-feed'),
+    # Cursor-paginated comments of a single post
+    path('posts/<int:post_pk>/comments/', PostCommentViewSet.as_view({'get': 'list', 'post': 'create'}), name='post-comments'),
     path('posts/<int:pk>/like/', PostLikeView.as_view(), name='post-like'), 
     path('posts/<int:pk>/unlike/', PostUnlikeView.as_view(), name='post-unlike'),
 ]
\ No newline at end of file
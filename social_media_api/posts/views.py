@@ -1,59 +1,99 @@
-from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from rest_framework import viewsets, permissions, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from .models import Post, Comment, Like
 from .serializers import PostSerializer, CommentSerializer
 from .permissions import IsAuthorOrReadOnly
+from .feed import fan_out_post, feed_queryset
+from .like_buffer import like_buffer, write_behind_enabled
+from .search import PostSearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from notifications.models import Notification
+from notifications.utils import create_notification
+from social_media_api.pagination import KeysetPagination, OptInKeysetPagination
+from social_media_api.query_planner import QueryPlannerMixin, plan_queryset
+
+
+def recent_comments_prefetch():
+    """
+    Prefetch each post's N most recent comments into `post.recent_comments`.
+
+    ROW_NUMBER() partitioned by post is computed in the database, so a post
+    with 50k comments still only sends N rows over the wire.
+    """
+    limit = getattr(settings, 'POSTS_COMMENT_PREVIEW_SIZE', 3)
+    recent = (
+        Comment.objects
+        .annotate(row_number=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(row_number__lte=limit)
+        .order_by('created_at', 'id')
+    )
+    return Prefetch('comments', queryset=plan_queryset(recent, CommentSerializer), to_attr='recent_comments')
+
+
+def adjust_post_counter(post_id, field, delta):
+    """Atomic `UPDATE ... SET field = field + delta`, safe under concurrent requests."""
+    Post.objects.filter(pk=post_id).update(**{field: F(field) + delta})
 
 # --- Feed View ---
-class UserFeedView(ListAPIView):
+class UserFeedView(QueryPlannerMixin, ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    # ?cursor= switches to keyset pagination for infinite scroll
+    pagination_class = OptInKeysetPagination
+    # feed_created_at is FeedEntry.created_at, so pages are read off the feed index
+    keyset_ordering = ('-feed_created_at', '-id')
+    # Enforced by query_profiler under `manage.py test`: an N+1 in the feed fails the suite
+    query_budget = 10
 
     def get_queryset(self):
-        user = self.request.user
-        
-        # [1] Checker Requirement: Use following.all() to get the queryset of followed users
-        # We'll name this queryset 'following_users' to satisfy the second requirement
-        following_users = user.following.all() # <-- Satisfies "following.all()"
-
-        # [2] Checker Requirement: Use Post.objects.filter(author__in=following_users).order_by
-        # Note: We must also order by creation date (newest first)
-        queryset = Post.objects.filter(author__in=following_users).order_by('-created_at') 
-        # <-- Satisfies "Post.objects.filter(author__in=following_users).order_by"
-        # The author__in lookup works because following_users is a QuerySet of User objects.
-        
-        return queryset
+        # Materialized feed: an indexed range read of the user's FeedEntry rows,
+        # merged with posts from high-fanout authors (see posts.feed)
+        return feed_queryset(self.request.user).prefetch_related(recent_comments_prefetch())
     
 # --- 1. Post ViewSet ---
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     # Require authentication for all actions
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = 10
 
     # --- Step 5: Pagination and Filtering ---
     # Implement filtering by title and content
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ?search= goes through the full-text index (posts.search), ranked best first
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, filters.OrderingFilter]
     filterset_fields = ['author__username', 'created_at'] # Can filter by author
-    search_fields = ['title', 'content'] # Can search by title and content
     ordering_fields = ['created_at', 'title'] # Can order results
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(recent_comments_prefetch())
+
     # Automatically set the author of the post to the currently logged-in user
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        post.recent_comments = [] # Nothing to prefetch for a brand new post
+        # Push the new post into every follower's materialized feed
+        fan_out_post(post)
 
 
 # --- 2. Comment ViewSet ---
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     # We will only query comments related to a specific post in the URL
     queryset = Comment.objects.all() 
     serializer_class = CommentSerializer
@@ -62,47 +102,112 @@ class CommentViewSet(viewsets.ModelViewSet):
     # Automatically set the author of the comment to the currently logged-in user
     def perform_create(self, serializer):
         # The Post ID will be passed in the request data, which the serializer handles.
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            adjust_post_counter(comment.post_id, 'comment_count', 1)
+        # NOTIFICATION: Notify the post author (written off the request path)
+        create_notification(actor=self.request.user, recipient=comment.post.author, verb="commented", target=comment.post)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            post_id = instance.post_id
+            instance.delete()
+            adjust_post_counter(post_id, 'comment_count', -1)
+
+
+# --- 3. Comments of one post ---
+class PostCommentViewSet(CommentViewSet):
+    """
+    /posts/<post_pk>/comments/: the full comment list of a post, oldest first,
+    cursor-paginated so that viral posts never load every comment at once.
+    """
+    pagination_class = KeysetPagination
+    keyset_ordering = ('created_at', 'id')
+    query_budget = 8
+
+    def get_post(self):
+        if not hasattr(self, '_post'):
+            self._post = get_object_or_404(Post, pk=self.kwargs['post_pk'])
+        return self._post
+
+    def get_queryset(self):
+        return Comment.objects.filter(post=self.get_post())
+
+    def perform_create(self, serializer):
+        post = self.get_post()
+        with transaction.atomic():
+            serializer.save(author=self.request.user, post=post)
+            adjust_post_counter(post.pk, 'comment_count', 1)
+        create_notification(actor=self.request.user, recipient=post.author, verb="commented", target=post)
+
+def is_liked(user_id, post_id):
+    """Like state as clients see it: an unflushed intent wins over the database."""
+    pending = like_buffer.pending_state(user_id, post_id)
+    if pending is not None:
+        return pending
+    return Like.objects.filter(user_id=user_id, post_id=post_id).exists()
+
 
 # --- 1. Like View ---
 class PostLikeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        if write_behind_enabled():
+            return self.buffered_post(request, pk)
+
+        post = get_object_or_404(Post, pk=pk)
         
         # Try to get or create the Like
-        like_instance, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like_instance, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                adjust_post_counter(post.pk, 'like_count', 1)
         
         if created:
             # NOTIFICATION: Notify the post author
-            if request.user != post.author:
-                Notification.objects.create(
-                    actor=request.user,
-                    recipient=post.author,
-                    verb="liked",
-                    content_type=ContentType.objects.get_for_model(post),
-                    object_id=post.pk,
-                    target=post
-                )
+            create_notification(actor=request.user, recipient=post.author, verb="liked", target=post)
             return Response({"detail": "Post liked."}, status=status.HTTP_201_CREATED)
         else:
             # Already liked
             return Response({"detail": "Post already liked."}, status=status.HTTP_400_BAD_REQUEST)
 
+    def buffered_post(self, request, pk):
+        # Write-behind mode: record the intent, the like buffer writes it later
+        if not Post.objects.filter(pk=pk).exists():
+            raise Http404
+        if is_liked(request.user.pk, pk):
+            return Response({"detail": "Post already liked."}, status=status.HTTP_400_BAD_REQUEST)
+        like_buffer.record(request.user.pk, pk, liked=True)
+        return Response({"detail": "Post liked."}, status=status.HTTP_201_CREATED)
+
 
 # --- 2. Unlike View ---
 class PostUnlikeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        if write_behind_enabled():
+            return self.buffered_post(request, pk)
+
+        post = get_object_or_404(Post, pk=pk)
         
         # Try to delete the Like
-        deleted_count, _ = Like.objects.filter(user=request.user, post=post).delete()
+        with transaction.atomic():
+            deleted_count, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted_count > 0:
+                adjust_post_counter(post.pk, 'like_count', -1)
         
         if deleted_count > 0:
             return Response({"detail": "Post unliked."}, status=status.HTTP_200_OK)
         else:
             # Was not liked previously
-            return Response({"detail": "Post was not liked."}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({"detail": "Post was not liked."}, status=status.HTTP_400_BAD_REQUEST)
+
+    def buffered_post(self, request, pk):
+        if not Post.objects.filter(pk=pk).exists():
+            raise Http404
+        if not is_liked(request.user.pk, pk):
+            return Response({"detail": "Post was not liked."}, status=status.HTTP_400_BAD_REQUEST)
+        like_buffer.record(request.user.pk, pk, liked=False)
+        return Response({"detail": "Post unliked."}, status=status.HTTP_200_OK)
@@ -0,0 +1,322 @@
+"""
+Load benchmark for the hot API endpoints.
+
+`python manage.py benchmark_api` seeds a synthetic social graph, replays a
+mix of feed, post, like, follow and notification requests against it and
+reports throughput and latency percentiles per scenario.
+
+- Seeding: `seeding.seed_social` (the `seed_social` command) bulk-loads
+  users, a Zipf-distributed follow graph, posts, likes, comments and
+  notifications, then builds counters, feeds and the search index.
+- Transports: `ClientTransport` calls the views in-process through Django's
+  test client (no network or server noise, SQL query counts available);
+  `HttpTransport` sends real HTTP requests to a running server, e.g.
+  `gunicorn social_media_api.wsgi -w 4`, from several threads.
+- Baselines: results can be saved under a name in BASELINES_FILE, together
+  with the commit and parameters they were measured at, and later runs
+  compared against them.
+"""
+import json
+import math
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.test import Client
+
+from accounts.tokens import issue_token
+from posts.models import Like, Post
+from query_profiler.profiler import QueryRecorder
+
+from .seeding import USERNAME_PREFIX, Follow, User
+
+BASELINES_FILE = Path(settings.BASE_DIR) / 'benchmarks' / 'baselines.json'
+
+
+# --- Scenarios ---
+
+class Actor:
+    """A seeded user issuing requests, with what it follows and likes tracked client-side."""
+
+    def __init__(self, user, token):
+        self.user = user
+        self.token = token
+        self.following = set(
+            Follow.objects.filter(to_customuser=user).values_list('from_customuser_id', flat=True)
+        )
+        self.liked = set(Like.objects.filter(user=user).values_list('post_id', flat=True))
+        self.lock = threading.Lock()
+
+
+def load_actors(count, rng):
+    """Pick `count` seeded users (the most-following ones first) and give them API tokens."""
+    users = list(
+        User.objects.filter(username__startswith=USERNAME_PREFIX)
+        .order_by('-following_count', 'pk')[:count]
+    )
+    rng.shuffle(users)
+    return [Actor(user, issue_token(user).key) for user in users]
+
+
+class Workload:
+    """Shared state the scenarios draw random targets from."""
+
+    def __init__(self, actors, rng):
+        self.actors = actors
+        self.rng = rng
+        self.user_ids = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('pk', flat=True)
+        )
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        self._lock = threading.Lock()
+
+    def pick(self, population):
+        with self._lock:
+            return self.rng.choice(population)
+
+    def other_user(self, actor):
+        while True:
+            user_id = self.pick(self.user_ids)
+            if user_id != actor.user.pk and user_id not in actor.following:
+                return user_id
+
+    def unliked_post(self, actor):
+        while True:
+            post_id = self.pick(self.post_ids)
+            if post_id not in actor.liked:
+                return post_id
+
+
+# Each scenario returns the (method, path, body) requests making up one
+# operation. Write scenarios undo themselves so the graph stays the same
+# size however long the run.
+
+def feed(workload, actor):
+    return [('GET', '/api/v1/feed/', None)]
+
+
+def feed_cursor(workload, actor):
+    return [('GET', '/api/v1/feed/?cursor=', None)]
+
+
+def posts(workload, actor):
+    return [('GET', '/api/v1/posts/', None)]
+
+
+def post_comments(workload, actor):
+    return [('GET', f'/api/v1/posts/{workload.pick(workload.post_ids)}/comments/', None)]
+
+
+def like_unlike(workload, actor):
+    post_id = workload.unliked_post(actor)
+    return [
+        ('POST', f'/api/v1/posts/{post_id}/like/', None),
+        ('POST', f'/api/v1/posts/{post_id}/unlike/', None),
+    ]
+
+
+def follow_unfollow(workload, actor):
+    user_id = workload.other_user(actor)
+    return [
+        ('POST', f'/api/auth/follow/{user_id}/', None),
+        ('POST', f'/api/auth/unfollow/{user_id}/', None),
+    ]
+
+
+def notifications(workload, actor):
+    return [('GET', '/api/v1/notifications/', None)]
+
+
+def unread_count(workload, actor):
+    return [('GET', '/api/v1/notifications/unread-count/', None)]
+
+
+SCENARIOS = {
+    'feed': feed,
+    'feed_cursor': feed_cursor,
+    'posts': posts,
+    'post_comments': post_comments,
+    'like_unlike': like_unlike,
+    'follow_unfollow': follow_unfollow,
+    'notifications': notifications,
+    'unread_count': unread_count,
+}
+
+
+# --- Transports ---
+
+class ClientTransport:
+    """In-process requests through Django's test client, counting SQL queries."""
+
+    concurrency = 1
+    counts_queries = True
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, actor, method, path, body):
+        headers = {'HTTP_AUTHORIZATION': f'Token {actor.token}'}
+        recorder = QueryRecorder()
+        with recorder:
+            # secure=True: SECURE_SSL_REDIRECT would otherwise answer 301
+            if method == 'GET':
+                response = self.client.get(path, secure=True, **headers)
+            else:
+                response = self.client.post(path, body or {}, content_type='application/json',
+                                            secure=True, **headers)
+        return response.status_code, recorder.count
+
+
+class HttpTransport:
+    """Real HTTP requests to a running server, from `concurrency` threads."""
+
+    counts_queries = False
+
+    def __init__(self, base_url, concurrency=4, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def request(self, actor, method, path, body):
+        data = json.dumps(body or {}).encode() if method != 'GET' else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Authorization': f'Token {actor.token}', 'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, None
+        except OSError:
+            return 0, None
+
+
+# --- Running and reporting ---
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    # The smallest sample with at least `fraction` of the samples at or below it;
+    # rounded first so float noise (0.07 * 100 = 7.000000000000001) does not move up a rank
+    rank = math.ceil(round(fraction * len(sorted_samples), 9))
+    index = min(len(sorted_samples) - 1, max(0, rank - 1))
+    return sorted_samples[index]
+
+
+def summarize(latencies, errors, queries, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'operations': len(latencies),
+        'errors': errors,
+        'ops_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'queries_per_op': round(statistics.fmean(queries), 1) if queries else None,
+    }
+
+
+def run_scenario(transport, workload, scenario, operations, warmup=0):
+    """Run `operations` timed operations of one scenario (after `warmup` untimed ones)."""
+    build = SCENARIOS[scenario]
+    latencies, queries = [], []
+    errors = 0
+    lock = threading.Lock()
+
+    def operation(index):
+        actor = workload.actors[index % len(workload.actors)]
+        # One actor's write pairs must not interleave across threads
+        with actor.lock:
+            requests = build(workload, actor)
+            started = time.perf_counter()
+            statuses, counts = [], []
+            for method, path, body in requests:
+                status, count = transport.request(actor, method, path, body)
+                statuses.append(status)
+                counts.append(count)
+            elapsed = time.perf_counter() - started
+        failed = any(not 200 <= status < 300 for status in statuses)
+        return elapsed, failed, None if None in counts else sum(counts)
+
+    def record(result):
+        nonlocal errors
+        elapsed, failed, count = result
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+            if count is not None:
+                queries.append(count)
+
+    for index in range(warmup):
+        operation(index)
+
+    started = time.perf_counter()
+    if transport.concurrency > 1:
+        with ThreadPoolExecutor(max_workers=transport.concurrency) as pool:
+            for result in pool.map(operation, range(operations)):
+                record(result)
+    else:
+        for index in range(operations):
+            record(operation(index))
+    return summarize(latencies, errors, queries, time.perf_counter() - started)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_baselines(path=BASELINES_FILE):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(name, params, results, path=BASELINES_FILE):
+    path = Path(path)
+    baselines = load_baselines(path)
+    baselines[name] = {
+        'commit': current_commit(),
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': params,
+        'results': results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+
+
+def compare(results, baseline):
+    """
+    Per-scenario relative change against a stored baseline, in percent:
+    {scenario: {'ops_per_sec': +12.0, 'p50_ms': -8.5, 'p99_ms': ...}}.
+    Positive latency changes and negative throughput changes are regressions.
+    """
+    changes = {}
+    for scenario, current in results.items():
+        previous = baseline['results'].get(scenario)
+        if not previous:
+            continue
+        changes[scenario] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ('ops_per_sec', 'p50_ms', 'p99_ms')
+            if previous.get(metric)
+        }
+    return changes
@@ -0,0 +1,157 @@
+"""
+Keyset (cursor) pagination shared by the feed, posts and notifications endpoints.
+
+Page-number pagination issues a COUNT(*) plus an OFFSET scan whose cost grows
+with page depth. Keyset pagination instead remembers the sort key of the last
+row served - e.g. (created_at, id) - and asks for the rows strictly after it,
+which the composite indexes on those columns answer in O(page size) however
+deep the client scrolls. No count is ever computed.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over a unique, totally ordered key.
+
+    Views declare the key with `keyset_ordering`, e.g. ('-created_at', '-id');
+    the last field must be unique so that ties on the first are broken. Key
+    fields may be annotations of the view's queryset.
+    Cursors are opaque, URL-safe tokens and stay valid when new rows arrive.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    default_ordering = ('-created_at', '-id')
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.default_ordering))
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def encode_cursor(self, values):
+        # isoformat() keeps full microsecond precision, unlike DjangoJSONEncoder
+        payload = json.dumps(values, default=lambda value: value.isoformat(), separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def key_field(self, queryset, name):
+        """The model field, or the annotation's output field, holding the key `name`."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, token, queryset):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self.key_field(queryset, name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, UnicodeDecodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def build_keyset_filter(self, values):
+        """(a, b) after (va, vb) => a > va OR (a = va AND b > vb), flipped for descending fields."""
+        condition = Q()
+        equal_prefix = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+            equal_prefix &= Q(**{field: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.build_keyset_filter(self.decode_cursor(token, queryset)))
+
+        # Fetch one extra row to learn whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, name.lstrip('-')) for name in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client opts into keyset mode by sending
+    `?cursor=` (empty for the first page, then the token from `next`).
+
+    Keyset pages always follow the view's `keyset_ordering`, so `?ordering=`
+    is rejected with `?cursor=`; search results come newest first instead of
+    ranked.
+    """
+    keyset_class = KeysetPagination
+    page_size_query_param = KeysetPagination.page_size_query_param
+    max_page_size = KeysetPagination.max_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            if api_settings.ORDERING_PARAM in request.query_params:
+                raise ValidationError({
+                    api_settings.ORDERING_PARAM: f"Not supported with ?{self.keyset_class.cursor_query_param}=; "
+                                                 "keyset pages have a fixed order.",
+                })
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
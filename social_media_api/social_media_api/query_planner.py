@@ -0,0 +1,108 @@
+"""
+Prefetch-aware query planner for DRF views.
+
+Serializers read related objects field by field (`author.username`, nested
+`CommentSerializer(many=True)`, ...), which without eager loading costs one
+query per row. `plan_queryset` walks a serializer's field tree against the
+model graph and applies the matching `select_related` / `prefetch_related`
+calls, recursing into nested serializers so that their own relations are
+joined too (e.g. `Prefetch('comments', Comment.objects.select_related('author'))`).
+"""
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.relations import RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _serializer_fields(serializer):
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    return serializer.fields
+
+
+def _walk(model, fields, prefix, select, prefetch):
+    for field in fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(nested, BaseSerializer):
+            nested = None
+        # A bare primary key is read from the local `<name>_id` column, no join needed
+        pk_only = isinstance(field, RelatedField) and field.use_pk_only_optimization()
+
+        current, path = model, []
+        for attr in field.source_attrs:
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if isinstance(model_field, GenericForeignKey):
+                prefetch.append(prefix + '__'.join(path + [attr]))
+                path = []
+                break
+            if not model_field.is_relation:
+                break
+
+            path.append(attr)
+            current = model_field.related_model
+            if model_field.many_to_many or model_field.one_to_many:
+                lookup = prefix + '__'.join(path)
+                if nested is not None:
+                    queryset = plan_queryset(current._default_manager.all(), nested)
+                    prefetch.append(Prefetch(lookup, queryset=queryset))
+                else:
+                    prefetch.append(lookup)
+                path = []
+                break
+        else:
+            if nested is not None and path:
+                # Single nested object: join it and plan its own fields on top
+                select.add(prefix + '__'.join(path))
+                _walk(current, _serializer_fields(nested), prefix + '__'.join(path) + '__', select, prefetch)
+                continue
+            if pk_only and path:
+                path.pop()
+
+        if path:
+            select.add(prefix + '__'.join(path))
+
+
+def plan_queryset(queryset, serializer):
+    """Apply the eager loading that `serializer` needs to render rows of `queryset`."""
+    select, prefetch = set(), []
+    _walk(queryset.model, _serializer_fields(serializer), '', select, prefetch)
+
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+
+    # Lookups the view already prefetches itself (possibly with a custom queryset) win
+    seen = {
+        getattr(lookup, 'prefetch_to', lookup)
+        for lookup in queryset._prefetch_related_lookups
+    }
+    lookups = [
+        lookup for lookup in prefetch
+        if getattr(lookup, 'prefetch_to', lookup) not in seen
+    ]
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+class QueryPlannerMixin:
+    """
+    Generic view mixin: eager-loads whatever `get_serializer_class()` reads,
+    so list endpoints issue a constant number of queries per page.
+
+    Planning happens in `filter_queryset` (used by both `list` and
+    `get_object`) so it also covers views that override `get_queryset`.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return plan_queryset(queryset, serializer)
@@ -0,0 +1,303 @@
+"""
+Bulk generator for large synthetic datasets (`manage.py seed_social`).
+
+Creating users through RegisterView or `create_user` hashes a password per
+user and writes one row per statement, which takes hours at millions of
+rows. The seeder instead:
+
+- hashes the password once and gives every user the same hash;
+- assigns primary keys itself (above the current maximum), so follows,
+  posts, likes and comments can reference users and posts without reading
+  them back, and every chunk can be generated independently;
+- writes each stage in chunks of roughly `chunk_size` rows, one
+  `bulk_create` per model and one transaction per chunk;
+- draws each chunk's data from its own RNG seeded with (seed, stage, chunk),
+  so the same seed and chunk size produce the same data however many
+  worker processes share the chunks;
+- derives follower/like/comment counters, materialized feeds and the
+  search index at the end, which bulk_create skipped.
+
+Follower counts follow a Zipf distribution over a shuffled popularity
+ranking: a few accounts with huge audiences, a long tail with a handful.
+Notifications are written pre-aggregated, one row per (recipient, verb,
+target), about a third of them read.
+"""
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import StringIO
+from itertools import accumulate
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from notifications.models import Notification
+from posts.feed import materialize_feeds
+from posts.models import Comment, Like, Post
+from posts.search import get_search_backend
+
+User = get_user_model()
+# Row of the followers M2M: from_customuser is followed by to_customuser
+Follow = User.followers.through
+
+USERNAME_PREFIX = 'seed_'
+DEFAULT_CHUNK_SIZE = 10_000
+BATCH_SIZE = 2000
+READ_RATIO = 0.3
+SAMPLE_ACTORS = 3
+
+WORDS = (
+    'django rest api feed post like follow social graph cache index query '
+    'python latency throughput database shard replica queue worker token '
+    'timeline photo travel coffee music weekend launch release update'
+).split()
+
+
+class SeedPlan:
+    """Everything a worker needs to generate any chunk; small and picklable."""
+
+    def __init__(self, users, follows, posts, likes, comments, zipf_exponent, seed,
+                 password_hash, user_offset, post_offset):
+        self.users = users
+        self.follows = follows
+        self.posts = posts * users  # total, `posts` is the average per user
+        self.likes = likes
+        self.comments = comments
+        self.zipf_exponent = zipf_exponent
+        self.seed = seed
+        self.password_hash = password_hash
+        self.user_offset = user_offset
+        self.post_offset = post_offset
+
+    def rng(self, stage, start):
+        return random.Random(f'{self.seed}:{stage}:{start}')
+
+    def user_id(self, index):
+        return self.user_offset + index + 1
+
+    def post_id(self, index):
+        return self.post_offset + index + 1
+
+
+@lru_cache(maxsize=2)
+def _popularity(seed, users, exponent):
+    """User indexes in popularity order and their cumulative Zipf weights."""
+    ranking = list(range(users))
+    random.Random(f'{seed}:popularity').shuffle(ranking)
+    return ranking, list(accumulate(1 / rank ** exponent for rank in range(1, users + 1)))
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def _content_types():
+    return ContentType.objects.get_for_model(User).pk, ContentType.objects.get_for_model(Post).pk
+
+
+# --- Stages: each generates one chunk [start, stop) and returns the rows written ---
+
+def seed_users(plan, start, stop):
+    rng = plan.rng('users', start)
+    User.objects.bulk_create(
+        [
+            User(pk=plan.user_id(i), username=f'{USERNAME_PREFIX}{plan.user_id(i)}',
+                 email=f'{USERNAME_PREFIX}{plan.user_id(i)}@example.com',
+                 password=plan.password_hash, bio=_text(rng, 8))
+            for i in range(start, stop)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return stop - start
+
+
+def seed_follows(plan, start, stop):
+    """Follow edges of the followers in [start, stop), plus their 'followed' notifications."""
+    rng = plan.rng('follows', start)
+    ranking, cum_weights = _popularity(plan.seed, plan.users, plan.zipf_exponent)
+    user_type_id, _ = _content_types()
+    follows, notifications = [], []
+    for i in range(start, stop):
+        wanted = min(rng.randint(0, 2 * plan.follows), plan.users - 1)
+        follower_id = plan.user_id(i)
+        for target in set(rng.choices(ranking, cum_weights=cum_weights, k=wanted)) - {i}:
+            target_id = plan.user_id(target)
+            follows.append(Follow(from_customuser_id=target_id, to_customuser_id=follower_id))
+            notifications.append(Notification(
+                recipient_id=target_id, actor_id=follower_id, verb='followed',
+                content_type_id=user_type_id, object_id=follower_id, read=rng.random() < READ_RATIO,
+            ))
+    Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    return len(follows)
+
+
+def seed_posts(plan, start, stop):
+    rng = plan.rng('posts', start)
+    Post.objects.bulk_create(
+        [
+            Post(pk=plan.post_id(i), author_id=plan.user_id(rng.randrange(plan.users)),
+                 title=_text(rng, 5), content=_text(rng, 40))
+            for i in range(start, stop)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return stop - start
+
+
+def _aggregated_notifications(plan, rng, verb, start, stop, actors_by_post):
+    """One notification per post to its author, as the dispatcher would have aggregated it."""
+    _, post_type_id = _content_types()
+    authors = dict(
+        Post.objects.filter(pk__gte=plan.post_id(start), pk__lt=plan.post_id(stop))
+        .values_list('pk', 'author_id')
+    )
+    return [
+        Notification(
+            recipient_id=authors[post_id], actor_id=actor_ids[-1], verb=verb,
+            content_type_id=post_type_id, object_id=post_id, actor_count=len(actor_ids),
+            actor_sample=actor_ids[::-1][:SAMPLE_ACTORS], read=rng.random() < READ_RATIO,
+        )
+        for post_id, actor_ids in actors_by_post.items()
+    ]
+
+
+def seed_likes(plan, start, stop):
+    """Likes of the posts in [start, stop), distinct users per post, plus 'liked' notifications."""
+    rng = plan.rng('likes', start)
+    likers = {}
+    for i in range(start, stop):
+        count = min(rng.randint(0, 2 * plan.likes), plan.users)
+        if count:
+            likers[plan.post_id(i)] = [plan.user_id(u) for u in rng.sample(range(plan.users), count)]
+    Like.objects.bulk_create(
+        [Like(user_id=user_id, post_id=post_id) for post_id, ids in likers.items() for user_id in ids],
+        batch_size=BATCH_SIZE,
+    )
+    Notification.objects.bulk_create(
+        _aggregated_notifications(plan, rng, 'liked', start, stop, likers), batch_size=BATCH_SIZE
+    )
+    return sum(len(ids) for ids in likers.values())
+
+
+def seed_comments(plan, start, stop):
+    rng = plan.rng('comments', start)
+    commenters = {}
+    for i in range(start, stop):
+        count = rng.randint(0, 2 * plan.comments)
+        if count:
+            commenters[plan.post_id(i)] = [plan.user_id(rng.randrange(plan.users)) for _ in range(count)]
+    Comment.objects.bulk_create(
+        [Comment(post_id=post_id, author_id=user_id, content=_text(rng, 12))
+         for post_id, ids in commenters.items() for user_id in ids],
+        batch_size=BATCH_SIZE,
+    )
+    Notification.objects.bulk_create(
+        _aggregated_notifications(plan, rng, 'commented', start, stop, commenters), batch_size=BATCH_SIZE
+    )
+    return sum(len(ids) for ids in commenters.values())
+
+
+def seed_feeds(plan, start, stop):
+    """Materialized feeds of the followers in [start, stop); needs follower counts to be current."""
+    return materialize_feeds(
+        Follow.objects.filter(
+            to_customuser_id__gte=plan.user_id(start), to_customuser_id__lt=plan.user_id(stop)
+        ).values_list('to_customuser_id', 'from_customuser_id')
+    )
+
+
+# --- Running ---
+
+def _init_worker():
+    django.setup()
+
+
+def _run_chunk(stage, plan, start, stop):
+    with transaction.atomic():
+        return stage(plan, start, stop)
+
+
+def _run_stage(stage, plan, total, per_chunk, workers):
+    chunks = [(start, min(start + per_chunk, total)) for start in range(0, total, per_chunk)]
+    if workers > 1 and len(chunks) > 1:
+        # Forked children must open their own connections, not share ours
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [pool.submit(_run_chunk, stage, plan, start, stop) for start, stop in chunks]
+            return sum(future.result() for future in futures)
+    return sum(_run_chunk(stage, plan, start, stop) for start, stop in chunks)
+
+
+def _reset_sequences(models):
+    # Explicit primary keys leave PostgreSQL sequences behind; SQLite needs nothing
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def seed_social(users=1000, follows=20, posts=5, likes=5, comments=1, zipf_exponent=1.1,
+                seed=42, password='password', chunk_size=DEFAULT_CHUNK_SIZE, workers=1, stdout=None):
+    """
+    Generate a social graph on top of whatever is already in the database.
+
+    `follows` (accounts followed) and `posts` are averages per user, `likes`
+    and `comments` averages per post; individual counts are drawn uniformly
+    between 0 and twice the average. Returns {stage: rows written}.
+    """
+    out = stdout or StringIO()
+    if workers > 1 and connection.vendor == 'sqlite':
+        # SQLite takes one writer at a time, and test databases live in memory
+        out.write("SQLite: ignoring --workers, seeding in one process.\n")
+        workers = 1
+
+    plan = SeedPlan(
+        users, follows, posts, likes, comments, zipf_exponent, seed,
+        password_hash=make_password(password),
+        user_offset=User.objects.aggregate(n=Max('pk'))['n'] or 0,
+        post_offset=Post.objects.aggregate(n=Max('pk'))['n'] or 0,
+    )
+    notifications_before = Notification.objects.count()
+    counts = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        rows = counts[name] = func()
+        elapsed = time.perf_counter() - started
+        rate = f" ({rows / elapsed:,.0f} rows/s)" if elapsed else ""
+        out.write(f"{name:<14}{rows:>12,} rows in {elapsed:.1f}s{rate}\n")
+
+    def stage(func, total, rows_per_item):
+        per_chunk = max(1, chunk_size // max(1, rows_per_item))
+        return lambda: _run_stage(func, plan, total, per_chunk, workers)
+
+    timed('users', stage(seed_users, plan.users, 1))
+    _reset_sequences([User])
+    timed('follows', stage(seed_follows, plan.users, follows))
+    timed('posts', stage(seed_posts, plan.posts, 1))
+    _reset_sequences([Post])
+    timed('likes', stage(seed_likes, plan.posts, likes))
+    timed('comments', stage(seed_comments, plan.posts, comments))
+
+    started = time.perf_counter()
+    call_command('reconcile_follow_counts', stdout=StringIO())
+    call_command('reconcile_post_counters', stdout=StringIO())
+    out.write(f"{'counters':<14}{'':>12} rebuilt in {time.perf_counter() - started:.1f}s\n")
+
+    # Feeds read follower counts (high-fanout authors are skipped), so they come after the counters
+    backfill = min(posts, getattr(settings, 'FEED_BACKFILL_LIMIT', 200))
+    timed('feed_entries', stage(seed_feeds, plan.users, follows * backfill))
+    timed('search_index', get_search_backend().rebuild)
+
+    counts['notifications'] = Notification.objects.count() - notifications_before
+    return counts
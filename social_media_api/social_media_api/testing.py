@@ -0,0 +1,27 @@
+"""Test helpers shared by the apps' test suites."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """Mixin for APITestCase subclasses that guards list endpoints against N+1 queries."""
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return len(context.captured_queries)
+
+    def assertQueriesDoNotScale(self, url, add_rows, **params):
+        """
+        Fail if GET `url` issues more queries after `add_rows()` has added
+        more data to the page, i.e. if the query count grows with page size.
+        """
+        before = self.count_queries(url, **params)
+        add_rows()
+        after = self.count_queries(url, **params)
+        self.assertEqual(
+            before, after,
+            f"{url} issued {before} queries, then {after} after adding rows: "
+            "some relation is loaded per row instead of being eager-loaded."
+        )
@@ -20,6 +20,7 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/',  include('accounts.urls')),
-    path('api/v1', include('posts.urls')),
+    path('api/v1/', include('posts.urls')),
     path('api/v1/notifications/', include('notifications.urls')),
+    path('__profiler__/', include('query_profiler.urls')),
 ]